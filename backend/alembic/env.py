@@ -7,9 +7,12 @@ from sqlalchemy.ext.asyncio import async_engine_from_config
 
 from app.core.config import settings
 from app.core.database import Base
+from app.models.asset_counter import AssetCounter
 from app.models.equipment import Equipment, EquipmentMovement, StorageDevice
+from app.models.idempotency import IdempotencyKey
 from app.models.personnel import Personnel
 from app.models.phone import Phone
+from app.models.rate_limit import LoginRateLimit
 from app.models.storage_and_passes import StorageAndPass
 from app.models.user import User
 
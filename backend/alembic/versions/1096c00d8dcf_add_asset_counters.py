@@ -0,0 +1,112 @@
+"""add_asset_counters
+
+Revision ID: 1096c00d8dcf
+Revises: d1ca21fe660e
+Create Date: 2026-10-17 15:40:27.118302
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1096c00d8dcf'
+down_revision: Union[str, Sequence[str], None] = 'd1ca21fe660e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# entity -> (таблица, выражение типа, выражение is_personal); то же, что COUNTER_SOURCES
+# в app/services/asset_counters.py
+COUNTER_SOURCES = {
+    'equipment': ('equipment', "coalesce(equipment_type, '')", 'coalesce(is_personal, false)'),
+    'storage_and_pass': ('storage_and_passes', "coalesce(asset_type, '')", 'false'),
+    'phone': ('phones', "''", 'false'),
+}
+
+_UPSERT = """
+        INSERT INTO asset_counters AS c (entity, asset_type, status, is_personal, is_active, count)
+        SELECT '{entity}', t, s, p, a, sum(delta)
+        FROM ({source}) AS d (t, s, p, a, delta)
+        GROUP BY t, s, p, a
+        HAVING sum(delta) <> 0
+        ORDER BY t, s, p, a
+        ON CONFLICT (entity, asset_type, status, is_personal, is_active)
+        DO UPDATE SET count = c.count + EXCLUDED.count;"""
+
+
+def _rows(type_expr: str, personal_expr: str, relation: str, delta: int) -> str:
+    return (
+        f"SELECT {type_expr}, coalesce(status, ''), {personal_expr}, "
+        f"coalesce(is_active, false), {delta} FROM {relation}"
+    )
+
+
+def _trigger_function(entity: str, table: str, type_expr: str, personal_expr: str) -> str:
+    inserted = _rows(type_expr, personal_expr, 'new_rows', 1)
+    deleted = _rows(type_expr, personal_expr, 'old_rows', -1)
+    return f"""
+CREATE FUNCTION {table}_asset_counters() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN{_UPSERT.format(entity=entity, source=inserted)}
+    ELSIF TG_OP = 'DELETE' THEN{_UPSERT.format(entity=entity, source=deleted)}
+    ELSE{_UPSERT.format(entity=entity, source=f'{inserted} UNION ALL {deleted}')}
+    END IF;
+    RETURN NULL;
+END
+$$"""
+
+
+def upgrade() -> None:
+    """
+    Таблица asset_counters и statement-level триггеры с transition tables:
+    одна пачка дельт на оператор, а не на строку, поэтому массовые UPDATE
+    (batch, удаление военнослужащего, импорт) стоят одного upsert по счётчикам.
+    """
+    op.create_table(
+        'asset_counters',
+        sa.Column('entity', sa.String(length=32), nullable=False),
+        sa.Column('asset_type', sa.String(length=50), nullable=False),
+        sa.Column('status', sa.String(length=50), nullable=False),
+        sa.Column('is_personal', sa.Boolean(), nullable=False),
+        sa.Column('is_active', sa.Boolean(), nullable=False),
+        sa.Column('count', sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint('entity', 'asset_type', 'status', 'is_personal', 'is_active'),
+    )
+
+    for entity, (table, type_expr, personal_expr) in COUNTER_SOURCES.items():
+        op.execute(_trigger_function(entity, table, type_expr, personal_expr))
+        op.execute(
+            f'CREATE TRIGGER {table}_asset_counters_insert AFTER INSERT ON {table} '
+            f'REFERENCING NEW TABLE AS new_rows '
+            f'FOR EACH STATEMENT EXECUTE FUNCTION {table}_asset_counters()'
+        )
+        op.execute(
+            f'CREATE TRIGGER {table}_asset_counters_update AFTER UPDATE ON {table} '
+            f'REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows '
+            f'FOR EACH STATEMENT EXECUTE FUNCTION {table}_asset_counters()'
+        )
+        op.execute(
+            f'CREATE TRIGGER {table}_asset_counters_delete AFTER DELETE ON {table} '
+            f'REFERENCING OLD TABLE AS old_rows '
+            f'FOR EACH STATEMENT EXECUTE FUNCTION {table}_asset_counters()'
+        )
+        # Начальное заполнение; таблица блокируется от записи до конца миграции
+        op.execute(f'LOCK TABLE {table} IN SHARE MODE')
+        op.execute(
+            f"INSERT INTO asset_counters (entity, asset_type, status, is_personal, is_active, count) "
+            f"SELECT '{entity}', t, s, p, a, sum(delta) "
+            f"FROM ({_rows(type_expr, personal_expr, table, 1)}) AS d (t, s, p, a, delta) "
+            f"GROUP BY t, s, p, a"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in (table for table, _, _ in COUNTER_SOURCES.values()):
+        for event in ('insert', 'update', 'delete'):
+            op.execute(f'DROP TRIGGER IF EXISTS {table}_asset_counters_{event} ON {table}')
+        op.execute(f'DROP FUNCTION IF EXISTS {table}_asset_counters()')
+    op.drop_table('asset_counters')
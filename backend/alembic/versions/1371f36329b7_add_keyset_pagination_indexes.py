@@ -0,0 +1,46 @@
+"""add_keyset_pagination_indexes
+
+Revision ID: 1371f36329b7
+Revises: b6489fb8921c
+Create Date: 2026-10-17 12:14:05.318442
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1371f36329b7'
+down_revision: Union[str, Sequence[str], None] = 'b6489fb8921c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Составные индексы под ORDER BY списков (keyset-пагинация)."""
+    op.create_index('ix_equipment_inventory_id', 'equipment', ['inventory_number', 'id'])
+    op.create_index('ix_storage_devices_inventory_id', 'storage_devices', ['inventory_number', 'id'])
+    op.create_index('ix_phones_storage_location_id', 'phones', ['storage_location', 'id'])
+    op.create_index(
+        'ix_personnel_list_order', 'personnel', ['rank_priority', 'position', 'full_name', 'id']
+    )
+    op.create_index(
+        'ix_storage_passes_list_order', 'storage_and_passes', ['asset_type', 'serial_number', 'id']
+    )
+    op.create_index(
+        'ix_equipment_movements_history',
+        'equipment_movements',
+        ['equipment_id', sa.text('created_at DESC'), sa.text('id DESC')],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_equipment_movements_history', table_name='equipment_movements')
+    op.drop_index('ix_storage_passes_list_order', table_name='storage_and_passes')
+    op.drop_index('ix_personnel_list_order', table_name='personnel')
+    op.drop_index('ix_phones_storage_location_id', table_name='phones')
+    op.drop_index('ix_storage_devices_inventory_id', table_name='storage_devices')
+    op.drop_index('ix_equipment_inventory_id', table_name='equipment')
@@ -0,0 +1,116 @@
+"""partition_equipment_movements
+
+Revision ID: 375062cabd8b
+Revises: e27d30af697a
+Create Date: 2026-10-17 21:26:04.913520
+
+"""
+from datetime import datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '375062cabd8b'
+down_revision: Union[str, Sequence[str], None] = 'e27d30af697a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+COLUMNS = (
+    "id, equipment_id, from_location, to_location, from_person_id, to_person_id, "
+    "movement_type, document_number, document_date, reason, created_at, created_by_id"
+)
+
+# Синхронно с app.models.equipment.EquipmentMovement
+TABLE_DDL = """
+CREATE TABLE {name} (
+    id integer NOT NULL DEFAULT nextval('equipment_movements_id_seq'),
+    equipment_id integer NOT NULL,
+    from_location varchar(255),
+    to_location varchar(255),
+    from_person_id integer,
+    to_person_id integer,
+    movement_type varchar(50),
+    document_number varchar(100),
+    document_date timestamptz,
+    reason text,
+    created_at timestamptz NOT NULL DEFAULT timezone('UTC', now()),
+    created_by_id integer
+){suffix}
+"""
+
+FOREIGN_KEYS = (
+    "ADD CONSTRAINT equipment_movements_equipment_id_fkey FOREIGN KEY (equipment_id) REFERENCES equipment (id) ON DELETE CASCADE",
+    "ADD CONSTRAINT equipment_movements_from_person_id_fkey FOREIGN KEY (from_person_id) REFERENCES personnel (id)",
+    "ADD CONSTRAINT equipment_movements_to_person_id_fkey FOREIGN KEY (to_person_id) REFERENCES personnel (id)",
+    "ADD CONSTRAINT equipment_movements_created_by_id_fkey FOREIGN KEY (created_by_id) REFERENCES users (id)",
+)
+
+
+def _create_indexes(partitioned: bool) -> None:
+    op.create_index('ix_equipment_movements_equipment_id', 'equipment_movements', ['equipment_id'])
+    op.create_index('ix_equipment_movements_from_person_id', 'equipment_movements', ['from_person_id'])
+    op.create_index('ix_equipment_movements_to_person_id', 'equipment_movements', ['to_person_id'])
+    op.create_index(
+        'ix_equipment_movements_history', 'equipment_movements',
+        ['equipment_id', sa.text('created_at DESC'), sa.text('id DESC')],
+    )
+    if partitioned:
+        op.create_index(
+            'ix_equipment_movements_created_at_brin', 'equipment_movements', ['created_at'],
+            postgresql_using='brin',
+        )
+    else:
+        op.create_index('ix_equipment_movements_id', 'equipment_movements', ['id'])
+
+
+def _swap(new_name: str) -> None:
+    """Заменить equipment_movements таблицей new_name, сохранив последовательность id."""
+    op.execute("ALTER SEQUENCE equipment_movements_id_seq OWNED BY NONE")
+    op.execute("DROP TABLE equipment_movements")
+    op.execute(f"ALTER TABLE {new_name} RENAME TO equipment_movements")
+    op.execute("ALTER SEQUENCE equipment_movements_id_seq OWNED BY equipment_movements.id")
+    for foreign_key in FOREIGN_KEYS:
+        op.execute(f"ALTER TABLE equipment_movements {foreign_key}")
+
+
+def upgrade() -> None:
+    """
+    Журнал перемещений – годовые секции по created_at + default-секция.
+    Секции лет с данными и текущего + следующего года создаются здесь,
+    дальше – app.services.movement_partitions.ensure_partitions.
+    """
+    bind = op.get_bind()
+    op.execute(TABLE_DDL.format(name="equipment_movements_partitioned", suffix=" PARTITION BY RANGE (created_at)"))
+
+    first_year = bind.execute(sa.text(
+        "SELECT extract(year FROM min(created_at) AT TIME ZONE 'UTC')::int FROM equipment_movements"
+    )).scalar()
+    current_year = datetime.now(timezone.utc).year
+    for year in range(min(first_year or current_year, current_year), current_year + 2):
+        op.execute(
+            f"CREATE TABLE equipment_movements_y{year} PARTITION OF equipment_movements_partitioned "
+            f"FOR VALUES FROM ('{year}-01-01 00:00:00+00') TO ('{year + 1}-01-01 00:00:00+00')"
+        )
+    op.execute("CREATE TABLE equipment_movements_default PARTITION OF equipment_movements_partitioned DEFAULT")
+
+    # Ранние строки могли остаться без created_at (колонка была nullable)
+    op.execute(
+        f"INSERT INTO equipment_movements_partitioned ({COLUMNS}) "
+        f"SELECT {COLUMNS.replace('created_at', 'coalesce(created_at, document_date, now())')} FROM equipment_movements"
+    )
+    _swap("equipment_movements_partitioned")
+    op.execute("ALTER TABLE equipment_movements ADD CONSTRAINT equipment_movements_pkey PRIMARY KEY (id, created_at)")
+    _create_indexes(partitioned=True)
+
+
+def downgrade() -> None:
+    """Обратно в одну таблицу (архивированные секции не возвращаются)."""
+    op.execute(TABLE_DDL.format(name="equipment_movements_plain", suffix=""))
+    op.execute(f"INSERT INTO equipment_movements_plain ({COLUMNS}) SELECT {COLUMNS} FROM equipment_movements")
+    _swap("equipment_movements_plain")
+    op.execute("ALTER TABLE equipment_movements ADD CONSTRAINT equipment_movements_pkey PRIMARY KEY (id)")
+    _create_indexes(partitioned=False)
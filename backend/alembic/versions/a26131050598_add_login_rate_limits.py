@@ -0,0 +1,37 @@
+"""add_login_rate_limits
+
+Revision ID: a26131050598
+Revises: 18cb60267796
+Create Date: 2026-10-17 10:12:04.318270
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a26131050598'
+down_revision: Union[str, Sequence[str], None] = '18cb60267796'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Shared storage for the login rate limiter (RATE_LIMIT_BACKEND=postgres)."""
+    op.create_table(
+        'login_rate_limits',
+        sa.Column('key', sa.String(length=255), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('blocked_until', sa.Float(), nullable=True),
+        sa.Column('last_attempt', sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint('key'),
+    )
+    op.create_index('ix_login_rate_limits_last_attempt', 'login_rate_limits', ['last_attempt'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_login_rate_limits_last_attempt', 'login_rate_limits')
+    op.drop_table('login_rate_limits')
@@ -0,0 +1,31 @@
+"""add_rate_limit_level
+
+Revision ID: b6489fb8921c
+Revises: a26131050598
+Create Date: 2026-10-17 11:02:47.590114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6489fb8921c'
+down_revision: Union[str, Sequence[str], None] = 'a26131050598'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Bucket level for RATE_LIMIT_MODE=token_bucket."""
+    op.add_column(
+        'login_rate_limits',
+        sa.Column('level', sa.Float(), nullable=False, server_default='0'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('login_rate_limits', 'level')
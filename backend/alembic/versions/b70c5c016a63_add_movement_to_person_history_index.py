@@ -0,0 +1,33 @@
+"""add_movement_to_person_history_index
+
+Revision ID: b70c5c016a63
+Revises: 375062cabd8b
+Create Date: 2026-10-17 22:12:48.305127
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b70c5c016a63'
+down_revision: Union[str, Sequence[str], None] = '375062cabd8b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """(to_person_id, created_at DESC) для «что было у военнослужащего на дату»; заменяет индекс по to_person_id."""
+    op.create_index(
+        'ix_equipment_movements_to_person_history', 'equipment_movements',
+        ['to_person_id', sa.text('created_at DESC')],
+    )
+    op.drop_index('ix_equipment_movements_to_person_id', table_name='equipment_movements')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index('ix_equipment_movements_to_person_id', 'equipment_movements', ['to_person_id'])
+    op.drop_index('ix_equipment_movements_to_person_history', table_name='equipment_movements')
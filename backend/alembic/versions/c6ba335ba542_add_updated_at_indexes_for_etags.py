@@ -0,0 +1,38 @@
+"""add_updated_at_indexes_for_etags
+
+Revision ID: c6ba335ba542
+Revises: 1096c00d8dcf
+Create Date: 2026-10-17 16:21:53.407115
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c6ba335ba542'
+down_revision: Union[str, Sequence[str], None] = '1096c00d8dcf'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+TABLES = ('equipment', 'storage_devices', 'personnel', 'phones', 'storage_and_passes', 'users')
+
+
+def upgrade() -> None:
+    """users.updated_at и индексы по updated_at – max() для ETag читается из индекса."""
+    op.add_column(
+        'users',
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    )
+    for table in TABLES:
+        op.create_index(f'ix_{table}_updated_at', table, ['updated_at'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in TABLES:
+        op.drop_index(f'ix_{table}_updated_at', table_name=table)
+    op.drop_column('users', 'updated_at')
@@ -0,0 +1,57 @@
+"""add_trigram_search_indexes
+
+Revision ID: d1ca21fe660e
+Revises: 1371f36329b7
+Create Date: 2026-10-17 13:02:11.846203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd1ca21fe660e'
+down_revision: Union[str, Sequence[str], None] = '1371f36329b7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Колонки поисковых документов – в том же порядке, что в app/core/search.py
+SEARCH_DOCUMENTS = {
+    'ix_equipment_search_trgm': ('equipment', (
+        'inventory_number', 'serial_number', 'mni_serial_number', 'manufacturer',
+        'model', 'equipment_type', 'current_location', 'notes',
+    )),
+    'ix_storage_devices_search_trgm': ('storage_devices', (
+        'inventory_number', 'serial_number', 'manufacturer', 'model',
+        'device_type', 'location', 'notes',
+    )),
+    'ix_phones_search_trgm': ('phones', (
+        'model', 'color', 'imei_1', 'imei_2', 'serial_number', 'storage_location',
+    )),
+    'ix_personnel_search_trgm': ('personnel', (
+        'full_name', 'rank', 'position', 'platoon', 'personal_number', 'service_number',
+    )),
+    'ix_storage_passes_search_trgm': ('storage_and_passes', (
+        'serial_number', 'model', 'manufacturer', 'notes',
+    )),
+    'ix_users_search_trgm': ('users', ('username', 'full_name')),
+}
+
+
+def _document(columns) -> str:
+    return " || ' ' || ".join(f"coalesce({column}, '')" for column in columns)
+
+
+def upgrade() -> None:
+    """GIN-индексы pg_trgm по поисковому документу каждой таблицы."""
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for name, (table, columns) in SEARCH_DOCUMENTS.items():
+        op.execute(f'CREATE INDEX {name} ON {table} USING gin (({_document(columns)}) gin_trgm_ops)')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name in SEARCH_DOCUMENTS:
+        op.execute(f'DROP INDEX IF EXISTS {name}')
@@ -0,0 +1,42 @@
+"""add_laptop_serial_unique_index
+
+Revision ID: d75e09ee7c26
+Revises: c6ba335ba542
+Create Date: 2026-10-17 18:05:12.530417
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd75e09ee7c26'
+down_revision: Union[str, Sequence[str], None] = 'c6ba335ba542'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Синхронно с app.models.equipment.LAPTOP_SERIAL_WHERE
+LAPTOP_SERIAL_WHERE = "equipment_type = 'Ноутбук' AND serial_number IS NOT NULL AND serial_number <> ''"
+
+
+def upgrade() -> None:
+    """Уникальный серийный номер ноутбука – ключ INSERT ... ON CONFLICT импорта."""
+    duplicates = op.get_bind().execute(sa.text(
+        f"SELECT serial_number, count(*) FROM equipment WHERE {LAPTOP_SERIAL_WHERE} "
+        "GROUP BY serial_number HAVING count(*) > 1 ORDER BY serial_number"
+    )).all()
+    if duplicates:
+        listed = ', '.join(f'{serial} ({count})' for serial, count in duplicates)
+        raise RuntimeError(f'Повторяющиеся серийные номера ноутбуков, устраните перед миграцией: {listed}')
+    op.create_index(
+        'uq_equipment_laptop_serial', 'equipment', ['serial_number'],
+        unique=True, postgresql_where=sa.text(LAPTOP_SERIAL_WHERE),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('uq_equipment_laptop_serial', table_name='equipment')
@@ -7,6 +7,7 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.database import get_db
+from app.core.principal_cache import principal_cache
 from app.core.security import verify_csrf_token, verify_token
 from app.models.user import User
 
@@ -49,10 +50,13 @@ async def get_current_user(
     except JWTError as exc:
         raise credentials_exception from exc
 
-    result = await db.execute(select(User).where(User.username == username))
-    user = result.scalar_one_or_none()
+    user = principal_cache.get(username)
     if user is None:
-        raise credentials_exception
+        result = await db.execute(select(User).where(User.username == username))
+        user = result.scalar_one_or_none()
+        if user is None:
+            raise credentials_exception
+        principal_cache.put(user)
 
     if request.method not in {"GET", "HEAD", "OPTIONS"}:
         if x_csrf_token is None or not verify_csrf_token(x_csrf_token, user.id):
@@ -0,0 +1,150 @@
+"""
+Условные GET (ETag / If-None-Match) для списков, карточек и статистики.
+
+Валидатор не зависит от содержимого ответа и считается до основного запроса:
+- список/статистика – (max(updated_at), count(*)) каждой таблицы, из которой
+  собирается ответ (включая JOIN-данные: ФИО владельца и т.п.);
+- карточка – updated_at строки + версии связанных таблиц;
+- плюс путь, отсортированные query-параметры (фильтры, страница, курсор)
+  и роль пользователя (от неё зависит состав, например, /search).
+
+max(updated_at) берётся по индексу; count(*) ловит физические удаления.
+У таблиц без updated_at (журнал перемещений – только вставки) вместо него
+используется max(id).
+
+Ответ, собранный из малой части таблицы (история одной единицы, досье
+военнослужащего), сужает версии через scope – иначе проверка ETag читает
+таблицы целиком и стоит дороже самой страницы:
+
+    def _scope(request):
+        personnel_id = path_int(request, "personnel_id")
+        return None if personnel_id is None else {Phone: [Phone.owner_id == personnel_id]}
+
+    _etag: None = Depends(collection_etag(Phone, scope=_scope))
+
+При совпадении с If-None-Match зависимость отвечает 304 до выполнения
+обработчика – страница не выбирается и не сериализуется. Зависимость
+объявляется в параметрах маршрута после проверки прав:
+
+    _etag: None = Depends(collection_etag(Equipment, Personnel))
+
+Ограничение: updated_at = now() – время начала транзакции, поэтому
+транзакция, закоммиченная позже более новой, может не сдвинуть max.
+Транзакции в сервисах короткие; ответ обновится при следующей записи.
+"""
+
+import hashlib
+import json
+from datetime import datetime, timezone
+from collections.abc import Callable
+from typing import Any, Optional
+
+from fastapi import Depends, HTTPException, Request, Response
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import get_current_user
+from app.core.database import get_db
+from app.models.user import User
+
+
+# scope(request) -> {модель: [условия WHERE]}; None – параметры некорректны
+Scope = Callable[[Request], Optional[dict]]
+
+
+def _version_columns(model, *where) -> list:
+    table = model.__table__
+    marker = table.c.updated_at if "updated_at" in table.c else table.c.id
+    return [
+        select(func.max(marker)).where(*where).scalar_subquery(),
+        select(func.count()).select_from(table).where(*where).scalar_subquery(),
+    ]
+
+
+def path_int(request: Request, name: str) -> Optional[int]:
+    """Целый параметр пути для scope; None – нет или не число."""
+    try:
+        return int(request.path_params[name])
+    except (KeyError, ValueError):
+        return None
+
+
+def make_etag(*parts: Any) -> str:
+    raw = json.dumps(parts, default=str, ensure_ascii=False, separators=(",", ":")).encode()
+    return f'W/"{hashlib.sha1(raw).hexdigest()}"'
+
+
+def if_none_match(request: Request, etag: str) -> bool:
+    """Слабое сравнение (RFC 9110 §13.1.2): префикс W/ не учитывается."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return etag.removeprefix("W/") in candidates
+
+
+def _respond(request: Request, response: Response, user: User, versions: Any) -> None:
+    query = sorted(request.query_params.multi_items())
+    etag = make_etag(request.url.path, query, user.role, versions)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if if_none_match(request, etag):
+        raise HTTPException(status_code=304, headers=headers)
+    response.headers.update(headers)
+
+
+def collection_etag(*models, scope: Optional[Scope] = None):
+    """
+    Зависимость для списков и статистики по таблицам models. scope сужает
+    версии до строк, из которых собирается ответ; если он вернул None,
+    ETag не ставится – ошибку параметров вернёт обработчик.
+    """
+    unscoped = [column for model in models for column in _version_columns(model)]
+
+    async def dependency(
+        request: Request,
+        response: Response,
+        db: AsyncSession = Depends(get_db),
+        user: User = Depends(get_current_user),
+    ) -> None:
+        columns = unscoped
+        if scope is not None:
+            conditions = scope(request)
+            if conditions is None:
+                return
+            columns = [column for model in models for column in _version_columns(model, *conditions.get(model, ()))]
+        versions = tuple((await db.execute(select(*columns))).one())
+        _respond(request, response, user, versions)
+
+    return dependency
+
+
+def resource_etag(model, path_param: str, *related, daily: bool = False):
+    """
+    Зависимость для карточки model с id из path_param; related – таблицы,
+    данные которых попадают в ответ (владелец и т.п.). Несуществующая
+    строка пропускается без ETag – 404 вернёт обработчик.
+    daily – ответ зависит от текущей даты (истечение допуска).
+    """
+    related_columns = [column for other in related for column in _version_columns(other)]
+
+    async def dependency(
+        request: Request,
+        response: Response,
+        db: AsyncSession = Depends(get_db),
+        user: User = Depends(get_current_user),
+    ) -> None:
+        row_id = path_int(request, path_param)
+        if row_id is None:
+            return
+        updated_at = select(model.updated_at).where(model.id == row_id).scalar_subquery()
+        row = (await db.execute(select(updated_at, *related_columns))).one()
+        if row[0] is None:
+            return
+        versions = tuple(row)
+        if daily:
+            versions += (datetime.now(timezone.utc).date(),)
+        _respond(request, response, user, versions)
+
+    return dependency
@@ -0,0 +1,127 @@
+"""
+Потоковая выгрузка списков: CSV, NDJSON, XLSX.
+
+Строки читаются серверным курсором (stream + yield_per) партиями по
+EXPORT_BATCH_SIZE и сразу уходят клиенту – память не зависит от размера
+таблицы. Выгрузка идёт в отдельном соединении в транзакции
+REPEATABLE READ READ ONLY: все строки берутся из одного снимка, даже если
+таблицу в это время меняют. Сессия запроса (get_db) к моменту отправки
+тела уже закрыта, поэтому соединение открывает сам генератор.
+
+XLSX – zip с оглавлением в конце, отдавать его по мере записи нельзя:
+книга пишется в write_only-режиме (строки сразу сбрасываются на диск)
+во временный файл, который затем отдаётся кусками.
+"""
+
+import csv
+import importlib.util
+import io
+import tempfile
+from collections.abc import AsyncIterator
+from datetime import date, datetime, timezone
+from typing import Any, Literal, Sequence
+
+import orjson
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.database import engine
+from app.core.pagination import SortKey, order_by
+
+ExportFormat = Literal["csv", "ndjson", "xlsx"]
+
+_MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+_CHUNK = 64 * 1024
+
+
+async def _snapshot_rows(stmt: Select) -> AsyncIterator[Sequence]:
+    """Партии строк-словарей из одного снимка БД."""
+    async with engine.connect() as conn:
+        await conn.execution_options(isolation_level="REPEATABLE READ", postgresql_readonly=True)
+        async with conn.begin():
+            result = await conn.stream(stmt.execution_options(yield_per=settings.EXPORT_BATCH_SIZE))
+            async for partition in result.mappings().partitions():
+                yield partition
+
+
+def _text(value: Any) -> Any:
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "Да" if value else "Нет"
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _xlsx_cell(value: Any) -> Any:
+    # Excel не хранит часовой пояс – время пишется в UTC
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    if isinstance(value, bool):
+        return "Да" if value else "Нет"
+    return value
+
+
+async def _csv(stmt: Select, columns: list[str]) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    # BOM – чтобы Excel открыл кириллицу в UTF-8
+    yield "\ufeff".encode() + buffer.getvalue().encode()
+    async for partition in _snapshot_rows(stmt):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([_text(value) for value in row.values()] for row in partition)
+        yield buffer.getvalue().encode()
+
+
+async def _ndjson(stmt: Select, columns: list[str]) -> AsyncIterator[bytes]:
+    async for partition in _snapshot_rows(stmt):
+        yield b"".join(orjson.dumps(dict(row), option=orjson.OPT_UTC_Z) + b"\n" for row in partition)
+
+
+async def _xlsx(stmt: Select, columns: list[str]) -> AsyncIterator[bytes]:
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(columns)
+    async for partition in _snapshot_rows(stmt):
+        for row in partition:
+            sheet.append([_xlsx_cell(value) for value in row.values()])
+
+    with tempfile.SpooledTemporaryFile(max_size=settings.EXPORT_XLSX_SPOOL_BYTES) as file:
+        await run_in_threadpool(workbook.save, file)
+        file.seek(0)
+        while chunk := await run_in_threadpool(file.read, _CHUNK):
+            yield chunk
+
+
+_WRITERS = {"csv": _csv, "ndjson": _ndjson, "xlsx": _xlsx}
+
+
+def export_response(stmt: Select, keys: Sequence[SortKey], fmt: ExportFormat, name: str) -> StreamingResponse:
+    """
+    StreamingResponse с выгрузкой stmt (select колонок из list_query сервиса)
+    в порядке списка. name – основа имени файла.
+    """
+    if fmt == "xlsx" and importlib.util.find_spec("openpyxl") is None:
+        raise ValueError("Экспорт в XLSX недоступен: не установлен openpyxl")
+    stmt = stmt.order_by(*order_by(keys))
+    columns = list(stmt.selected_columns.keys())
+    filename = f"{name}-{datetime.now(timezone.utc):%Y%m%d-%H%M%S}.{fmt}"
+    return StreamingResponse(
+        _WRITERS[fmt](stmt, columns),
+        media_type=_MEDIA_TYPES[fmt],
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "Cache-Control": "no-store",
+        },
+    )
@@ -0,0 +1,237 @@
+"""
+Idempotency-Key для изменяющих запросов (POST/PUT/PATCH в /api, кроме /api/auth).
+
+Клиент передаёт уникальный ключ на каждую операцию и повторяет его при
+повторной отправке (обрыв сети, таймаут, двойной клик). Первый запрос
+выполняется как обычно, успешный ответ сохраняется в idempotency_keys;
+повтор с тем же ключом получает сохранённый ответ одним SELECT – без
+повторного выполнения и блокировок строк. Ключ действует в пределах
+пользователя (sub из токена) и IDEMPOTENCY_TTL_SECONDS.
+
+- тот же ключ, другой запрос (метод, путь, query, тело) – 422;
+- тот же ключ, первый запрос ещё выполняется – 409;
+- сохраняются ответы 2xx; от ответа больше IDEMPOTENCY_MAX_RESPONSE_BYTES
+  остаётся только статус, и повтор получает 410 – операция уже выполнена,
+  но ответ не сохранён.
+
+Ключ освобождается (запрос можно сразу повторить) только если ответ не
+начат или завершился 4xx – изменения не закоммичены. После 2xx/5xx
+(обработчик мог закоммитить изменения до ошибки) и неудачной записи ответа
+ключ не удаляется и считается занятым до IDEMPOTENCY_LOCK_SECONDS: повтор
+получает 409, а не выполняет операцию второй раз.
+
+Чистый ASGI middleware: тело запроса хэшируется по мере чтения роутом
+(импорт файлов не буферизуется), ответ пишется в таблицу до отправки
+последнего куска – клиент, получивший ответ, при повторе получит его же.
+"""
+
+import hashlib
+import logging
+import time
+from typing import Optional
+
+import orjson
+from sqlalchemy import text
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.database import engine
+from app.core.security import verify_token
+
+logger = logging.getLogger(__name__)
+
+_METHODS = frozenset({"POST", "PUT", "PATCH"})
+_EXEMPT_PREFIX = "/api/auth/"
+_MAX_KEY_LENGTH = 255
+# Не переносятся в повторный ответ
+_SKIPPED_HEADERS = frozenset({b"set-cookie", b"x-csrf-token", b"date", b"server"})
+
+_SELECT = text(
+    "SELECT fingerprint, status_code, headers, body, "
+    "created_at < now() - make_interval(secs => :ttl) AS expired, "
+    "created_at < now() - make_interval(secs => :lock) AS abandoned "
+    "FROM idempotency_keys WHERE key = :key"
+)
+
+# Занять ключ: новый, истёкший или брошенный упавшим воркером
+_CLAIM = text(
+    """
+    INSERT INTO idempotency_keys AS k (key, created_at) VALUES (:key, now())
+    ON CONFLICT (key) DO UPDATE SET
+        created_at = now(), fingerprint = NULL, status_code = NULL, headers = NULL, body = NULL
+    WHERE k.created_at < now() - make_interval(secs => :ttl)
+       OR (k.status_code IS NULL AND k.created_at < now() - make_interval(secs => :lock))
+    RETURNING key
+    """
+)
+
+_COMPLETE = text(
+    "UPDATE idempotency_keys SET fingerprint = :fingerprint, status_code = :status_code, "
+    "headers = CAST(:headers AS jsonb), body = :body WHERE key = :key"
+)
+
+_RELEASE = text("DELETE FROM idempotency_keys WHERE key = :key AND status_code IS NULL")
+
+_PURGE = text("DELETE FROM idempotency_keys WHERE created_at < now() - make_interval(secs => :ttl)")
+
+
+def _principal(request: Request) -> Optional[str]:
+    """sub из токена (как в get_current_user); без валидного токена ключ не применяется."""
+    token = request.cookies.get("access_token")
+    authorization = request.headers.get("authorization", "")
+    if authorization.lower().startswith("bearer "):
+        token = authorization[7:].strip()
+    payload = verify_token(token) if token else None
+    return payload.get("sub") if payload else None
+
+
+class IdempotencyMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+        self._last_purge = time.monotonic()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or scope["method"] not in _METHODS
+            or not scope["path"].startswith("/api/")
+            or scope["path"].startswith(_EXEMPT_PREFIX)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        request = Request(scope)
+        client_key = request.headers.get("idempotency-key")
+        if client_key is None:
+            await self.app(scope, receive, send)
+            return
+        if not client_key.strip() or len(client_key) > _MAX_KEY_LENGTH:
+            await JSONResponse({"detail": "Некорректный Idempotency-Key"}, status_code=400)(scope, receive, send)
+            return
+        principal = _principal(request)
+        if principal is None:
+            # Роут сам ответит 401
+            await self.app(scope, receive, send)
+            return
+
+        key = hashlib.sha256(f"{principal}\0{client_key}".encode()).hexdigest()
+        fingerprint = hashlib.sha256(b"\0".join([scope["method"].encode(), scope["path"].encode(), scope["query_string"], b""]))
+        params = {"key": key, "ttl": settings.IDEMPOTENCY_TTL_SECONDS, "lock": settings.IDEMPOTENCY_LOCK_SECONDS}
+
+        async with engine.connect() as conn:
+            record = (await conn.execute(_SELECT, params)).first()
+        if record is not None and not record.expired:
+            if record.status_code is not None:
+                await self._replay(scope, receive, send, record, fingerprint)
+                return
+            if not record.abandoned:
+                await self._conflict(scope, receive, send)
+                return
+
+        async with engine.begin() as conn:
+            claimed = (await conn.execute(_CLAIM, params)).first()
+            await self._maybe_purge(conn)
+        if claimed is None:
+            # Параллельный запрос с тем же ключом успел раньше
+            await self._conflict(scope, receive, send)
+            return
+
+        await self._run(scope, receive, send, key, fingerprint)
+
+    async def _run(self, scope: Scope, receive: Receive, send: Send, key: str, fingerprint) -> None:
+        completed = False
+        storable = False
+        oversized = False
+        status_code: Optional[int] = None
+        headers: list = []
+        body = bytearray()
+
+        async def hashing_receive() -> Message:
+            message = await receive()
+            if message["type"] == "http.request":
+                fingerprint.update(message.get("body", b""))
+            return message
+
+        async def capturing_send(message: Message) -> None:
+            nonlocal completed, storable, oversized, status_code, headers
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                storable = 200 <= status_code < 300
+                headers = [
+                    [name.decode("latin-1"), value.decode("latin-1")]
+                    for name, value in message.get("headers", [])
+                    if name.lower() not in _SKIPPED_HEADERS
+                ]
+            elif message["type"] == "http.response.body" and storable:
+                if not oversized:
+                    body.extend(message.get("body", b""))
+                    if len(body) > settings.IDEMPOTENCY_MAX_RESPONSE_BYTES:
+                        # Сохраняется только статус (body NULL) – повтор получит 410
+                        oversized = True
+                        body.clear()
+                if not message.get("more_body", False):
+                    async with engine.begin() as conn:
+                        await conn.execute(_COMPLETE, {
+                            "key": key,
+                            "fingerprint": fingerprint.hexdigest(),
+                            "status_code": status_code,
+                            "headers": orjson.dumps(headers).decode(),
+                            "body": None if oversized else bytes(body),
+                        })
+                    completed = True
+            await send(message)
+
+        try:
+            await self.app(scope, hashing_receive, capturing_send)
+        finally:
+            # После 2xx/5xx изменения могли быть закоммичены – ключ истечёт сам
+            releasable = status_code is None or 400 <= status_code < 500
+            if not completed and releasable:
+                try:
+                    async with engine.begin() as conn:
+                        await conn.execute(_RELEASE, {"key": key})
+                except Exception as exc:
+                    # Ключ освободится сам через IDEMPOTENCY_LOCK_SECONDS
+                    logger.error("Idempotency key release error: %s", exc)
+
+    async def _replay(self, scope: Scope, receive: Receive, send: Send, record, fingerprint) -> None:
+        # Тело повтора дочитывается только ради сравнения отпечатков
+        while True:
+            message = await receive()
+            if message["type"] != "http.request":
+                return
+            fingerprint.update(message.get("body", b""))
+            if not message.get("more_body", False):
+                break
+        if fingerprint.hexdigest() != record.fingerprint:
+            response = JSONResponse(
+                {"detail": "Idempotency-Key уже использован с другим запросом"}, status_code=422,
+            )
+            await response(scope, receive, send)
+            return
+        if record.body is None:
+            response = JSONResponse(
+                {"detail": "Ответ слишком велик для повтора, операция уже выполнена"}, status_code=410,
+            )
+            await response(scope, receive, send)
+            return
+
+        headers = [(name.encode("latin-1"), value.encode("latin-1")) for name, value in record.headers]
+        headers.append((b"idempotent-replayed", b"true"))
+        await send({"type": "http.response.start", "status": record.status_code, "headers": headers})
+        await send({"type": "http.response.body", "body": record.body})
+
+    @staticmethod
+    async def _conflict(scope: Scope, receive: Receive, send: Send) -> None:
+        response = JSONResponse(
+            {"detail": "Запрос с этим Idempotency-Key ещё выполняется"}, status_code=409,
+        )
+        await response(scope, receive, send)
+
+    async def _maybe_purge(self, conn) -> None:
+        if time.monotonic() - self._last_purge < settings.IDEMPOTENCY_PURGE_INTERVAL_SECONDS:
+            return
+        self._last_purge = time.monotonic()
+        await conn.execute(_PURGE, {"ttl": settings.IDEMPOTENCY_TTL_SECONDS})
@@ -0,0 +1,26 @@
+"""
+Быстрая отдача списков: строки-словари из app.core.projection сериализуются
+orjson сразу в байты, минуя валидацию response_model и jsonable_encoder.
+response_model у маршрута остаётся для OpenAPI – форма ответа та же,
+колонки строятся по полям схемы.
+"""
+
+from typing import Any, Optional
+
+import orjson
+from fastapi import Response
+
+# datetime с tzinfo=UTC – с суффиксом Z, как у pydantic
+_OPTIONS = orjson.OPT_UTC_Z
+
+
+def fast_json(content: Any, response: Optional[Response] = None, status_code: int = 200) -> Response:
+    """
+    response – Response из параметров маршрута: FastAPI не переносит его
+    заголовки (ETag из зависимостей) в возвращённый Response, поэтому
+    они копируются здесь.
+    """
+    result = Response(orjson.dumps(content, option=_OPTIONS), status_code=status_code, media_type="application/json")
+    if response is not None:
+        result.headers.update(response.headers)
+    return result
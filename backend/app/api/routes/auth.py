@@ -1,11 +1,19 @@
 import logging
+import math
 from datetime import timedelta, datetime, timezone
-from fastapi import APIRouter, Depends, HTTPException, status, Response, Request
-from sqlalchemy import select
+from typing import Optional
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, Response, Request
+from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.database import get_db
-from app.core.security import verify_password, create_access_token, generate_csrf_token
+from app.core.database import AsyncSessionLocal, get_db
+from app.core.security import (
+    create_access_token,
+    generate_csrf_token,
+    get_password_hash_async,
+    password_needs_rehash,
+    verify_password_async,
+)
 from app.core.config import settings
 from app.core.rate_limit import rate_limiter
 from app.models.user import User
@@ -16,25 +24,57 @@ logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/auth", tags=["auth"])
 
 
+async def _record_login(user_id: int, plain_password: Optional[str], verified_hash: Optional[str]) -> None:
+    """
+    Фоновая запись после ответа на /login: last_login и, если параметры
+    Argon2 изменились, перехэширование пароля. Своя сессия – сессия запроса
+    к этому моменту уже закрыта.
+    """
+    try:
+        async with AsyncSessionLocal() as session:
+            # Явный UTC – корректно с DateTime(timezone=True)
+            await session.execute(
+                update(User).where(User.id == user_id).values(last_login=datetime.now(timezone.utc))
+            )
+            await session.commit()
+            if plain_password is None:
+                return
+            new_hash = await get_password_hash_async(plain_password)
+            # Только если хэш не сменился, пока ждали Argon2 (change_password,
+            # сброс администратором) – иначе вернули бы старый пароль
+            await session.execute(
+                update(User)
+                .where(User.id == user_id, User.password_hash == verified_hash)
+                .values(password_hash=new_hash)
+            )
+            await session.commit()
+    except Exception:
+        logger.exception("Failed to record login for user id=%s", user_id)
+
+
 @router.post("/login", response_model=Token)
 async def login(
     login_data: LoginRequest,
     response: Response,
     request: Request,
+    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db),
 ):
     client_ip = request.client.host if request.client else "unknown"
 
-    if not rate_limiter.is_allowed(client_ip):
+    retry_after = await rate_limiter.remaining_seconds_async(client_ip)
+    if retry_after > 0:
+        minutes = max(1, math.ceil(retry_after / 60))
         raise HTTPException(
             status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-            detail="Слишком много неудачных попыток. Попробуйте через 15 минут.",
+            detail=f"Слишком много неудачных попыток. Попробуйте через {minutes} мин.",
+            headers={"Retry-After": str(math.ceil(retry_after))},
         )
 
     user = (await db.execute(select(User).where(User.username == login_data.username))).scalars().first()
 
-    if not user or not verify_password(login_data.password, user.password_hash):
-        rate_limiter.record_attempt(client_ip)
+    if not user or not await verify_password_async(login_data.password, user.password_hash):
+        await rate_limiter.record_attempt_async(client_ip)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Неверный логин или пароль",
@@ -44,11 +84,13 @@ async def login(
     if not user.is_active:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Пользователь деактивирован")
 
-    rate_limiter.reset(client_ip)
+    await rate_limiter.reset_async(client_ip)
 
-    # Явный UTC – корректно с DateTime(timezone=True)
-    user.last_login = datetime.now(timezone.utc)
-    await db.commit()
+    # last_login и rehash пишутся после отправки ответа – не на критическом пути
+    needs_rehash = password_needs_rehash(user.password_hash)
+    background_tasks.add_task(
+        _record_login, user.id, login_data.password if needs_rehash else None, user.password_hash,
+    )
 
     access_token = create_access_token(
         data={"sub": user.username, "role": user.role},
@@ -1,17 +1,29 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy import or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime
 from typing import Optional
 
 from app.core.database import get_db
-from app.api.deps import get_current_user, require_admin, verify_csrf
+from app.core.pagination import TotalMode
+from app.api.deps import get_current_user, require_admin, require_officer, verify_csrf
+from app.api.etag import collection_etag, path_int, resource_etag
+from app.api.export import ExportFormat, export_response
+from app.api.responses import fast_json
+from app.models.equipment import Equipment, EquipmentMovement, StorageDevice
+from app.models.personnel import Personnel
 from app.models.user import User
 from app.schemas.equipment import (
     EquipmentCreate, EquipmentUpdate, EquipmentResponse, EquipmentListResponse,
-    MovementCreate, MovementResponse, MovementListResponse,
+    BulkMovementCreate, BulkMovementResult, MovementCreate, MovementResponse, MovementListResponse,
+    OwnershipAsOf, OwnershipSnapshot,
     StorageDeviceCreate, StorageDeviceUpdate, StorageDeviceResponse, StorageDeviceListResponse,
     EquipmentStats
 )
-from app.services.equipment_service import EquipmentService, StorageDeviceService
+from app.services.equipment_service import (
+    EQUIPMENT_SORT, MOVEMENT_SORT, OWNERSHIP_SORT, STORAGE_DEVICE_SORT, EquipmentService, StorageDeviceService,
+)
 
 
 def _enrich_equipment(equipment) -> dict:
@@ -39,6 +51,37 @@ def _enrich_movement(movement) -> dict:
     }
 
 
+_SINCE = TypeAdapter(Optional[datetime])
+
+
+def _movement_history_scope(request: Request) -> Optional[dict]:
+    """
+    Версии истории – только перемещения единицы (с since – только его
+    секции) и военнослужащие/пользователи из них, а не таблицы целиком.
+    """
+    equipment_id = path_int(request, "equipment_id")
+    try:
+        since = _SINCE.validate_python(request.query_params.get("since"))
+    except ValidationError:
+        return None
+    if equipment_id is None:
+        return None
+    where = [EquipmentMovement.equipment_id == equipment_id]
+    if since is not None:
+        where.append(EquipmentMovement.created_at >= since)
+    movements = select(
+        EquipmentMovement.from_person_id, EquipmentMovement.to_person_id, EquipmentMovement.created_by_id,
+    ).where(*where).subquery()
+    return {
+        EquipmentMovement: where,
+        Personnel: [or_(
+            Personnel.id.in_(select(movements.c.from_person_id)),
+            Personnel.id.in_(select(movements.c.to_person_id)),
+        )],
+        User: [User.id.in_(select(movements.c.created_by_id))],
+    }
+
+
 # ── Storage Devices sub-router ──────────────────────────────────────────────
 
 storage_router = APIRouter(prefix="/storage-devices", tags=["storage-devices"])
@@ -46,17 +89,45 @@ storage_router = APIRouter(prefix="/storage-devices", tags=["storage-devices"])
 
 @storage_router.get("/", response_model=StorageDeviceListResponse)
 async def list_storage_devices(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
     equipment_id: Optional[int] = None,
     status: Optional[str] = None,
     search: Optional[str] = None,
+    cursor: Optional[str] = Query(None, description="Курсор следующей страницы вместо skip"),
+    with_total: TotalMode = Query("exact", description="exact | estimate | false – как считать total"),
+    fields: Optional[str] = Query(None, description="Поля через запятую; * – все, включая notes/reason"),
     db: AsyncSession = Depends(get_db),
     _: User = Depends(get_current_user),
+    _etag: None = Depends(collection_etag(StorageDevice, Equipment)),
 ):
     service = StorageDeviceService(db)
-    items, total = await service.get_list(skip=skip, limit=limit, equipment_id=equipment_id, status=status, search=search)
-    return StorageDeviceListResponse(total=total, items=[_enrich_device(d) for d in items])
+    try:
+        items, total, next_cursor = await service.get_list(
+            skip=skip, limit=limit, equipment_id=equipment_id, status=status, search=search,
+            cursor=cursor, with_total=with_total, fields=fields,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return fast_json({"total": total, "items": items, "next_cursor": next_cursor}, response)
+
+
+@storage_router.get("/export")
+async def export_storage_devices(
+    fmt: ExportFormat = Query("csv", alias="format", description="csv | ndjson | xlsx"),
+    equipment_id: Optional[int] = None,
+    status: Optional[str] = None,
+    search: Optional[str] = None,
+    fields: Optional[str] = Query("*", description="Поля через запятую; по умолчанию – все"),
+    db: AsyncSession = Depends(get_db),
+    _: User = Depends(get_current_user),
+):
+    try:
+        stmt = StorageDeviceService(db).list_query(equipment_id, status, search, fields)
+        return export_response(stmt, STORAGE_DEVICE_SORT, fmt, "storage-devices")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 @storage_router.post("/", response_model=StorageDeviceResponse, status_code=status.HTTP_201_CREATED)
@@ -77,6 +148,7 @@ async def get_storage_device(
     device_id: int,
     db: AsyncSession = Depends(get_db),
     _: User = Depends(get_current_user),
+    _etag: None = Depends(resource_etag(StorageDevice, "device_id", Equipment)),
 ):
     service = StorageDeviceService(db)
     device = await service.get_by_id(device_id)
@@ -120,22 +192,48 @@ router.include_router(storage_router)
 
 @router.get("/", response_model=EquipmentListResponse)
 async def list_equipment(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
     equipment_type: Optional[str] = None,
     status: Optional[str] = None,
     search: Optional[str] = None,
     is_personal: Optional[bool] = None,  # <-- добавлено
+    cursor: Optional[str] = Query(None, description="Курсор следующей страницы вместо skip"),
+    with_total: TotalMode = Query("exact", description="exact | estimate | false – как считать total"),
+    fields: Optional[str] = Query(None, description="Поля через запятую; * – все, включая notes/reason"),
     db: AsyncSession = Depends(get_db),
     _: User = Depends(get_current_user),
+    _etag: None = Depends(collection_etag(Equipment, Personnel)),
 ):
     service = EquipmentService(db)
-    items, total = await service.get_list(
-        skip=skip, limit=limit,
-        equipment_type=equipment_type, status=status,
-        search=search, is_personal=is_personal,
-    )
-    return EquipmentListResponse(total=total, items=[_enrich_equipment(e) for e in items])
+    try:
+        items, total, next_cursor = await service.get_list(
+            skip=skip, limit=limit,
+            equipment_type=equipment_type, status=status,
+            search=search, is_personal=is_personal, cursor=cursor, with_total=with_total, fields=fields,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return fast_json({"total": total, "items": items, "next_cursor": next_cursor}, response)
+
+
+@router.get("/export")
+async def export_equipment(
+    fmt: ExportFormat = Query("csv", alias="format", description="csv | ndjson | xlsx"),
+    equipment_type: Optional[str] = None,
+    status: Optional[str] = None,
+    search: Optional[str] = None,
+    is_personal: Optional[bool] = None,
+    fields: Optional[str] = Query("*", description="Поля через запятую; по умолчанию – все"),
+    db: AsyncSession = Depends(get_db),
+    _: User = Depends(get_current_user),
+):
+    try:
+        stmt = EquipmentService(db).list_query(equipment_type, status, search, is_personal, fields)
+        return export_response(stmt, EQUIPMENT_SORT, fmt, "equipment")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 @router.post("/", response_model=EquipmentResponse, status_code=status.HTTP_201_CREATED)
@@ -161,6 +259,7 @@ async def get_statistics(
     is_personal: Optional[bool] = None,  # <-- добавлено
     db: AsyncSession = Depends(get_db),
     _: User = Depends(get_current_user),
+    _etag: None = Depends(collection_etag(Equipment)),
 ):
     return await EquipmentService(db).get_statistics(
         equipment_type=equipment_type, status=status,
@@ -181,11 +280,50 @@ async def create_movement(
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 
+@router.post("/movements/bulk", response_model=BulkMovementResult, status_code=status.HTTP_201_CREATED)
+async def create_movements_bulk(
+    movements: BulkMovementCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(verify_csrf),
+):
+    try:
+        return await EquipmentService(db).create_movements_bulk(movements, current_user.id)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+@router.get("/ownership-at", response_model=OwnershipSnapshot)
+async def get_fleet_ownership_at(
+    at: datetime = Query(..., description="Момент времени (ISO 8601; без пояса – UTC)"),
+    equipment_type: Optional[str] = Query(None),
+    db: AsyncSession = Depends(get_db),
+    _: User = Depends(require_officer),
+):
+    items = await EquipmentService(db).fleet_ownership_at(at, equipment_type)
+    return fast_json({"at": at, "items": items})
+
+
+@router.get("/ownership-at/export")
+async def export_fleet_ownership_at(
+    at: datetime = Query(..., description="Момент времени (ISO 8601; без пояса – UTC)"),
+    equipment_type: Optional[str] = Query(None),
+    fmt: ExportFormat = Query("csv", alias="format", description="csv | ndjson | xlsx"),
+    db: AsyncSession = Depends(get_db),
+    _: User = Depends(require_officer),
+):
+    stmt = EquipmentService(db).ownership_snapshot_query(at, equipment_type)
+    try:
+        return export_response(stmt, OWNERSHIP_SORT, fmt, f"ownership-{at:%Y%m%d-%H%M}")
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
 @router.get("/{equipment_id}", response_model=EquipmentResponse)
 async def get_equipment(
     equipment_id: int,
     db: AsyncSession = Depends(get_db),
     _: User = Depends(get_current_user),
+    _etag: None = Depends(resource_etag(Equipment, "equipment_id", Personnel)),
 ):
     service = EquipmentService(db)
     equipment = await service.get_by_id(equipment_id)
@@ -219,14 +357,54 @@ async def delete_equipment(
     return {"message": "Техника удалена"}
 
 
+@router.get("/{equipment_id}/owner-at", response_model=OwnershipAsOf)
+async def get_owner_at(
+    equipment_id: int,
+    at: datetime = Query(..., description="Момент времени (ISO 8601; без пояса – UTC)"),
+    db: AsyncSession = Depends(get_db),
+    _: User = Depends(require_officer),
+):
+    ownership = await EquipmentService(db).owner_at(equipment_id, at)
+    if ownership is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Техника не найдена")
+    return ownership
+
+
 @router.get("/{equipment_id}/movements", response_model=MovementListResponse)
 async def get_movement_history(
     equipment_id: int,
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="Курсор следующей страницы вместо skip"),
+    with_total: TotalMode = Query("exact", description="exact | estimate | false – как считать total"),
+    fields: Optional[str] = Query(None, description="Поля через запятую; * – все, включая notes/reason"),
+    since: Optional[datetime] = Query(None, description="Только перемещения не раньше этого момента"),
     db: AsyncSession = Depends(get_db),
     _: User = Depends(get_current_user),
+    _etag: None = Depends(collection_etag(EquipmentMovement, Personnel, User, scope=_movement_history_scope)),
 ):
     service = EquipmentService(db)
-    items, total = await service.get_movement_history(equipment_id, skip, limit)
-    return MovementListResponse(total=total, items=[_enrich_movement(m) for m in items])
\ No newline at end of file
+    try:
+        items, total, next_cursor = await service.get_movement_history(
+            equipment_id, skip, limit, cursor=cursor, with_total=with_total, fields=fields, since=since
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return fast_json({"total": total, "items": items, "next_cursor": next_cursor}, response)
+
+
+@router.get("/{equipment_id}/movements/export")
+async def export_movement_history(
+    equipment_id: int,
+    fmt: ExportFormat = Query("csv", alias="format", description="csv | ndjson | xlsx"),
+    fields: Optional[str] = Query("*", description="Поля через запятую; по умолчанию – все"),
+    since: Optional[datetime] = Query(None, description="Только перемещения не раньше этого момента"),
+    db: AsyncSession = Depends(get_db),
+    _: User = Depends(get_current_user),
+):
+    try:
+        stmt = EquipmentService(db).movement_query(equipment_id, fields, since)
+        return export_response(stmt, MOVEMENT_SORT, fmt, f"movements-{equipment_id}")
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
@@ -0,0 +1,73 @@
+import csv
+import json
+import tempfile
+import zipfile
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from starlette.concurrency import run_in_threadpool
+
+from app.api.deps import require_officer, verify_csrf
+from app.core.config import settings
+from app.importers.pipeline import ImportFormat, import_file
+from app.models.user import User
+from app.schemas.imports import ImportReportResponse
+
+router = APIRouter(prefix="/imports", tags=["imports"])
+
+ImportEntity = Literal["phones", "personnel", "storage-and-passes"]
+
+_CONTENT_TYPES: dict[str, ImportFormat] = {
+    "text/csv": "csv",
+    "text/tab-separated-values": "tsv",
+    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet": "xlsx",
+}
+
+
+def _overrides(mapping: Optional[str]) -> Optional[dict[str, str]]:
+    if not mapping:
+        return None
+    try:
+        overrides = json.loads(mapping)
+    except ValueError:
+        overrides = None
+    if not isinstance(overrides, dict) or not all(isinstance(value, str) for value in overrides.values()):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='mapping: ожидается JSON {"Заголовок": "поле"}')
+    return overrides
+
+
+@router.post("/{entity}", response_model=ImportReportResponse)
+async def import_entities(
+    entity: ImportEntity,
+    request: Request,
+    fmt: Optional[ImportFormat] = Query(None, alias="format", description="csv | tsv | xlsx; по умолчанию – по Content-Type"),
+    dry_run: bool = Query(False, description="Только проверить файл, ничего не записывая"),
+    mapping: Optional[str] = Query(None, description='Дополнительные соответствия колонок: JSON {"Заголовок": "поле"}'),
+    _: User = Depends(require_officer),
+    __: User = Depends(verify_csrf),
+):
+    """
+    Тело запроса – сам файл (не multipart). Принимается потоком во временный
+    файл, разбирается и пишется пачками; в ответе – счётчики и ошибки строк.
+    """
+    overrides = _overrides(mapping)
+    fmt = fmt or _CONTENT_TYPES.get(request.headers.get("content-type", "").split(";")[0].strip())
+    if fmt is None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Укажите format: csv, tsv или xlsx")
+
+    with tempfile.SpooledTemporaryFile(max_size=settings.IMPORT_SPOOL_BYTES) as source:
+        size = 0
+        async for chunk in request.stream():
+            size += len(chunk)
+            if size > settings.IMPORT_MAX_BYTES:
+                raise HTTPException(
+                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    detail=f"Файл больше {settings.IMPORT_MAX_BYTES // (1024 * 1024)} МБ",
+                )
+            source.write(chunk)
+        source.seek(0)
+
+        try:
+            return await run_in_threadpool(import_file, entity, source, fmt, overrides=overrides, dry_run=dry_run)
+        except (ValueError, csv.Error, zipfile.BadZipFile) as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
@@ -1,21 +1,62 @@
 from datetime import date, datetime, timezone
 from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from pydantic import BaseModel
-from sqlalchemy import func, or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import update
-from app.models.storage_and_passes import StorageAndPass
-from app.models.equipment import Equipment
 from app.api.deps import require_officer, verify_csrf
+from app.api.etag import collection_etag, path_int, resource_etag
+from app.api.export import ExportFormat, export_response
+from app.api.responses import fast_json
 from app.core.database import get_db
+from app.core.pagination import TotalMode
+from app.models.equipment import Equipment
 from app.models.personnel import Personnel
+from app.models.phone import Phone
+from app.models.storage_and_passes import StorageAndPass
 from app.models.user import User
-from app.schemas.personnel import PersonnelCreate, PersonnelListResponse, PersonnelResponse, PersonnelUpdate
+from app.schemas.personnel import (
+    PersonnelAssets,
+    PersonnelCreate,
+    PersonnelListResponse,
+    PersonnelResponse,
+    PersonnelSuggestion,
+    PersonnelUpdate,
+)
+from app.schemas.equipment import OwnershipAsOf
+from app.services.equipment_service import EquipmentService
+from app.services.personnel_service import PERSONNEL_SORT, PersonnelService
 
 router = APIRouter(prefix="/personnel", tags=["personnel"])
 
+# Для листов передачи дел по подразделению
+MAX_ASSETS_BATCH = 500
+
+
+def _assets_versions(ids: list[int]) -> dict:
+    return {
+        Personnel: [Personnel.id.in_(ids)],
+        Phone: [Phone.owner_id.in_(ids)],
+        Equipment: [Equipment.current_owner_id.in_(ids)],
+        StorageAndPass: [StorageAndPass.assigned_to_id.in_(ids)],
+    }
+
+
+def _assets_scope(request: Request) -> Optional[dict]:
+    """Версии досье – только строки этого военнослужащего (по индексам владельца)."""
+    personnel_id = path_int(request, "personnel_id")
+    return None if personnel_id is None else _assets_versions([personnel_id])
+
+
+def _assets_batch_scope(request: Request) -> Optional[dict]:
+    try:
+        ids = [int(value) for value in request.query_params.getlist("ids")]
+    except ValueError:
+        return None
+    if not 0 < len(ids) <= MAX_ASSETS_BATCH:
+        return None
+    return _assets_versions(ids)
+
 
 class ClearanceCheckResponse(BaseModel):
     personnel_id: int
@@ -28,40 +69,43 @@ class ClearanceCheckResponse(BaseModel):
 
 @router.get("/", response_model=PersonnelListResponse)
 async def list_personnel(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
     status: Optional[str] = None,
     search: Optional[str] = None,
+    cursor: Optional[str] = Query(None, description="Курсор следующей страницы вместо skip"),
+    with_total: TotalMode = Query("exact", description="exact | estimate | false – как считать total"),
+    fields: Optional[str] = Query(None, description="Поля через запятую; * – все, включая notes/reason"),
     db: AsyncSession = Depends(get_db),
     _: User = Depends(require_officer),
+    _etag: None = Depends(collection_etag(Personnel)),
 ):
-    filters = [Personnel.is_active.is_(True)]
-    if status:
-        filters.append(Personnel.status == status)
-    if search:
-        term = f"%{search.strip()}%"
-        filters.append(
-            or_(
-                Personnel.full_name.ilike(term),
-                Personnel.rank.ilike(term),
-                Personnel.position.ilike(term),
-                Personnel.personal_number.ilike(term),
-                Personnel.service_number.ilike(term),
-            )
+    service = PersonnelService(db)
+    try:
+        items, total, next_cursor = await service.get_list(
+            skip=skip, limit=limit, status=status, search=search, cursor=cursor,
+            with_total=with_total, fields=fields,
         )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return fast_json({"total": total, "items": items, "next_cursor": next_cursor}, response)
 
-    total_stmt = select(func.count(Personnel.id)).where(*filters)
-    total = (await db.execute(total_stmt)).scalar_one()
 
-    items_stmt = (
-        select(Personnel)
-        .where(*filters)
-        .order_by(Personnel.rank_priority.asc().nullslast(), Personnel.position.asc().nullslast(), Personnel.full_name.asc())
-        .offset(skip)
-        .limit(limit)
-    )
-    items = (await db.execute(items_stmt)).scalars().all()
-    return PersonnelListResponse(total=total, items=items)
+@router.get("/export")
+async def export_personnel(
+    fmt: ExportFormat = Query("csv", alias="format", description="csv | ndjson | xlsx"),
+    status: Optional[str] = None,
+    search: Optional[str] = None,
+    fields: Optional[str] = Query("*", description="Поля через запятую; по умолчанию – все"),
+    db: AsyncSession = Depends(get_db),
+    _: User = Depends(require_officer),
+):
+    try:
+        stmt = PersonnelService(db).list_query(status, search, fields)
+        return export_response(stmt, PERSONNEL_SORT, fmt, "personnel")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 @router.post("/", response_model=PersonnelResponse, status_code=status.HTTP_201_CREATED)
@@ -71,11 +115,34 @@ async def create_personnel(
     _: User = Depends(require_officer),
     __: User = Depends(verify_csrf),
 ):
-    db_personnel = Personnel(**personnel.model_dump())
-    db.add(db_personnel)
-    await db.commit()
-    await db.refresh(db_personnel)
-    return db_personnel
+    try:
+        return await PersonnelService(db).create(personnel)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+@router.get("/suggest", response_model=list[PersonnelSuggestion])
+async def suggest_personnel(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=50),
+    db: AsyncSession = Depends(get_db),
+    _: User = Depends(require_officer),
+    _etag: None = Depends(collection_etag(Personnel)),
+):
+    """Автодополнение: префиксы ФИО, «Иванов И.И.», личного и жетонного номеров."""
+    return await PersonnelService(db).suggest(q, limit)
+
+
+@router.get("/assets", response_model=list[PersonnelAssets])
+async def get_assets_batch(
+    response: Response,
+    ids: list[int] = Query(..., min_length=1, max_length=MAX_ASSETS_BATCH),
+    db: AsyncSession = Depends(get_db),
+    _: User = Depends(require_officer),
+    _etag: None = Depends(collection_etag(Personnel, Phone, Equipment, StorageAndPass, scope=_assets_batch_scope)),
+):
+    """Досье по списку военнослужащих (?ids=1&ids=2) в порядке ids; удалённые пропускаются."""
+    return fast_json(await PersonnelService(db).get_assets(ids), response)
 
 
 @router.get("/{personnel_id}", response_model=PersonnelResponse)
@@ -83,6 +150,7 @@ async def get_personnel(
     personnel_id: int,
     db: AsyncSession = Depends(get_db),
     _: User = Depends(require_officer),
+    _etag: None = Depends(resource_etag(Personnel, "personnel_id")),
 ):
     personnel = await db.get(Personnel, personnel_id)
     if personnel is None or not personnel.is_active:
@@ -95,6 +163,7 @@ async def check_clearance(
     personnel_id: int,
     db: AsyncSession = Depends(get_db),
     _: User = Depends(require_officer),
+    _etag: None = Depends(resource_etag(Personnel, "personnel_id", daily=True)),
 ):
     personnel = await db.get(Personnel, personnel_id)
     if personnel is None or not personnel.is_active:
@@ -124,6 +193,34 @@ async def check_clearance(
     )
 
 
+@router.get("/{personnel_id}/assets", response_model=PersonnelAssets)
+async def get_assets(
+    personnel_id: int,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+    _: User = Depends(require_officer),
+    _etag: None = Depends(collection_etag(Personnel, Phone, Equipment, StorageAndPass, scope=_assets_scope)),
+):
+    """Телефоны, техника и носители/пропуска военнослужащего одним запросом."""
+    assets = await PersonnelService(db).get_assets([personnel_id])
+    if not assets:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Военнослужащий не найден")
+    return fast_json(assets[0], response)
+
+
+@router.get("/{personnel_id}/equipment-at", response_model=list[OwnershipAsOf])
+async def get_equipment_at(
+    personnel_id: int,
+    at: datetime = Query(..., description="Момент времени (ISO 8601; без пояса – UTC)"),
+    db: AsyncSession = Depends(get_db),
+    _: User = Depends(require_officer),
+):
+    """Техника, числившаяся за военнослужащим в момент at (по журналу перемещений)."""
+    if await db.get(Personnel, personnel_id) is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Военнослужащий не найден")
+    return fast_json(await EquipmentService(db).holdings_at(personnel_id, at))
+
+
 @router.put("/{personnel_id}", response_model=PersonnelResponse)
 async def update_personnel(
     personnel_id: int,
@@ -132,15 +229,12 @@ async def update_personnel(
     _: User = Depends(require_officer),
     __: User = Depends(verify_csrf),
 ):
-    personnel = await db.get(Personnel, personnel_id)
-    if personnel is None or not personnel.is_active:
+    try:
+        personnel = await PersonnelService(db).update(personnel_id, personnel_data)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if personnel is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Военнослужащий не найден")
-
-    for field, value in personnel_data.model_dump(exclude_unset=True).items():
-        setattr(personnel, field, value)
-
-    await db.commit()
-    await db.refresh(personnel)
     return personnel
 
 
@@ -151,26 +245,5 @@ async def delete_personnel(
     _: User = Depends(require_officer),
     __: User = Depends(verify_csrf),
 ):
-    
-
-    personnel = await db.get(Personnel, personnel_id)
-    if personnel is None or not personnel.is_active:
+    if not await PersonnelService(db).delete(personnel_id):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Военнослужащий не найден")
-
-    async with db.begin_nested():
-        # 1. Отозвать все носители и пропуска
-        await db.execute(
-            update(StorageAndPass)
-            .where(StorageAndPass.assigned_to_id == personnel_id)
-            .values(status="stock", assigned_to_id=None, return_date=datetime.now(timezone.utc))
-        )
-        # 2. Освободить технику
-        await db.execute(
-            update(Equipment)
-            .where(Equipment.current_owner_id == personnel_id)
-            .values(current_owner_id=None)
-        )
-        # 3. Деактивировать
-        personnel.is_active = False
-
-    await db.commit()
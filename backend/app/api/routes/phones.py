@@ -1,18 +1,27 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 
 from app.api.deps import get_current_user, verify_csrf
+from app.api.etag import collection_etag, resource_etag
+from app.api.export import ExportFormat, export_response
+from app.api.responses import fast_json
 from app.core.database import get_db
+from app.core.pagination import TotalMode
+from app.models.personnel import Personnel
+from app.models.phone import Phone
 from app.schemas.phone import (
     BatchCheckinRequest,
     BatchCheckoutRequest,
+    BatchStatusResult,
     PhoneCreate,
     PhoneListResponse,
     PhoneResponse,
+    PhoneStatusCounts,
+    PhoneStatusReport,
     PhoneUpdate,
 )
-from app.services.phone_service import PhoneService
+from app.services.phone_service import PHONE_SORT, PhoneService
 
 router = APIRouter(prefix="/phones", tags=["phones"])
 
@@ -34,17 +43,45 @@ async def _get_or_404(service: PhoneService, phone_id: int):
 
 @router.get("/", response_model=PhoneListResponse)
 async def list_phones(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
     status: Optional[str] = None,
     search: Optional[str] = None,
     owner_id: Optional[int] = None,
+    cursor: Optional[str] = Query(None, description="Курсор следующей страницы вместо skip"),
+    with_total: TotalMode = Query("exact", description="exact | estimate | false – как считать total"),
+    fields: Optional[str] = Query(None, description="Поля через запятую; * – все, включая notes/reason"),
     db: AsyncSession = Depends(get_db),
     _=Depends(get_current_user),
+    _etag: None = Depends(collection_etag(Phone, Personnel)),
 ):
     service = PhoneService(db)
-    items, total = await service.get_list(skip=skip, limit=limit, status=status, search=search, owner_id=owner_id)
-    return PhoneListResponse(total=total, items=[_enrich(p) for p in items])
+    try:
+        items, total, next_cursor = await service.get_list(
+            skip=skip, limit=limit, status=status, search=search, owner_id=owner_id,
+            cursor=cursor, with_total=with_total, fields=fields,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return fast_json({"total": total, "items": items, "next_cursor": next_cursor}, response)
+
+
+@router.get("/export")
+async def export_phones(
+    fmt: ExportFormat = Query("csv", alias="format", description="csv | ndjson | xlsx"),
+    status: Optional[str] = None,
+    search: Optional[str] = None,
+    owner_id: Optional[int] = None,
+    fields: Optional[str] = Query("*", description="Поля через запятую; по умолчанию – все"),
+    db: AsyncSession = Depends(get_db),
+    _=Depends(get_current_user),
+):
+    try:
+        stmt = PhoneService(db).list_query(status, search, owner_id, fields)
+        return export_response(stmt, PHONE_SORT, fmt, "phones")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 @router.post("/", response_model=PhoneResponse, status_code=status.HTTP_201_CREATED)
@@ -59,38 +96,60 @@ async def create_phone(
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)) from e
 
 
-@router.get("/reports/status")
+@router.get("/reports/status", response_model=PhoneStatusReport)
 async def get_status_report(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    platoon: Optional[str] = Query(None, description="Только несданные телефоны этого взвода"),
     db: AsyncSession = Depends(get_db),
     _=Depends(get_current_user),
+    _etag: None = Depends(collection_etag(Phone, Personnel)),
 ):
-    report = await PhoneService(db).get_status_report()
-    return {
-        "total_phones": report["total_phones"],
-        "checked_in": report["checked_in"],
-        "checked_out": report["checked_out"],
-        "phones_not_submitted": [_enrich(p) for p in report["phones_not_submitted"]],
-    }
+    return await PhoneService(db).get_status_report(skip=skip, limit=limit, platoon=platoon)
+
+
+@router.get("/reports/status/count", response_model=PhoneStatusCounts)
+async def get_status_counts(
+    db: AsyncSession = Depends(get_db),
+    _=Depends(get_current_user),
+    _etag: None = Depends(collection_etag(Phone)),
+):
+    """Только счётчики – для частого опроса на вечерней поверке."""
+    return await PhoneService(db).get_status_counts()
+
 
+def _batch_result(verb: str, result: dict[str, list[int]]) -> dict:
+    count = len(result["applied"])
+    message = f"{verb} {count} телефонов"
+    if result["skipped"] or result["missing"]:
+        message += f", пропущено {len(result['skipped'])}, не найдено {len(result['missing'])}"
+    return {"message": message, "count": count, **result}
 
-@router.post("/batch-checkin")
+
+@router.post("/batch-checkin", response_model=BatchStatusResult)
 async def batch_checkin(
     request: BatchCheckinRequest,
     db: AsyncSession = Depends(get_db),
     _=Depends(verify_csrf),
 ):
-    count = await PhoneService(db).batch_checkin(request.phone_ids)
-    return {"message": f"Принято {count} телефонов", "count": count}
+    try:
+        result = await PhoneService(db).batch_checkin(request.phone_ids, request.best_effort)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+    return _batch_result("Принято", result)
 
 
-@router.post("/batch-checkout")
+@router.post("/batch-checkout", response_model=BatchStatusResult)
 async def batch_checkout(
     request: BatchCheckoutRequest,
     db: AsyncSession = Depends(get_db),
     _=Depends(verify_csrf),
 ):
-    count = await PhoneService(db).batch_checkout(request.phone_ids)
-    return {"message": f"Выдано {count} телефонов", "count": count}
+    try:
+        result = await PhoneService(db).batch_checkout(request.phone_ids, request.best_effort)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+    return _batch_result("Выдано", result)
 
 
 @router.get("/{phone_id}", response_model=PhoneResponse)
@@ -98,6 +157,7 @@ async def get_phone(
     phone_id: int,
     db: AsyncSession = Depends(get_db),
     _=Depends(get_current_user),
+    _etag: None = Depends(resource_etag(Phone, "phone_id", Personnel)),
 ):
     return _enrich(await _get_or_404(PhoneService(db), phone_id))
 
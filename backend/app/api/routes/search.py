@@ -0,0 +1,42 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import ROLE_HIERARCHY, get_current_active_user
+from app.api.etag import collection_etag
+from app.models.equipment import Equipment, StorageDevice
+from app.models.personnel import Personnel
+from app.models.phone import Phone
+from app.models.storage_and_passes import StorageAndPass
+from app.core.database import get_db
+from app.models.user import User
+from app.schemas.search import SearchResponse
+from app.services.search_service import SEARCH_TYPES, SearchService
+
+router = APIRouter(prefix="/search", tags=["search"])
+
+
+@router.get("/", response_model=SearchResponse)
+async def search(
+    q: str = Query(..., min_length=2, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    types: Optional[str] = Query(None, description="Через запятую: " + ", ".join(SEARCH_TYPES)),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+    _etag: None = Depends(collection_etag(Equipment, StorageDevice, Phone, Personnel, StorageAndPass)),
+):
+    requested = [t.strip() for t in types.split(",") if t.strip()] if types else list(SEARCH_TYPES)
+    unknown = set(requested) - set(SEARCH_TYPES)
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Неизвестные типы: {', '.join(sorted(unknown))}",
+        )
+
+    # Личный состав доступен только офицерам – как и в /personnel
+    if ROLE_HIERARCHY.get(current_user.role, 0) < ROLE_HIERARCHY["officer"]:
+        requested = [t for t in requested if t != "personnel"]
+
+    items = await SearchService(db).search(q, limit=limit, types=requested)
+    return SearchResponse(query=q, items=items)
@@ -1,10 +1,16 @@
 from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.deps import get_current_active_user, verify_csrf
+from app.api.etag import collection_etag, resource_etag
+from app.api.export import ExportFormat, export_response
+from app.api.responses import fast_json
 from app.core.database import get_db
+from app.core.pagination import TotalMode
+from app.models.personnel import Personnel
+from app.models.storage_and_passes import StorageAndPass
 from app.models.user import User
 from app.schemas.storage_and_passes import (
     AssignmentRequest,
@@ -14,7 +20,7 @@ from app.schemas.storage_and_passes import (
     StorageAndPassStats,
     StorageAndPassUpdate,
 )
-from app.services.storage_and_passes_service import StorageAndPassService
+from app.services.storage_and_passes_service import STORAGE_AND_PASS_SORT, StorageAndPassService
 
 router = APIRouter(prefix="/storage-and-passes", tags=["storage-and-passes"])
 
@@ -36,17 +42,45 @@ async def _get_or_404(service: StorageAndPassService, asset_id: int):
 
 @router.get("/", response_model=StorageAndPassListResponse)
 async def list_assets(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
     asset_type: Optional[str] = None,
     status: Optional[str] = None,
     search: Optional[str] = None,
+    cursor: Optional[str] = Query(None, description="Курсор следующей страницы вместо skip"),
+    with_total: TotalMode = Query("exact", description="exact | estimate | false – как считать total"),
+    fields: Optional[str] = Query(None, description="Поля через запятую; * – все, включая notes/reason"),
     db: AsyncSession = Depends(get_db),
     _: User = Depends(get_current_active_user),
+    _etag: None = Depends(collection_etag(StorageAndPass, Personnel)),
 ):
     service = StorageAndPassService(db)
-    items, total = await service.get_list(skip=skip, limit=limit, asset_type=asset_type, status=status, search=search)
-    return StorageAndPassListResponse(total=total, items=[_enrich(a) for a in items])
+    try:
+        items, total, next_cursor = await service.get_list(
+            skip=skip, limit=limit, asset_type=asset_type, status=status, search=search,
+            cursor=cursor, with_total=with_total, fields=fields,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return fast_json({"total": total, "items": items, "next_cursor": next_cursor}, response)
+
+
+@router.get("/export")
+async def export_assets(
+    fmt: ExportFormat = Query("csv", alias="format", description="csv | ndjson | xlsx"),
+    asset_type: Optional[str] = None,
+    status: Optional[str] = None,
+    search: Optional[str] = None,
+    fields: Optional[str] = Query("*", description="Поля через запятую; по умолчанию – все"),
+    db: AsyncSession = Depends(get_db),
+    _: User = Depends(get_current_active_user),
+):
+    try:
+        stmt = StorageAndPassService(db).list_query(asset_type, status, search, fields)
+        return export_response(stmt, STORAGE_AND_PASS_SORT, fmt, "storage-and-passes")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 @router.post("/", response_model=StorageAndPassResponse, status_code=status.HTTP_201_CREATED)
@@ -68,6 +102,7 @@ async def get_stats(
     search: Optional[str] = None,
     db: AsyncSession = Depends(get_db),
     _: User = Depends(get_current_active_user),
+    _etag: None = Depends(collection_etag(StorageAndPass)),
 ):
     return await StorageAndPassService(db).get_statistics(asset_type=asset_type, status=status, search=search)
 
@@ -77,6 +112,7 @@ async def get_asset(
     asset_id: int,
     db: AsyncSession = Depends(get_db),
     _: User = Depends(get_current_active_user),
+    _etag: None = Depends(resource_etag(StorageAndPass, "asset_id", Personnel)),
 ):
     return _enrich(await _get_or_404(StorageAndPassService(db), asset_id))
 
@@ -0,0 +1,19 @@
+from fastapi import APIRouter, Depends
+
+from app.api.deps import require_admin
+from app.core.principal_cache import principal_cache
+from app.core.stats_cache import stats_cache
+from app.models.user import User
+from app.services.personnel_index import personnel_index
+
+router = APIRouter(prefix="/system", tags=["system"])
+
+
+@router.get("/cache-stats")
+async def get_cache_stats(_: User = Depends(require_admin)):
+    """Счётчики попаданий/промахов in-process кэшей текущего воркера."""
+    return {
+        "principal": principal_cache.stats(),
+        "personnel_index": personnel_index.stats(),
+        "stats": stats_cache.stats(),
+    }
@@ -3,7 +3,9 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 
 from app.api.deps import get_current_user, require_admin, verify_csrf
+from app.api.etag import collection_etag, resource_etag
 from app.core.database import get_db
+from app.core.pagination import TotalMode
 from app.models.user import User
 from app.schemas.user import ChangePasswordRequest, UserCreate, UserListResponse, UserResponse, UserUpdate
 from app.services.user_service import UserService
@@ -28,12 +30,20 @@ async def list_users(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
     search: Optional[str] = None,
+    cursor: Optional[str] = Query(None, description="Курсор следующей страницы вместо skip"),
+    with_total: TotalMode = Query("exact", description="exact | estimate | false – как считать total"),
     db: AsyncSession = Depends(get_db),
     _: User = Depends(require_admin),
+    _etag: None = Depends(collection_etag(User)),
 ):
     service = UserService(db)
-    items, total = await service.get_list(skip=skip, limit=limit, search=search)
-    return UserListResponse(total=total, items=items)
+    try:
+        items, total, next_cursor = await service.get_list(
+            skip=skip, limit=limit, search=search, cursor=cursor, with_total=with_total
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return UserListResponse(total=total, items=items, next_cursor=next_cursor)
 
 
 @router.post("/", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
@@ -55,6 +65,7 @@ async def get_user(
     user_id: int,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
+    _etag: None = Depends(resource_etag(User, "user_id")),
 ):
     _assert_self_or_admin(current_user, user_id)
     return await _get_user_or_404(UserService(db), user_id)
@@ -10,13 +10,17 @@ from urllib.parse import urlparse
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
-from app.core.database_sync import SessionLocal
+from app.core.database_sync import SessionLocal, engine
 from app.core.security import generate_secure_password, get_password_hash
 from app.importers.laptops_import import DEFAULT_IMPORT_FILE, import_laptops_to_equipment
+from app.importers.mappings import MAPPINGS
+from app.importers.pipeline import format_from_filename, import_file
 from app.models.user import User
 from app.models.equipment import Equipment 
 from app.models.personnel import Personnel
 from app.models.phone import Phone 
+from app.services.asset_counters import rebuild_counters, verify_counters
+from app.services.movement_partitions import archive_partitions, ensure_partitions, list_partitions
 
 def create_admin() -> None:
     db: Session = SessionLocal()
@@ -56,13 +60,26 @@ def create_admin() -> None:
         db.close()
 
 
-def import_laptops(tsv_path: Path) -> None:
+def import_laptops(tsv_path: Path, dry_run: bool) -> None:
     db: Session = SessionLocal()
 
     try:
-        inserted, updated = import_laptops_to_equipment(db, tsv_path)
-        db.commit()
-        print(f"✅ Импорт завершён. Добавлено: {inserted}, обновлено: {updated}")
+        result = import_laptops_to_equipment(db, tsv_path, dry_run=dry_run)
+        counts = f"добавлено: {result.inserted}, обновлено: {result.updated}, без изменений: {result.unchanged}"
+        if dry_run:
+            db.rollback()
+            for change in result.changes:
+                print(f"   {change}")
+            print(f"🔍 Пробный прогон, в базу ничего не записано. Будет {counts}")
+        else:
+            db.commit()
+            print(f"✅ Импорт завершён. {counts[0].upper()}{counts[1:]}")
+        if result.unmatched_owners:
+            print(f"   ⚠️  Не найдены в личном составе ({len(result.unmatched_owners)}): "
+                  f"{', '.join(sorted(result.unmatched_owners))}")
+        if result.duplicates:
+            print(f"   ⚠️  Повторы S/N в файле: {result.duplicates} (учтена последняя строка)")
+        print(f"   Ноутбуков: {result.rows} за {result.elapsed:.2f} с ({result.rows_per_second:.0f} строк/с)")
     except Exception:
         db.rollback()
         raise
@@ -70,6 +87,36 @@ def import_laptops(tsv_path: Path) -> None:
         db.close()
 
 
+def import_entities(
+    entity: str, path: Path, fmt: Optional[str], dry_run: bool, mappings: list[str], workers: Optional[int],
+) -> None:
+    overrides = {}
+    for item in mappings:
+        header, separator, field = item.rpartition("=")
+        if not separator:
+            raise SystemExit(f"❌ --map ожидает «Заголовок=поле», получено «{item}»")
+        overrides[header.strip()] = field.strip()
+
+    with path.open("rb") as source:
+        report = import_file(
+            entity, source, fmt or format_from_filename(path.name),
+            overrides=overrides, dry_run=dry_run, workers=workers,
+        )
+
+    counts = f"добавлено: {report.inserted}, обновлено: {report.updated}, без изменений: {report.unchanged}"
+    if dry_run:
+        print(f"🔍 Пробный прогон, в базу ничего не записано. Корректных строк: {report.valid} из {report.rows}")
+    else:
+        print(f"✅ Импорт завершён. {counts[0].upper()}{counts[1:]}")
+    if report.error_count:
+        print(f"   ⚠️  Ошибок: {report.error_count}")
+        for error in report.errors[:20]:
+            print(f"   строка {error.row}{f', {error.field}' if error.field else ''}: {error.message}")
+        if report.error_count > 20:
+            print(f"   ... и ещё {report.error_count - 20}")
+    print(f"   Строк: {report.rows} за {report.elapsed:.2f} с ({report.rows_per_second:.0f} строк/с)")
+
+
 def backup_database(output_path: Optional[Path]) -> None:
     db_url = settings.DATABASE_URL
     parsed = urlparse(db_url)
@@ -119,6 +166,53 @@ def backup_database(output_path: Optional[Path]) -> None:
     raise ValueError(f"Неподдерживаемый тип БД для backup: {parsed.scheme}")
 
 
+def rebuild_asset_counters(verify_only: bool) -> None:
+    db: Session = SessionLocal()
+
+    try:
+        if verify_only:
+            mismatches = verify_counters(db)
+            if not mismatches:
+                print("✅ Счётчики совпадают с данными")
+                return
+            print(f"❌ Расхождений: {len(mismatches)}")
+            for key, stored, live in mismatches:
+                print(f"   {' / '.join(str(part) for part in key)}: в счётчиках {stored}, в таблицах {live}")
+            raise SystemExit(1)
+
+        rows = rebuild_counters(db)
+        db.commit()
+        print(f"✅ Счётчики пересобраны. Строк: {rows}")
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def movement_partitions(years_ahead: Optional[int]) -> None:
+    with engine.begin() as conn:
+        created = ensure_partitions(conn, years_ahead)
+        years = sorted(list_partitions(conn))
+    if created:
+        print(f"✅ Созданы секции: {', '.join(created)}")
+    else:
+        print("✅ Новые секции не нужны")
+    if years:
+        print(f"   Секции equipment_movements: {years[0]}–{years[-1]}")
+
+
+def archive_movements(before_year: int, dump_dir: Optional[Path]) -> None:
+    with engine.begin() as conn:
+        archived = archive_partitions(conn, before_year, dump_dir)
+    if not archived:
+        print(f"✅ Секций раньше {before_year} года нет")
+        return
+    print(f"✅ Архивировано секций: {len(archived)}")
+    for name in archived:
+        print(f"   {name}")
+
+
 def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(description="Утилиты администрирования ZGT")
     subparsers = parser.add_subparsers(dest="command", required=True)
@@ -132,10 +226,45 @@ def build_parser() -> argparse.ArgumentParser:
         default=DEFAULT_IMPORT_FILE,
         help=f"Путь к TSV-файлу (по умолчанию: {DEFAULT_IMPORT_FILE})",
     )
+    import_parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Показать, что будет добавлено и изменено, ничего не записывая",
+    )
+
+    entities_parser = subparsers.add_parser("import", help="Импорт телефонов, личного состава, флешек/пропусков")
+    entities_parser.add_argument("entity", choices=sorted(MAPPINGS))
+    entities_parser.add_argument("file", type=Path, help="CSV, TSV или XLSX")
+    entities_parser.add_argument("--format", choices=["csv", "tsv", "xlsx"], default=None, help="По умолчанию – по расширению")
+    entities_parser.add_argument("--dry-run", action="store_true", help="Только проверить файл, ничего не записывая")
+    entities_parser.add_argument(
+        "--map", action="append", default=[], metavar="ЗАГОЛОВОК=ПОЛЕ",
+        help="Дополнительное соответствие колонки полю (можно несколько)",
+    )
+    entities_parser.add_argument("--workers", type=int, default=None, help="Процессов разбора после первых IMPORT_PARALLEL_MIN_ROWS строк (0 – без пула)")
 
     backup_parser = subparsers.add_parser("backup-db", help="Создать backup базы данных")
     backup_parser.add_argument("--output", type=Path, default=None, help="Путь к backup файлу")
 
+    counters_parser = subparsers.add_parser("rebuild-counters", help="Пересобрать счётчики asset_counters")
+    counters_parser.add_argument(
+        "--verify",
+        action="store_true",
+        help="Только сверить счётчики с таблицами (код выхода 1 при расхождении)",
+    )
+
+    partitions_parser = subparsers.add_parser("movement-partitions", help="Создать секции журнала перемещений вперёд")
+    partitions_parser.add_argument("--years-ahead", type=int, default=None, help="Лет вперёд (по умолчанию из настроек)")
+
+    archive_parser = subparsers.add_parser("archive-movements", help="Отсоединить и архивировать старые секции перемещений")
+    archive_parser.add_argument("--before", type=int, required=True, metavar="ГОД", help="Архивировать годы раньше этого")
+    archive_parser.add_argument(
+        "--dump-dir",
+        type=Path,
+        default=None,
+        help="Выгрузить секции в CSV.gz и удалить (по умолчанию – перенести в схему archive)",
+    )
+
     return parser
 
 
@@ -146,9 +275,17 @@ def main() -> None:
     if args.command == "create-admin":
         create_admin()
     elif args.command == "import-laptops":
-        import_laptops(args.file)
+        import_laptops(args.file, args.dry_run)
+    elif args.command == "import":
+        import_entities(args.entity, args.file, args.format, args.dry_run, args.map, args.workers)
     elif args.command == "backup-db":
         backup_database(args.output)
+    elif args.command == "rebuild-counters":
+        rebuild_asset_counters(args.verify)
+    elif args.command == "movement-partitions":
+        movement_partitions(args.years_ahead)
+    elif args.command == "archive-movements":
+        archive_movements(args.before, args.dump_dir)
 
 
 if __name__ == "__main__":
@@ -21,6 +21,57 @@ class Settings(BaseSettings):
 
     BCRYPT_ROUNDS: int = 12
 
+    # Кэш пользователей в get_current_user (0 – выключен)
+    PRINCIPAL_CACHE_MAX_SIZE: int = 1024
+    PRINCIPAL_CACHE_TTL_SECONDS: float = 30.0
+
+    # Кэш /equipment/stats и /storage-and-passes/stats (0 – выключен);
+    # TTL ограничивает устаревание после записи в соседнем воркере
+    STATS_CACHE_MAX_SIZE: int = 256
+    STATS_CACHE_TTL_SECONDS: float = 10.0
+
+    # Как часто индекс /personnel/suggest подтягивает изменения других воркеров
+    PERSONNEL_INDEX_SYNC_SECONDS: float = 5.0
+
+    # Экспорт: строк на одну выборку серверного курсора; XLSX до этого
+    # размера собирается в памяти, дальше – во временном файле
+    EXPORT_BATCH_SIZE: int = 1000
+    EXPORT_XLSX_SPOOL_BYTES: int = 16 * 1024 * 1024
+
+    # Импорт файлов (app.importers.pipeline): строк в пачке разбора и записи,
+    # процессов разбора (0 – в текущем процессе: на 50 тыс. строк это ~1,5 с
+    # против ~4 с с пулом из 2 процессов), со скольких строк файла к разбору
+    # подключается пул, лимит размера загрузки, сколько ошибок строк возвращать
+    IMPORT_CHUNK_SIZE: int = 2000
+    IMPORT_WORKERS: int = 0
+    IMPORT_PARALLEL_MIN_ROWS: int = 200_000
+    IMPORT_MAX_BYTES: int = 50 * 1024 * 1024
+    IMPORT_SPOOL_BYTES: int = 8 * 1024 * 1024
+    IMPORT_MAX_ERRORS: int = 1000
+
+    # Сколько годовых секций equipment_movements создавать вперёд
+    MOVEMENT_PARTITIONS_AHEAD: int = 1
+
+    # Idempotency-Key: сколько хранится ответ; через сколько незавершённый
+    # запрос (упал воркер) считается брошенным; от ответов больше лимита
+    # сохраняется только статус; как часто удалять истёкшие записи
+    IDEMPOTENCY_TTL_SECONDS: int = 24 * 60 * 60
+    IDEMPOTENCY_LOCK_SECONDS: int = 10 * 60
+    IDEMPOTENCY_MAX_RESPONSE_BYTES: int = 1024 * 1024
+    IDEMPOTENCY_PURGE_INTERVAL_SECONDS: float = 300.0
+
+    # Одновременных вычислений Argon2 на воркер (каждое ~64 МБ памяти)
+    PASSWORD_HASH_CONCURRENCY: int = 2
+
+    # Хранилище счётчиков /auth/login: memory | mmap | postgres
+    RATE_LIMIT_BACKEND: str = "memory"
+    # fixed – 5 неудач и блок на 15 минут; token_bucket – плавное восстановление
+    RATE_LIMIT_MODE: str = "fixed"
+    # Жёсткий лимит отслеживаемых IP для memory-хранилища (LRU-вытеснение)
+    RATE_LIMIT_MAX_KEYS: int = 100_000
+    RATE_LIMIT_MMAP_PATH: str = "/tmp/zgt_rate_limit.bin"
+    RATE_LIMIT_MMAP_SLOTS: int = 4096
+
     model_config = SettingsConfigDict(
         env_file=".env",
         env_file_encoding="utf-8",
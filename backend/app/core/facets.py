@@ -0,0 +1,88 @@
+"""
+Фасетные счётчики для отчётов (/equipment/stats, /storage-and-passes/stats,
+/phones/reports/status) одним запросом.
+
+Семантика как у фильтров в UI: общее количество учитывает все фильтры,
+а разбивка по фасету – все фильтры, кроме собственного (иначе при выбранном
+статусе разбивка по статусам схлопнулась бы в одну строку).
+
+    SELECT status, equipment_type,
+           grouping(status), grouping(equipment_type),
+           count(*) FILTER (WHERE <все фильтры фасетов>)        -- total
+           count(*) FILTER (WHERE <фильтры, кроме status>)      -- by_status
+           count(*) FILTER (WHERE <фильтры, кроме type>)        -- by_type
+    FROM equipment
+    WHERE <общие фильтры>
+    GROUP BY GROUPING SETS ((), (status), (equipment_type))
+
+Таблица читается один раз, строки распределяются по наборам группировки.
+
+С measure вместо count(*) суммируется колонка – так те же фасеты
+считаются по заранее агрегированной таблице asset_counters.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Optional, Sequence
+
+from sqlalchemy import and_, func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+@dataclass(frozen=True)
+class Facet:
+    # Ключ разбивки в результате, например "by_status"
+    name: str
+    column: Any
+    # Выбранное значение фильтра по этой колонке (None – фильтра нет)
+    value: Optional[Any] = None
+
+    def condition(self):
+        return None if self.value is None else self.column == self.value
+
+
+def _count(conditions: list, measure=None):
+    aggregate = func.count() if measure is None else func.sum(measure)
+    conditions = [c for c in conditions if c is not None]
+    return aggregate.filter(and_(*conditions)) if conditions else aggregate
+
+
+async def facet_counts(
+    db: AsyncSession,
+    model,
+    filters: Sequence,
+    facets: Sequence[Facet],
+    measure=None,
+) -> tuple[int, dict[str, dict[Any, int]]]:
+    """
+    filters – общие условия (is_active, поиск и т.п.), facets – разбивки,
+    measure – колонка-количество для предагрегированных таблиц (иначе count(*)).
+    Возвращает (total, {facet.name: {значение: количество}}); нулевые группы опускаются.
+    """
+    own = [facet.condition() for facet in facets]
+    stmt = (
+        select(
+            *(facet.column for facet in facets),
+            *(func.grouping(facet.column) for facet in facets),
+            _count(own, measure),
+            *(_count(own[:i] + own[i + 1:], measure) for i in range(len(facets))),
+        )
+        .select_from(model)
+        .where(*filters)
+        .group_by(func.grouping_sets(tuple_(), *(tuple_(facet.column) for facet in facets)))
+    )
+
+    total = 0
+    breakdown: dict[str, dict[Any, int]] = {facet.name: {} for facet in facets}
+    width = len(facets)
+    for row in (await db.execute(stmt)).all():
+        values, grouping = row[:width], row[width:2 * width]
+        # sum() возвращает numeric (Decimal) и NULL на пустой группе
+        counts = [int(value or 0) for value in row[2 * width:]]
+        if all(grouping):
+            total = counts[0]
+            continue
+        # В наборе (column) grouping() этой колонки равен 0
+        index = grouping.index(0)
+        if counts[index + 1]:
+            breakdown[facets[index].name][values[index]] = counts[index + 1]
+    return total, breakdown
@@ -0,0 +1,200 @@
+"""
+Keyset (cursor) пагинация для списочных эндпоинтов.
+
+Курсор – base64url(JSON) кортежа значений ключа сортировки последней строки
+страницы, например (inventory_number, id). Следующая страница выбирается
+условием «строго после этого кортежа» вместо OFFSET: глубокие страницы
+не замедляются, а строки не «съезжают» между страницами при правках.
+
+Общее количество (with_total):
+- exact    – count(*) OVER () в том же запросе, что и страница;
+- estimate – pg_class.reltuples для нефильтрованных списков больших таблиц,
+             иначе как exact;
+- false    – не считается (прокрутка в UI).
+"""
+
+import base64
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Literal, Optional, Sequence
+
+from sqlalchemy import DateTime, Table, and_, false, func, or_, select, text, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select
+
+TotalMode = Literal["false", "exact", "estimate"]
+
+# Ниже этого размера точный count дешевле, чем ошибка оценки
+_ESTIMATE_MIN_ROWS = 10_000
+
+# Метка колонки count(*) OVER () – не пересекается с полями ответа
+_TOTAL = "_page_total"
+
+_RELTUPLES = text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:name)")
+
+
+@dataclass(frozen=True)
+class SortKey:
+    """Элемент ключа сортировки. NULL всегда сортируются последними."""
+
+    column: Any
+    descending: bool = False
+    nullable: bool = False
+
+    def order_by(self):
+        clause = self.column.desc() if self.descending else self.column.asc()
+        return clause.nullslast() if self.nullable else clause
+
+
+def order_by(keys: Sequence[SortKey]) -> list:
+    return [key.order_by() for key in keys]
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    payload = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    raw = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, keys: Sequence[SortKey]) -> list[Any]:
+    """Декодирует курсор и приводит значения к типам колонок. ValueError – если курсор испорчен."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError) as exc:
+        raise ValueError("Некорректный курсор") from exc
+    if not isinstance(values, list) or len(values) != len(keys):
+        raise ValueError("Некорректный курсор")
+
+    decoded = []
+    for key, value in zip(keys, values):
+        if value is None:
+            if not key.nullable:
+                raise ValueError("Некорректный курсор")
+        elif isinstance(key.column.type, DateTime):
+            value = datetime.fromisoformat(value)
+        elif not isinstance(value, key.column.type.python_type):
+            raise ValueError("Некорректный курсор")
+        decoded.append(value)
+    return decoded
+
+
+def _after(key: SortKey, value: Any):
+    """Строки, идущие строго после value по одному элементу ключа."""
+    if value is None:
+        # NULL последние – после NULL ничего нет
+        return false()
+    condition = key.column < value if key.descending else key.column > value
+    return or_(condition, key.column.is_(None)) if key.nullable else condition
+
+
+def _equal(key: SortKey, value: Any):
+    return key.column.is_(None) if value is None else key.column == value
+
+
+def keyset_predicate(keys: Sequence[SortKey], values: Sequence[Any]):
+    """
+    WHERE-условие «после кортежа values».
+    Для NOT NULL ключей одного направления – сравнение кортежей (ROW(a, b) > ROW(:a, :b)),
+    которое планировщик использует как диапазон по составному индексу.
+    Иначе – развёрнутая форма (a > :a) OR (a = :a AND b > :b) OR ... с учётом NULL.
+    """
+    if not any(key.nullable for key in keys) and len({key.descending for key in keys}) == 1:
+        left = tuple_(*(key.column for key in keys))
+        right = tuple_(*values)
+        return left < right if keys[0].descending else left > right
+
+    branches = []
+    for position, (key, value) in enumerate(zip(keys, values)):
+        prefix = [_equal(k, v) for k, v in zip(keys[:position], values[:position])]
+        branches.append(and_(*prefix, _after(key, value)))
+    return or_(*branches)
+
+
+def _selects_entity(stmt: Select) -> bool:
+    """select(Model) – True; select(Model.a, Model.b, ...) – False."""
+    descriptions = stmt.column_descriptions
+    return len(descriptions) == 1 and descriptions[0]["expr"] is descriptions[0]["entity"]
+
+
+async def estimate_count(db: AsyncSession, table: Table) -> Optional[int]:
+    """Оценка числа строк по статистике планировщика. None – таблица мала или не анализировалась."""
+    estimate = await db.scalar(_RELTUPLES, {"name": table.name})
+    if estimate is None or estimate < _ESTIMATE_MIN_ROWS:
+        return None
+    return int(estimate)
+
+
+async def count(db: AsyncSession, stmt: Select) -> int:
+    return await db.scalar(select(func.count()).select_from(stmt.order_by(None).subquery())) or 0
+
+
+async def paginate(
+    db: AsyncSession,
+    stmt: Select,
+    keys: Sequence[SortKey],
+    *,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    options: Sequence = (),
+    with_total: TotalMode = "exact",
+    estimate_from: Optional[Table] = None,
+) -> tuple[list, Optional[int], Optional[str]]:
+    """
+    Выполняет stmt постранично. stmt – select одной ORM-сущности (items –
+    объекты) или select колонок (items – словари, см. app.core.projection;
+    колонки ключа сортировки должны входить в выборку).
+    С cursor – keyset, без него – OFFSET skip. Выбирается limit + 1 строка,
+    чтобы без отдельного запроса узнать, есть ли следующая страница.
+
+    options – опции загрузки (joinedload и т.п.), применяются только к странице,
+    не к подсчёту. estimate_from – таблица для with_total=estimate; сервис
+    передаёт её только для списка без пользовательских фильтров.
+
+    Возвращает (items, total, next_cursor).
+    """
+    total = None
+    if with_total == "estimate" and estimate_from is not None:
+        total = await estimate_count(db, estimate_from)
+    exact = with_total != "false" and total is None
+
+    page = stmt.options(*options).order_by(*order_by(keys)).limit(limit + 1)
+    if cursor:
+        page = page.where(keyset_predicate(keys, decode_cursor(cursor, keys)))
+    else:
+        page = page.offset(skip)
+
+    entity = _selects_entity(stmt)
+    # Окно считает строки до LIMIT/OFFSET, но после WHERE – поэтому только без курсора
+    windowed = exact and not cursor
+    if windowed:
+        rows = (await db.execute(page.add_columns(func.count().over().label(_TOTAL)))).all()
+        if rows:
+            total = rows[0][-1]
+        if entity:
+            entities = [row[0] for row in rows]
+        else:
+            entities = [row._asdict() for row in rows]
+            for item in entities:
+                del item[_TOTAL]
+    elif entity:
+        entities = (await db.execute(page)).scalars().all()
+    else:
+        entities = [dict(row) for row in (await db.execute(page)).mappings()]
+
+    if exact and total is None:
+        # Режим курсора или страница за концом списка – окно не дало числа
+        total = await count(db, stmt)
+
+    items = list(entities[:limit])
+    next_cursor = None
+    if len(entities) > limit and items:
+        last = items[-1]
+        if entity:
+            values = [getattr(last, key.column.key) for key in keys]
+        else:
+            values = [last[key.column.key] for key in keys]
+        next_cursor = encode_cursor(values)
+    return items, total, next_cursor
@@ -0,0 +1,102 @@
+"""
+In-process кэш аутентифицированных пользователей для get_current_user.
+
+Каждый запрос проходит через get_current_user, и без кэша это лишний
+SELECT по users.username. Кэш хранит снимок колонок пользователя
+(без password_hash), ограничен по размеру (LRU) и по времени жизни (TTL).
+
+Инвалидация – write-through из UserService (update, toggle_active, delete,
+change_password), поэтому деактивация и смена роли применяются сразу.
+Состояние не разделяется между воркерами Uvicorn: в соседнем воркере
+изменения станут видны не позже чем через TTL.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from app.core.config import settings
+from app.models.user import User
+
+# Колонки, которые попадают в кэш. password_hash намеренно исключён.
+_CACHED_COLUMNS = ("id", "username", "full_name", "role", "is_active", "last_login", "created_at")
+
+
+@dataclass
+class _Entry:
+    values: dict[str, Any]
+    expires_at: float
+
+
+class PrincipalCache:
+    """
+    LRU + TTL кэш пользователей по username.
+    Thread-safe: использует Lock.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl_seconds: float = 30.0) -> None:
+        self._max_size = max_size
+        self._ttl = ttl_seconds
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    # ── Public API ────────────────────────────────────────────────────────────
+
+    def get(self, username: str) -> Optional[User]:
+        """Вернёт отсоединённый от сессии User или None при промахе/истёкшем TTL."""
+        with self._lock:
+            entry = self._entries.get(username)
+            if entry is None or entry.expires_at <= time.monotonic():
+                if entry is not None:
+                    del self._entries[username]
+                self._misses += 1
+                return None
+            self._entries.move_to_end(username)
+            self._hits += 1
+            values = entry.values
+        # Новый transient-объект на каждый запрос: общий экземпляр между
+        # конкурентными запросами не разделяется.
+        return User(**values)
+
+    def put(self, user: User) -> None:
+        if self._max_size <= 0 or self._ttl <= 0:
+            return
+        values = {column: getattr(user, column) for column in _CACHED_COLUMNS}
+        with self._lock:
+            self._entries[user.username] = _Entry(values=values, expires_at=time.monotonic() + self._ttl)
+            self._entries.move_to_end(user.username)
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, *usernames: Optional[str]) -> None:
+        with self._lock:
+            for username in usernames:
+                if username:
+                    self._entries.pop(username, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict[str, float]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "size": len(self._entries),
+                "max_size": self._max_size,
+                "ttl_seconds": self._ttl,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+# Синглтон для импорта в deps и сервисах
+principal_cache = PrincipalCache(
+    max_size=settings.PRINCIPAL_CACHE_MAX_SIZE,
+    ttl_seconds=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+)
@@ -0,0 +1,53 @@
+"""
+Колоночные выборки для списков без ORM-объектов.
+
+Списочные эндпоинты выбирают ровно поля схемы ответа (включая JOIN-поля
+вроде ФИО владельца) и получают строки-словари: без identity map,
+_sa_instance_state и повторной валидации pydantic. Список колонок строится
+по полям схемы, поэтому ответ совпадает по форме с response_model.
+
+Параметр fields= сужает и SELECT, и ответ:
+- не задан – все поля, кроме тяжёлых текстовых (DEFERRED_FIELDS);
+- "*"      – все поля;
+- "a,b"    – только перечисленные; id и колонки ключа сортировки
+             (нужны для курсора) добавляются всегда.
+"""
+
+from typing import Any, Optional, Sequence
+
+from pydantic import BaseModel
+
+# Text-колонки, которые списки не отдают без явного запроса
+DEFERRED_FIELDS = frozenset({"notes", "reason"})
+
+
+def response_columns(schema: type[BaseModel], model, **joined: Any) -> dict[str, Any]:
+    """
+    {поле: выражение} для каждого поля schema: колонка model с тем же именем
+    или выражение из joined (колонка связанной таблицы). Несовпадение полей
+    схемы и модели – ошибка при импорте, а не в рантайме.
+    """
+    columns = {}
+    for name in schema.model_fields:
+        if name in joined:
+            columns[name] = joined[name].label(name)
+        else:
+            columns[name] = getattr(model, name)
+    return columns
+
+
+def select_fields(columns: dict[str, Any], fields: Optional[str], keys: Sequence = ()) -> list:
+    """Выражения для SELECT по параметру fields. ValueError – неизвестное поле."""
+    if fields is None or not fields.strip():
+        return [column for name, column in columns.items() if name not in DEFERRED_FIELDS]
+    if fields.strip() == "*":
+        return list(columns.values())
+
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = requested - columns.keys()
+    if unknown:
+        raise ValueError(f"Неизвестные поля: {', '.join(sorted(unknown))}")
+    requested.add("id")
+    requested.update(key.column.key for key in keys)
+    # Порядок – как в схеме, чтобы ответы с разным порядком fields совпадали
+    return [column for name, column in columns.items() if name in requested]
@@ -1,109 +1,298 @@
 """
-In-memory rate limiter для защиты эндпоинта /auth/login.
+Rate limiter для защиты эндпоинта /auth/login.
 
-Ограничения текущего подхода (задокументированы намеренно):
-- Состояние не разделяется между несколькими воркерами Uvicorn.
-  Для production с несколькими воркерами нужен Redis (например, slowapi + redis).
-- При перезапуске процесса счётчики сбрасываются.
+Хранилище счётчиков подключаемое (RATE_LIMIT_BACKEND):
+- memory   – в памяти процесса (по умолчанию). Состояние не разделяется
+             между воркерами Uvicorn и сбрасывается при перезапуске.
+- mmap     – файл, отображённый в память, общий для всех воркеров одного хоста.
+- postgres – таблица login_rate_limits, общая для нескольких хостов.
 
-Для одного воркера (дев/staging) – полностью корректен.
+Режимы (RATE_LIMIT_MODE):
+- fixed        – N неудачных попыток, затем блок на W секунд.
+- token_bucket – «дырявое ведро»: каждая неудача добавляет 1, уровень утекает
+                 со скоростью N/W в секунду; вход разрешён, пока уровень + 1 <= N.
+                 Блок снимается постепенно, без ступеньки в W секунд.
+
+Реализации mmap/postgres – в app.core.rate_limit_backends.
 """
 
+import asyncio
+import heapq
 import threading
 import time
-from dataclasses import dataclass, field
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
 from typing import Optional
 
+from app.core.config import settings
+
 
 @dataclass
-class _Record:
+class RateLimitState:
     attempts: int = 0
     blocked_until: Optional[float] = None
-    last_attempt: float = field(default_factory=time.monotonic)
+    # Уровень «ведра» для режима token_bucket
+    level: float = 0.0
+    last_attempt: float = 0.0
+
+
+class RateLimitStorage(ABC):
+    """
+    Хранилище счётчиков неудачных попыток.
+    increment() и leak() обязаны быть атомарными относительно всех клиентов хранилища.
+    """
+
+    # True – операции ходят в сеть/БД и должны выполняться вне event loop
+    blocking: bool = False
+
+    def now(self) -> float:
+        """Часы хранилища. Для разделяемых хранилищ – wall clock."""
+        return time.time()
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[RateLimitState]:
+        """Вернёт состояние или None, если записи нет."""
+
+    @abstractmethod
+    def increment(self, key: str, now: float, max_attempts: int, window: float) -> RateLimitState:
+        """
+        Режим fixed. Атомарно увеличивает счётчик: если блок истёк – начинает
+        отсчёт заново, при attempts >= max_attempts выставляет blocked_until = now + window.
+        """
+
+    @abstractmethod
+    def leak(self, key: str, now: float, leak_rate: float) -> RateLimitState:
+        """
+        Режим token_bucket. Атомарно: level = max(0, level - (now - last_attempt) * leak_rate) + 1.
+        """
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Удаляет запись."""
+
+
+def _leaked_level(state: RateLimitState, now: float, leak_rate: float) -> float:
+    return max(0.0, state.level - (now - state.last_attempt) * leak_rate)
+
+
+class _Shard:
+    __slots__ = ("lock", "records", "expiry")
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        # Порядок OrderedDict = порядок LRU (последний – самый свежий)
+        self.records: OrderedDict[str, RateLimitState] = OrderedDict()
+        # Min-heap (expires_at, key). Записи не удаляются из кучи при обновлении –
+        # устаревшие элементы отбрасываются при извлечении (lazy deletion).
+        self.expiry: list[tuple[float, str]] = []
+
+
+class MemoryStorage(RateLimitStorage):
+    """
+    Хранилище в памяти процесса.
+
+    - Ключи распределены по шардам, у каждого свой Lock: всплеск запросов
+      с разных IP не выстраивается в очередь за одной блокировкой.
+    - Истечение записей – через min-heap по времени истечения: каждая операция
+      извлекает не более _EXPIRE_BATCH истёкших элементов, полного обхода нет.
+    - Жёсткий лимит max_keys с LRU-вытеснением: память ограничена независимо
+      от числа IP-адресов источников.
+    """
+
+    _EXPIRE_BATCH = 64
+
+    def __init__(self, window_seconds: float = 900.0, max_keys: int = 100_000, shards: int = 16) -> None:
+        self._ttl = window_seconds * 2
+        self._shards = [_Shard() for _ in range(shards)]
+        self._shard_capacity = max(1, max_keys // shards)
+
+    def now(self) -> float:
+        return time.monotonic()
+
+    def __len__(self) -> int:
+        return sum(len(shard.records) for shard in self._shards)
+
+    def get(self, key: str) -> Optional[RateLimitState]:
+        shard = self._shard(key)
+        now = self.now()
+        with shard.lock:
+            self._expire(shard, now)
+            state = shard.records.get(key)
+            if state is None or self._expires_at(state) <= now:
+                return None
+            return RateLimitState(state.attempts, state.blocked_until, state.level, state.last_attempt)
+
+    def increment(self, key: str, now: float, max_attempts: int, window: float) -> RateLimitState:
+        shard = self._shard(key)
+        with shard.lock:
+            self._expire(shard, now)
+            state = self._touch(shard, key, now)
+
+            # Сбрасываем старый блок, если истёк
+            if state.blocked_until and now >= state.blocked_until:
+                state.attempts = 0
+                state.blocked_until = None
+
+            state.attempts += 1
+            state.last_attempt = now
+
+            if state.attempts >= max_attempts:
+                state.blocked_until = now + window
+            self._schedule(shard, key, state)
+            return RateLimitState(state.attempts, state.blocked_until, state.level, state.last_attempt)
+
+    def leak(self, key: str, now: float, leak_rate: float) -> RateLimitState:
+        shard = self._shard(key)
+        with shard.lock:
+            self._expire(shard, now)
+            state = self._touch(shard, key, now)
+            state.level = _leaked_level(state, now, leak_rate) + 1
+            state.attempts += 1
+            state.last_attempt = now
+            self._schedule(shard, key, state)
+            return RateLimitState(state.attempts, state.blocked_until, state.level, state.last_attempt)
+
+    def delete(self, key: str) -> None:
+        shard = self._shard(key)
+        with shard.lock:
+            shard.records.pop(key, None)
+
+    # ── Internal ──────────────────────────────────────────────────────────────
+
+    def _shard(self, key: str) -> _Shard:
+        return self._shards[hash(key) % len(self._shards)]
+
+    def _expires_at(self, state: RateLimitState) -> float:
+        return state.last_attempt + self._ttl
+
+    def _touch(self, shard: _Shard, key: str, now: float) -> RateLimitState:
+        state = shard.records.get(key)
+        if state is None or self._expires_at(state) <= now:
+            state = RateLimitState(last_attempt=now)
+            shard.records[key] = state
+            shard.records.move_to_end(key)
+            while len(shard.records) > self._shard_capacity:
+                shard.records.popitem(last=False)
+        else:
+            shard.records.move_to_end(key)
+        return state
+
+    def _schedule(self, shard: _Shard, key: str, state: RateLimitState) -> None:
+        heapq.heappush(shard.expiry, (self._expires_at(state), key))
+        # Устаревшие элементы кучи копятся при частых обновлениях одного ключа –
+        # периодически пересобираем кучу по живым записям.
+        if len(shard.expiry) > 2 * len(shard.records) + 1024:
+            shard.expiry = [(self._expires_at(s), k) for k, s in shard.records.items()]
+            heapq.heapify(shard.expiry)
+
+    def _expire(self, shard: _Shard, now: float) -> None:
+        expiry = shard.expiry
+        for _ in range(self._EXPIRE_BATCH):
+            if not expiry or expiry[0][0] > now:
+                return
+            expires_at, key = heapq.heappop(expiry)
+            state = shard.records.get(key)
+            if state is not None and self._expires_at(state) == expires_at:
+                del shard.records[key]
 
 
 class RateLimiter:
     """
-    Блокирует IP после N неудачных попыток на W секунд.
-    Thread-safe: использует RLock.
-    TTL-очистка устаревших записей происходит автоматически при каждом вызове.
+    Блокирует IP после N неудачных попыток (fixed – на W секунд,
+    token_bucket – до утечки уровня ниже порога).
+    Состояние хранится в RateLimitStorage (по умолчанию – MemoryStorage).
     """
 
     def __init__(
         self,
         max_attempts: int = 5,
         window_seconds: float = 900.0,   # 15 минут
-        cleanup_interval: float = 300.0, # очистка каждые 5 минут
+        storage: Optional[RateLimitStorage] = None,
+        mode: str = "fixed",
     ) -> None:
+        if mode not in ("fixed", "token_bucket"):
+            raise ValueError(f"Неизвестный режим rate limiter: {mode}")
         self._max_attempts = max_attempts
         self._window = window_seconds
-        self._cleanup_interval = cleanup_interval
-        self._records: dict[str, _Record] = {}
-        self._lock = threading.RLock()
-        self._last_cleanup = time.monotonic()
+        self._leak_rate = max_attempts / window_seconds
+        self._mode = mode
+        self._storage = storage if storage is not None else MemoryStorage(window_seconds)
+
+    @property
+    def storage(self) -> RateLimitStorage:
+        return self._storage
 
     # ── Public API ────────────────────────────────────────────────────────────
 
     def is_allowed(self, ip: str) -> bool:
         """Вернёт False если IP заблокирован."""
-        with self._lock:
-            self._maybe_cleanup()
-            record = self._records.get(ip)
-            if record is None:
-                return True
-            if record.blocked_until and time.monotonic() < record.blocked_until:
-                return False
-            return True
+        return self.remaining_seconds(ip) <= 0
 
     def record_attempt(self, ip: str) -> None:
         """Фиксирует неудачную попытку. При превышении лимита блокирует IP."""
-        with self._lock:
-            now = time.monotonic()
-            record = self._records.setdefault(ip, _Record())
-
-            # Сбрасываем старый блок, если истёк
-            if record.blocked_until and now >= record.blocked_until:
-                record.attempts = 0
-                record.blocked_until = None
-
-            record.attempts += 1
-            record.last_attempt = now
-
-            if record.attempts >= self._max_attempts:
-                record.blocked_until = now + self._window
+        now = self._storage.now()
+        if self._mode == "token_bucket":
+            self._storage.leak(ip, now, self._leak_rate)
+        else:
+            self._storage.increment(ip, now, self._max_attempts, self._window)
 
     def reset(self, ip: str) -> None:
         """Сбрасывает счётчик для IP (вызывается при успешной аутентификации)."""
-        with self._lock:
-            self._records.pop(ip, None)
+        self._storage.delete(ip)
 
     def remaining_seconds(self, ip: str) -> float:
         """Возвращает секунды до снятия блока (0 если не заблокирован)."""
-        with self._lock:
-            record = self._records.get(ip)
-            if record and record.blocked_until:
-                remaining = record.blocked_until - time.monotonic()
-                return max(0.0, remaining)
+        state = self._storage.get(ip)
+        if state is None:
             return 0.0
+        now = self._storage.now()
+        if self._mode == "token_bucket":
+            excess = _leaked_level(state, now, self._leak_rate) + 1 - self._max_attempts
+            return max(0.0, excess / self._leak_rate)
+        if state.blocked_until:
+            return max(0.0, state.blocked_until - now)
+        return 0.0
+
+    # ── Async API (не блокирует event loop для сетевых хранилищ) ─────────────
+
+    async def is_allowed_async(self, ip: str) -> bool:
+        return await self._call(self.is_allowed, ip)
+
+    async def record_attempt_async(self, ip: str) -> None:
+        await self._call(self.record_attempt, ip)
+
+    async def reset_async(self, ip: str) -> None:
+        await self._call(self.reset, ip)
+
+    async def remaining_seconds_async(self, ip: str) -> float:
+        return await self._call(self.remaining_seconds, ip)
+
+    async def _call(self, func, *args):
+        if not self._storage.blocking:
+            return func(*args)
+        return await asyncio.to_thread(func, *args)
 
-    # ── Internal ──────────────────────────────────────────────────────────────
 
-    def _maybe_cleanup(self) -> None:
-        """Удаляет записи, которые давно не обновлялись (TTL = window * 2)."""
-        now = time.monotonic()
-        if now - self._last_cleanup < self._cleanup_interval:
-            return
+def create_storage(backend: str, window_seconds: float) -> RateLimitStorage:
+    """Создаёт хранилище по имени из настроек RATE_LIMIT_BACKEND."""
+    if backend == "memory":
+        return MemoryStorage(window_seconds, max_keys=settings.RATE_LIMIT_MAX_KEYS)
+    if backend == "mmap":
+        from app.core.rate_limit_backends import MmapStorage
 
-        ttl = self._window * 2
-        stale_keys = [
-            ip for ip, rec in self._records.items()
-            if now - rec.last_attempt > ttl
-        ]
-        for ip in stale_keys:
-            del self._records[ip]
+        return MmapStorage(settings.RATE_LIMIT_MMAP_PATH, slots=settings.RATE_LIMIT_MMAP_SLOTS, ttl=window_seconds * 2)
+    if backend == "postgres":
+        from app.core.rate_limit_backends import PostgresStorage
 
-        self._last_cleanup = now
+        return PostgresStorage(ttl=window_seconds * 2)
+    raise ValueError(f"Неизвестный RATE_LIMIT_BACKEND: {backend}")
 
 
 # Синглтон для импорта в роутерах
-rate_limiter = RateLimiter(max_attempts=5, window_seconds=900)
\ No newline at end of file
+rate_limiter = RateLimiter(
+    max_attempts=5,
+    window_seconds=900,
+    storage=create_storage(settings.RATE_LIMIT_BACKEND, 900),
+    mode=settings.RATE_LIMIT_MODE,
+)
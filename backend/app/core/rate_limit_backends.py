@@ -0,0 +1,253 @@
+"""
+Разделяемые хранилища для RateLimiter.
+
+MmapStorage    – хэш-таблица фиксированного размера в файле, отображённом
+                 в память. Общая для всех воркеров одного хоста; атомарность
+                 обеспечивается flock (между процессами) + Lock (между потоками).
+PostgresStorage – таблица login_rate_limits. Атомарное увеличение одним
+                 INSERT ... ON CONFLICT DO UPDATE, подходит для нескольких хостов.
+
+Оба хранилища используют wall clock (time.time()), т.к. monotonic-часы
+не сравнимы между процессами.
+"""
+
+import fcntl
+import hashlib
+import mmap
+import os
+import struct
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+from sqlalchemy import text
+
+from app.core.rate_limit import RateLimitState, RateLimitStorage, _leaked_level
+
+# ── mmap ─────────────────────────────────────────────────────────────────────
+
+_MAGIC = b"ZGTRL002"
+_HEADER = struct.Struct("<8sI4x")
+# digest ключа, attempts, blocked_until (0 – нет блока), level, last_attempt
+_SLOT = struct.Struct("<16sdddd")
+_EMPTY_DIGEST = bytes(16)
+_MAX_PROBES = 16
+
+
+class MmapStorage(RateLimitStorage):
+    """
+    Открытая адресация с линейным пробированием на _MAX_PROBES слотов.
+    Если все слоты окна заняты живыми записями, вытесняется самая старая.
+    """
+
+    def __init__(self, path: str, slots: int = 4096, ttl: float = 1800.0) -> None:
+        self._slots = slots
+        self._ttl = ttl
+        self._thread_lock = threading.Lock()
+        size = _HEADER.size + _SLOT.size * slots
+
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            if os.fstat(self._fd).st_size != size:
+                os.ftruncate(self._fd, 0)
+                os.ftruncate(self._fd, size)
+                os.pwrite(self._fd, _HEADER.pack(_MAGIC, slots), 0)
+            magic, stored_slots = _HEADER.unpack(os.pread(self._fd, _HEADER.size, 0))
+            if magic != _MAGIC or stored_slots != slots:
+                raise ValueError(f"Файл {path} не является хранилищем rate limiter на {slots} слотов")
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        self._map = mmap.mmap(self._fd, size)
+
+    def get(self, key: str) -> Optional[RateLimitState]:
+        digest = self._digest(key)
+        with self._locked(fcntl.LOCK_SH):
+            index = self._find(digest)
+            if index is None:
+                return None
+            return self._state(index)
+
+    def increment(self, key: str, now: float, max_attempts: int, window: float) -> RateLimitState:
+        digest = self._digest(key)
+        with self._locked(fcntl.LOCK_EX):
+            index, state = self._load(digest, now)
+
+            # Сбрасываем старый блок, если истёк
+            if state.blocked_until and now >= state.blocked_until:
+                state.attempts, state.blocked_until = 0, None
+
+            state.attempts += 1
+            state.last_attempt = now
+            if state.attempts >= max_attempts:
+                state.blocked_until = now + window
+            self._store(index, digest, state)
+            return state
+
+    def leak(self, key: str, now: float, leak_rate: float) -> RateLimitState:
+        digest = self._digest(key)
+        with self._locked(fcntl.LOCK_EX):
+            index, state = self._load(digest, now)
+            state.level = _leaked_level(state, now, leak_rate) + 1
+            state.attempts += 1
+            state.last_attempt = now
+            self._store(index, digest, state)
+            return state
+
+    def delete(self, key: str) -> None:
+        digest = self._digest(key)
+        with self._locked(fcntl.LOCK_EX):
+            index = self._find(digest)
+            if index is not None:
+                # digest остаётся в слоте, чтобы не рвать цепочки пробирования;
+                # last_attempt = 0 делает слот свободным для повторного использования
+                self._store(index, digest, RateLimitState())
+
+    # ── Internal ──────────────────────────────────────────────────────────────
+
+    @contextmanager
+    def _locked(self, mode: int):
+        with self._thread_lock:
+            fcntl.flock(self._fd, mode)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _digest(key: str) -> bytes:
+        return hashlib.blake2b(key.encode(), digest_size=16).digest()
+
+    def _probe(self, digest: bytes):
+        start = int.from_bytes(digest[:8], "little") % self._slots
+        for step in range(min(_MAX_PROBES, self._slots)):
+            yield (start + step) % self._slots
+
+    def _offset(self, index: int) -> int:
+        return _HEADER.size + index * _SLOT.size
+
+    def _read(self, index: int) -> tuple[bytes, float, float, float, float]:
+        return _SLOT.unpack_from(self._map, self._offset(index))
+
+    def _state(self, index: int) -> RateLimitState:
+        _, attempts, blocked_until, level, last_attempt = self._read(index)
+        return RateLimitState(int(attempts), blocked_until or None, level, last_attempt)
+
+    def _load(self, digest: bytes, now: float) -> tuple[int, RateLimitState]:
+        index = self._find(digest)
+        if index is None:
+            return self._free_slot(digest, now), RateLimitState(last_attempt=now)
+        return index, self._state(index)
+
+    def _store(self, index: int, digest: bytes, state: RateLimitState) -> None:
+        _SLOT.pack_into(
+            self._map, self._offset(index),
+            digest, float(state.attempts), state.blocked_until or 0.0, state.level, state.last_attempt,
+        )
+
+    def _find(self, digest: bytes) -> Optional[int]:
+        for index in self._probe(digest):
+            slot_digest, _, _, _, last_attempt = self._read(index)
+            if slot_digest == digest and last_attempt:
+                return index
+        return None
+
+    def _free_slot(self, digest: bytes, now: float) -> int:
+        oldest_index, oldest_seen = None, None
+        for index in self._probe(digest):
+            slot_digest, _, blocked_until, _, last_attempt = self._read(index)
+            expired = now - last_attempt > self._ttl and (not blocked_until or blocked_until <= now)
+            if slot_digest == _EMPTY_DIGEST or not last_attempt or expired:
+                return index
+            if oldest_seen is None or last_attempt < oldest_seen:
+                oldest_index, oldest_seen = index, last_attempt
+        return oldest_index
+
+
+# ── PostgreSQL ───────────────────────────────────────────────────────────────
+
+_PG_COLUMNS = "attempts, blocked_until, level, last_attempt"
+
+_PG_GET = text(f"SELECT {_PG_COLUMNS} FROM login_rate_limits WHERE key = :key")
+
+_PG_INCREMENT = text(
+    """
+    INSERT INTO login_rate_limits AS r (key, attempts, blocked_until, level, last_attempt)
+    VALUES (:key, 1, CASE WHEN 1 >= :max_attempts THEN :now + :window END, 0, :now)
+    ON CONFLICT (key) DO UPDATE SET
+        attempts = CASE WHEN r.blocked_until <= :now THEN 1 ELSE r.attempts + 1 END,
+        blocked_until = CASE
+            WHEN (CASE WHEN r.blocked_until <= :now THEN 1 ELSE r.attempts + 1 END) >= :max_attempts
+                THEN :now + :window
+            WHEN r.blocked_until <= :now THEN NULL
+            ELSE r.blocked_until
+        END,
+        last_attempt = :now
+    RETURNING attempts, blocked_until, level, last_attempt
+    """
+)
+
+_PG_LEAK = text(
+    """
+    INSERT INTO login_rate_limits AS r (key, attempts, blocked_until, level, last_attempt)
+    VALUES (:key, 1, NULL, 1, :now)
+    ON CONFLICT (key) DO UPDATE SET
+        attempts = r.attempts + 1,
+        level = greatest(0, r.level - (:now - r.last_attempt) * :leak_rate) + 1,
+        last_attempt = :now
+    RETURNING attempts, blocked_until, level, last_attempt
+    """
+)
+
+_PG_DELETE = text("DELETE FROM login_rate_limits WHERE key = :key")
+
+_PG_CLEANUP = text(
+    "DELETE FROM login_rate_limits "
+    "WHERE last_attempt < :threshold AND (blocked_until IS NULL OR blocked_until < :now)"
+)
+
+
+class PostgresStorage(RateLimitStorage):
+    """
+    Синхронный движок (psycopg2) – вызовы выполняются вне event loop,
+    см. RateLimiter.*_async.
+    """
+
+    blocking = True
+
+    def __init__(self, ttl: float = 1800.0, cleanup_interval: float = 300.0, engine=None) -> None:
+        if engine is None:
+            from app.core.database_sync import engine
+        self._engine = engine
+        self._ttl = ttl
+        self._cleanup_interval = cleanup_interval
+        self._last_cleanup = time.monotonic()
+
+    def get(self, key: str) -> Optional[RateLimitState]:
+        with self._engine.connect() as conn:
+            row = conn.execute(_PG_GET, {"key": key}).first()
+        return RateLimitState(*row) if row else None
+
+    def increment(self, key: str, now: float, max_attempts: int, window: float) -> RateLimitState:
+        params = {"key": key, "now": now, "max_attempts": max_attempts, "window": window}
+        return self._upsert(_PG_INCREMENT, params, now)
+
+    def leak(self, key: str, now: float, leak_rate: float) -> RateLimitState:
+        return self._upsert(_PG_LEAK, {"key": key, "now": now, "leak_rate": leak_rate}, now)
+
+    def delete(self, key: str) -> None:
+        with self._engine.begin() as conn:
+            conn.execute(_PG_DELETE, {"key": key})
+
+    def _upsert(self, statement, params: dict, now: float) -> RateLimitState:
+        with self._engine.begin() as conn:
+            row = conn.execute(statement, params).one()
+            self._maybe_cleanup(conn, now)
+        return RateLimitState(*row)
+
+    def _maybe_cleanup(self, conn, now: float) -> None:
+        if time.monotonic() - self._last_cleanup < self._cleanup_interval:
+            return
+        conn.execute(_PG_CLEANUP, {"threshold": now - self._ttl, "now": now})
+        self._last_cleanup = time.monotonic()
@@ -0,0 +1,94 @@
+"""
+Поиск подстроки по триграммным индексам (pg_trgm).
+
+Для каждой таблицы строится один «поисковый документ» – текстовые колонки,
+склеенные через пробел:
+
+    coalesce(a, '') || ' ' || coalesce(b, '') || ...
+
+По этому же выражению построен GIN-индекс gin_trgm_ops (миграция
+add_trigram_search_indexes). Условие `документ ILIKE '%term%'` планировщик
+выполняет через индекс, только если выражение в запросе совпадает
+с индексным, поэтому оно строится здесь и только здесь: литералы
+подставляются как literal_column, а не bind-параметры.
+
+Порядок колонок в документах менять только вместе с миграцией индексов.
+"""
+
+from sqlalchemy import ColumnElement, func, literal_column
+
+from app.models.equipment import Equipment, StorageDevice
+from app.models.personnel import Personnel
+from app.models.phone import Phone
+from app.models.storage_and_passes import StorageAndPass
+from app.models.user import User
+
+_SEPARATOR = literal_column("' '")
+_EMPTY = literal_column("''")
+
+
+def search_document(*columns) -> ColumnElement:
+    document = None
+    for column in columns:
+        part = func.coalesce(column, _EMPTY)
+        document = part if document is None else document.op("||")(_SEPARATOR).op("||")(part)
+    return document
+
+
+def like_pattern(term: str) -> str:
+    """'%term%' с экранированием спецсимволов LIKE – '%' и '_' ищутся буквально."""
+    escaped = term.strip().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def matches(document: ColumnElement, term: str) -> ColumnElement:
+    return document.ilike(like_pattern(term))
+
+
+EQUIPMENT_DOCUMENT = search_document(
+    Equipment.inventory_number,
+    Equipment.serial_number,
+    Equipment.mni_serial_number,
+    Equipment.manufacturer,
+    Equipment.model,
+    Equipment.equipment_type,
+    Equipment.current_location,
+    Equipment.notes,
+)
+
+STORAGE_DEVICE_DOCUMENT = search_document(
+    StorageDevice.inventory_number,
+    StorageDevice.serial_number,
+    StorageDevice.manufacturer,
+    StorageDevice.model,
+    StorageDevice.device_type,
+    StorageDevice.location,
+    StorageDevice.notes,
+)
+
+PHONE_DOCUMENT = search_document(
+    Phone.model,
+    Phone.color,
+    Phone.imei_1,
+    Phone.imei_2,
+    Phone.serial_number,
+    Phone.storage_location,
+)
+
+PERSONNEL_DOCUMENT = search_document(
+    Personnel.full_name,
+    Personnel.rank,
+    Personnel.position,
+    Personnel.platoon,
+    Personnel.personal_number,
+    Personnel.service_number,
+)
+
+STORAGE_AND_PASS_DOCUMENT = search_document(
+    StorageAndPass.serial_number,
+    StorageAndPass.model,
+    StorageAndPass.manufacturer,
+    StorageAndPass.notes,
+)
+
+USER_DOCUMENT = search_document(User.username, User.full_name)
@@ -0,0 +1,112 @@
+"""
+In-process кэш ответов статистики (/equipment/stats, /storage-and-passes/stats).
+
+UI запрашивает статистику при каждой смене фильтра и обновлении страницы,
+причём с одними и теми же несколькими комбинациями параметров. Ключ кэша –
+(эндпоинт, нормализованные фильтры, версия записи сущности).
+
+Версия записи – счётчик на сущность ("equipment", "storage_and_pass"),
+который сервисы увеличивают после commit каждой изменяющей операции
+(bump). Старые записи после этого больше не находятся и вытесняются LRU.
+Версия берётся до вычисления статистики, поэтому результат, посчитанный
+параллельно с записью, сохраняется под старой версией и не переживает её.
+
+Состояние не разделяется между воркерами Uvicorn и с CLI-импортом:
+такие изменения станут видны не позже чем через TTL.
+"""
+
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass
+from typing import Any, Hashable, Optional
+
+from app.core.config import settings
+
+
+@dataclass
+class _Entry:
+    value: Any
+    expires_at: float
+
+
+def _normalize(value: Any) -> Any:
+    # Поиск регистронезависимый (ILIKE) – «Dell » и «dell» дают один ответ
+    return value.strip().lower() if isinstance(value, str) else value
+
+
+class StatsCache:
+    """LRU + TTL кэш статистики с версиями записи. Thread-safe: использует Lock."""
+
+    def __init__(self, max_size: int = 256, ttl_seconds: float = 10.0) -> None:
+        self._max_size = max_size
+        self._ttl = ttl_seconds
+        self._entries: OrderedDict[Hashable, _Entry] = OrderedDict()
+        self._versions: defaultdict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    # ── Public API ────────────────────────────────────────────────────────────
+
+    def key(self, entity: str, endpoint: str, **filters: Any) -> Hashable:
+        """Ключ с текущей версией сущности; пустые фильтры (None, '') отбрасываются."""
+        normalized = tuple(sorted(
+            (name, _normalize(value)) for name, value in filters.items() if value not in (None, "")
+        ))
+        with self._lock:
+            return endpoint, normalized, entity, self._versions[entity]
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Закэшированный ответ или None. Ответ общий для запросов – не изменять."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.expires_at <= time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry.value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        if self._max_size <= 0 or self._ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = _Entry(value=value, expires_at=time.monotonic() + self._ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def bump(self, *entities: str) -> None:
+        """Вызывается после commit изменяющей операции."""
+        with self._lock:
+            for entity in entities:
+                self._versions[entity] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict[str, object]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "size": len(self._entries),
+                "max_size": self._max_size,
+                "ttl_seconds": self._ttl,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "versions": dict(self._versions),
+            }
+
+
+stats_cache = StatsCache(
+    max_size=settings.STATS_CACHE_MAX_SIZE,
+    ttl_seconds=settings.STATS_CACHE_TTL_SECONDS,
+)
@@ -1,14 +1,51 @@
 import csv
-import re
+import time
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Optional
 
+from sqlalchemy import literal_column, or_, select, text
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
-from app.models.equipment import Equipment
-from app.models.personnel import Personnel
+
+from app.core.database import utcnow_expr
+from app.importers.personnel_names import PersonnelNames
+from app.models.equipment import LAPTOP_SERIAL_WHERE, Equipment
 
 DEFAULT_IMPORT_FILE = Path(__file__).resolve().parents[2] / "data" / "laptops_ns685u_r11.tsv"
 
+# Строк в одном INSERT ... ON CONFLICT
+CHUNK_SIZE = 500
+
+# Поля, которые импорт перезаписывает у существующего ноутбука
+UPDATED_FIELDS = (
+    "model", "status", "current_location", "current_owner_id",
+    "laptop_functional", "has_charger", "has_mouse", "notes",
+)
+# Поля только для новых записей
+NEW_LAPTOP = {"equipment_type": "Ноутбук", "manufacturer": "Aquarius", "has_laptop": True, "is_active": True}
+
+
+@dataclass
+class ImportResult:
+    # Ноутбуков после схлопывания повторов S/N: rows = inserted + updated + unchanged
+    rows: int = 0
+    # Строк файла с уже встречавшимся S/N (учтена последняя)
+    duplicates: int = 0
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    # ФИО ответственных, которых нет в личном составе
+    unmatched_owners: set[str] = field(default_factory=set)
+    # Только при dry_run: «+ S/N» – новый, «~ S/N: поле: было → станет» – изменённый
+    changes: list[str] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+
 def _normalize_text(value: Optional[str]) -> Optional[str]:
     if value is None:
         return None
@@ -16,101 +53,125 @@ def _normalize_text(value: Optional[str]) -> Optional[str]:
     value = value.replace("\xa0", " ").strip()
     return value or None
 
-def _get_short_name(full_name: str) -> str:
-    """Преобразует 'Иванов Иван Иванович' в 'Иванов И.И.'"""
-    parts = full_name.split()
-    if len(parts) >= 3:
-        return f"{parts[0]} {parts[1][0]}.{parts[2][0]}."
-    elif len(parts) == 2:
-        return f"{parts[0]} {parts[1][0]}."
-    return full_name
-
-def _find_person(db: Session, name_from_file: str) -> Optional[Personnel]:
-    """Умный поиск персонала в базе данных"""
-    if not name_from_file:
-        return None
-    
-    name_from_file = _normalize_text(name_from_file)
-    
-    # 1. Пробуем найти по точному совпадению (с учетом очистки пробелов)
-    person = db.query(Personnel).filter(Personnel.full_name.ilike(name_from_file)).first()
-    if person:
-        return person
-
-    # 2. Если в файле 'Дудин А.А.', а в базе 'Дудин Антон Александрович'
-    # Ищем всех людей с такой же фамилией
-    surname = name_from_file.split()[0]
-    candidates = db.query(Personnel).filter(Personnel.full_name.ilike(f"{surname}%")).all()
-    
-    for candidate in candidates:
-        # Сравниваем 'Дудин А.А.' из файла и сокращенный вариант из базы
-        if _get_short_name(candidate.full_name) == name_from_file:
-            return candidate
-            
-    return None
 
 def _parse_bool_from_kit(kit: Optional[str], keyword: str) -> bool:
     if not kit:
         return False
     return keyword.lower() in kit.lower()
 
-def import_laptops_to_equipment(db: Session, tsv_path: Path) -> tuple[int, int]:
-    if not tsv_path.exists():
-        raise FileNotFoundError(f"Файл не найден: {tsv_path}")
 
-    inserted, updated = 0, 0
+def _laptop_values(row: dict, people: PersonnelNames, result: ImportResult) -> Optional[dict]:
+    serial_number = _normalize_text(row.get("S/N"))
+    if not serial_number:
+        return None
 
+    owner_name = _normalize_text(row.get("ФИО Ответственного"))
+    status = _normalize_text(row.get("СТАТУС"))
+    condition = _normalize_text(row.get("Состояние"))
+    kit = _normalize_text(row.get("Комплектация"))
+    comment = _normalize_text(row.get("Примечание"))
+
+    owner_id = people.find(owner_name)
+    if owner_name and owner_id is None:
+        result.unmatched_owners.add(owner_name)
+
+    notes_parts = [part for part in [condition, kit, comment] if part]
+    return {
+        "serial_number": serial_number,
+        "model": _normalize_text(row.get("Модель")),
+        "status": "На складе" if status == "На складе" else "В работе",
+        "current_location": "Склад" if status == "На складе" else "Выдан",
+        "current_owner_id": owner_id,
+        "laptop_functional": not (condition and "Не включается" in condition),
+        "has_charger": _parse_bool_from_kit(kit, "Заряд"),
+        "has_mouse": _parse_bool_from_kit(kit, "Мыш"),
+        "notes": " | ".join(notes_parts) if notes_parts else None,
+    }
+
+
+def _read_laptops(tsv_path: Path, people: PersonnelNames, result: ImportResult) -> list[dict]:
+    laptops: dict[str, dict] = {}
     with tsv_path.open("r", encoding="utf-8", newline="") as file:
-        reader = csv.DictReader(file, delimiter="\t")
-        for row in reader:
-            serial_number = _normalize_text(row.get("S/N"))
-            if not serial_number:
+        for row in csv.DictReader(file, delimiter="\t"):
+            values = _laptop_values(row, people, result)
+            if values is None:
                 continue
+            # Повтор S/N в файле – побеждает последняя строка
+            if values["serial_number"] in laptops:
+                result.duplicates += 1
+            laptops[values["serial_number"]] = values
+    result.rows = len(laptops)
+    return list(laptops.values())
+
+
+def _upsert(db: Session, chunk: list[dict]) -> tuple[int, int]:
+    """Один INSERT ... ON CONFLICT на пачку. Возвращает (добавлено, обновлено)."""
+    stmt = insert(Equipment).values([{**NEW_LAPTOP, **values} for values in chunk])
+    excluded = stmt.excluded
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Equipment.serial_number],
+        index_where=text(LAPTOP_SERIAL_WHERE),
+        set_={**{name: excluded[name] for name in UPDATED_FIELDS}, "updated_at": utcnow_expr()},
+        # Совпадающие строки не переписываются: нет лишних версий строк и сдвига updated_at
+        where=or_(*(getattr(Equipment, name).is_distinct_from(excluded[name]) for name in UPDATED_FIELDS)),
+    ).returning(literal_column("xmax = 0"))
+    # xmax = 0 – строка вставлена, иначе обновлена; пропущенные ON CONFLICT не возвращаются
+    flags = db.scalars(stmt).all()
+    inserted = sum(flags)
+    return inserted, len(flags) - inserted
+
+
+def _diff(db: Session, chunk: list[dict], result: ImportResult) -> None:
+    """dry_run: сравнение пачки с базой без записи."""
+    stmt = select(Equipment.serial_number, *(getattr(Equipment, name) for name in UPDATED_FIELDS)).where(
+        text(LAPTOP_SERIAL_WHERE),
+        Equipment.serial_number.in_([values["serial_number"] for values in chunk]),
+    )
+    existing = {row.serial_number: row._mapping for row in db.execute(stmt)}
+    for values in chunk:
+        serial_number = values["serial_number"]
+        current = existing.get(serial_number)
+        if current is None:
+            result.inserted += 1
+            result.changes.append(f"+ {serial_number}")
+            continue
+        differences = [
+            f"{name}: {current[name]!r} → {values[name]!r}"
+            for name in UPDATED_FIELDS
+            if current[name] != values[name]
+        ]
+        if differences:
+            result.updated += 1
+            result.changes.append(f"~ {serial_number}: " + "; ".join(differences))
+        else:
+            result.unchanged += 1
+
+
+def import_laptops_to_equipment(
+    db: Session, tsv_path: Path, dry_run: bool = False, chunk_size: int = CHUNK_SIZE,
+) -> ImportResult:
+    """
+    Импорт ноутбуков из TSV: личный состав загружается один раз, ноутбуки
+    пишутся пачками через INSERT ... ON CONFLICT (serial_number).
+    Commit – за вызывающим кодом; при dry_run в базу ничего не пишется.
+    """
+    if not tsv_path.exists():
+        raise FileNotFoundError(f"Файл не найден: {tsv_path}")
 
-            # Получаем данные из строки
-            owner_name = _normalize_text(row.get("ФИО Ответственного"))
-            model = _normalize_text(row.get("Модель"))
-            status = _normalize_text(row.get("СТАТУС"))
-            condition = _normalize_text(row.get("Состояние"))
-            kit = _normalize_text(row.get("Комплектация"))
-            comment = _normalize_text(row.get("Примечание"))
-
-            # 1. Пытаемся найти владельца в существующей базе
-            owner = _find_person(db, owner_name)
-
-            # 2. Ищем или создаем оборудование
-            equipment = db.query(Equipment).filter(Equipment.serial_number == serial_number).first()
-            
-            if equipment is None:
-                equipment = Equipment(
-                    serial_number=serial_number,
-                    equipment_type="Ноутбук",  # Обязательное поле
-                    manufacturer="Aquarius",
-                    has_laptop=True,
-                    is_active=True
-                )
-                db.add(equipment)
-                inserted += 1
-            else:
-                updated += 1
-
-            # 3. Обновляем поля оборудования
-            equipment.model = model
-            equipment.status = "На складе" if status == "На складе" else "В работе"
-            equipment.current_location = "Склад" if status == "На складе" else "Выдан"
-            
-            # Привязываем ID найденного человека
-            if owner:
-                equipment.current_owner_id = owner.id
-            else:
-                equipment.current_owner_id = None
-
-            # Технические детали
-            equipment.laptop_functional = not (condition and "Не включается" in condition)
-            equipment.has_charger = _parse_bool_from_kit(kit, "Заряд")
-            equipment.has_mouse = _parse_bool_from_kit(kit, "Мыш")
-            
-            notes_parts = [part for part in [condition, kit, comment] if part]
-            equipment.notes = " | ".join(notes_parts) if notes_parts else None
-
-    return inserted, updated
\ No newline at end of file
+    started = time.perf_counter()
+    result = ImportResult()
+    laptops = _read_laptops(tsv_path, PersonnelNames(db), result)
+
+    for start in range(0, len(laptops), chunk_size):
+        chunk = laptops[start:start + chunk_size]
+        if dry_run:
+            _diff(db, chunk, result)
+        else:
+            inserted, updated = _upsert(db, chunk)
+            result.inserted += inserted
+            result.updated += updated
+    if not dry_run:
+        result.unchanged = len(laptops) - result.inserted - result.updated
+
+    result.elapsed = time.perf_counter() - started
+    return result
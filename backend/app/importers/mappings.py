@@ -0,0 +1,210 @@
+"""
+Декларативные соответствия колонок файла полям сущностей для импорта
+(app.importers.pipeline).
+
+Заголовок колонки сравнивается с вариантами headers без учёта регистра,
+пробелов по краям и «ё»; колонки без соответствия пропускаются.
+Соответствие можно дополнить при вызове ({заголовок: поле}) – оно
+имеет приоритет над вариантами по умолчанию.
+
+parse применяется к непустой ячейке до валидации схемой и приводит
+текст к значению поля (ValueError – ошибка строки). Поле с reference=True
+содержит военнослужащего (личный номер, ФИО или «Иванов И.И.») и
+заменяется на его id.
+"""
+
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Optional
+
+from pydantic import BaseModel
+
+from app.models.personnel import Personnel, PersonnelStatus
+from app.models.phone import Phone
+from app.models.storage_and_passes import StorageAndPass
+from app.schemas.personnel import PersonnelCreate
+from app.schemas.phone import PhoneCreate
+from app.schemas.storage_and_passes import StorageAndPassCreate
+from app.services.personnel_service import RANK_PRIORITY
+
+_TRUE = {"да", "+", "1", "true", "yes", "есть"}
+_FALSE = {"нет", "-", "0", "false", "no"}
+
+
+def normalize_header(header: str) -> str:
+    return " ".join(header.split()).lower().replace("ё", "е")
+
+
+def parse_text(raw: str) -> str:
+    return raw
+
+
+def parse_bool(raw: str) -> bool:
+    value = raw.lower()
+    if value in _TRUE:
+        return True
+    if value in _FALSE:
+        return False
+    raise ValueError(f"Ожидается «да» или «нет», получено «{raw}»")
+
+
+def parse_int(raw: str) -> int:
+    try:
+        # Excel отдаёт целые как «8.0»
+        number = float(raw.replace(",", "."))
+    except ValueError:
+        raise ValueError(f"Ожидается целое число, получено «{raw}»") from None
+    if not number.is_integer():
+        raise ValueError(f"Ожидается целое число, получено «{raw}»")
+    return int(number)
+
+
+def parse_date(raw: str) -> datetime:
+    for parse in (datetime.fromisoformat, lambda value: datetime.strptime(value, "%d.%m.%Y")):
+        try:
+            return parse(raw)
+        except ValueError:
+            continue
+    raise ValueError(f"Ожидается дата ДД.ММ.ГГГГ, получено «{raw}»")
+
+
+def _choice(labels: dict[str, str]) -> Callable[[str], str]:
+    """Значение поля по подписи из интерфейса; само значение тоже принимается."""
+    lookup = {normalize_header(label): value for label, value in labels.items()}
+    lookup.update({value: value for value in labels.values()})
+
+    def parse(raw: str) -> str:
+        try:
+            return lookup[normalize_header(raw)]
+        except KeyError:
+            raise ValueError(f"Недопустимое значение «{raw}»") from None
+
+    return parse
+
+
+parse_personnel_status = _choice({status.value: status.value for status in PersonnelStatus})
+parse_asset_type = _choice({
+    "USB-флешка": "flash_drive",
+    "Флешка": "flash_drive",
+    "Электронный пропуск": "electronic_pass",
+    "Пропуск": "electronic_pass",
+})
+parse_asset_status = _choice({
+    "Используется": "in_use",
+    "Выдан": "in_use",
+    "На складе": "stock",
+    "Сломан": "broken",
+    "Утерян": "lost",
+})
+
+
+@dataclass(frozen=True)
+class Column:
+    field: str
+    headers: tuple[str, ...]
+    parse: Callable[[str], Any] = parse_text
+    reference: bool = False
+
+
+@dataclass(frozen=True)
+class EntityMapping:
+    entity: str
+    model: Any
+    schema: type[BaseModel]
+    # Поле ON CONFLICT (уникальный индекс); строка без него – ошибка
+    key: str
+    columns: tuple[Column, ...]
+    # Поля, вычисляемые prepare из других: {исходное поле: вычисляемое}
+    derived: dict[str, str] = field(default_factory=dict)
+    prepare: Optional[Callable[[dict], dict]] = None
+    # Сущность в stats_cache, которую нужно сбросить после импорта
+    stats_entity: Optional[str] = None
+
+    def column(self, name: str) -> Column:
+        for column in self.columns:
+            if column.field == name:
+                return column
+        raise ValueError(f"Неизвестное поле «{name}» для {self.entity}")
+
+    def resolve_headers(self, headers: list[str], overrides: Optional[dict[str, str]] = None) -> dict[int, str]:
+        """{номер колонки: поле}. ValueError – нет ключевой колонки или неизвестное поле в overrides."""
+        variants = {normalize_header(header): column.field for column in self.columns for header in column.headers}
+        variants.update({normalize_header(header): self.column(name).field for header, name in (overrides or {}).items()})
+
+        resolved: dict[int, str] = {}
+        for index, header in enumerate(headers):
+            name = variants.get(normalize_header(header or ""))
+            if name and name not in resolved.values():
+                resolved[index] = name
+        if self.key not in resolved.values():
+            headers_hint = ", ".join(f"«{header}»" for header in self.column(self.key).headers[:3])
+            raise ValueError(f"Нет колонки с ключевым полем {self.key} (например, {headers_hint})")
+        return resolved
+
+
+def _prepare_personnel(data: dict) -> dict:
+    # Как PersonnelService._calc_rank_priority
+    if data.get("rank_priority") is None:
+        data["rank_priority"] = RANK_PRIORITY.get((data.get("rank") or "").strip(), 999)
+    return data
+
+
+MAPPINGS: dict[str, EntityMapping] = {
+    "phones": EntityMapping(
+        entity="phones",
+        model=Phone,
+        schema=PhoneCreate,
+        key="imei_1",
+        columns=(
+            Column("owner_id", ("Владелец", "ФИО", "ФИО владельца", "Личный номер владельца", "owner"), reference=True),
+            Column("model", ("Модель", "model")),
+            Column("color", ("Цвет", "color")),
+            Column("imei_1", ("IMEI", "IMEI 1", "IMEI1", "imei_1")),
+            Column("imei_2", ("IMEI 2", "IMEI2", "imei_2")),
+            Column("serial_number", ("Серийный номер", "S/N", "serial_number")),
+            Column("has_camera", ("Камера", "has_camera"), parse_bool),
+            Column("has_recorder", ("Диктофон", "has_recorder"), parse_bool),
+            Column("storage_location", ("Ячейка", "Место хранения", "storage_location")),
+            Column("status", ("Статус", "status")),
+        ),
+    ),
+    "personnel": EntityMapping(
+        entity="personnel",
+        model=Personnel,
+        schema=PersonnelCreate,
+        key="personal_number",
+        columns=(
+            Column("full_name", ("ФИО", "full_name")),
+            Column("rank", ("Звание", "rank")),
+            Column("position", ("Должность", "position")),
+            Column("platoon", ("Взвод", "platoon")),
+            Column("personal_number", ("Личный номер", "personal_number")),
+            Column("service_number", ("Жетонный номер", "Номер жетона", "service_number")),
+            Column("security_clearance_level", ("Форма допуска", "Уровень допуска", "security_clearance_level"), parse_int),
+            Column("clearance_order_number", ("Номер приказа о допуске", "Приказ о допуске", "clearance_order_number")),
+            Column("clearance_expiry_date", ("Допуск до", "Срок допуска", "clearance_expiry_date"), parse_date),
+            Column("status", ("Статус", "status"), parse_personnel_status),
+        ),
+        derived={"rank": "rank_priority"},
+        prepare=_prepare_personnel,
+    ),
+    "storage-and-passes": EntityMapping(
+        entity="storage-and-passes",
+        model=StorageAndPass,
+        schema=StorageAndPassCreate,
+        key="serial_number",
+        columns=(
+            Column("asset_type", ("Тип", "asset_type"), parse_asset_type),
+            Column("serial_number", ("Серийный номер", "S/N", "serial_number")),
+            Column("model", ("Модель", "model")),
+            Column("manufacturer", ("Производитель", "manufacturer")),
+            Column("status", ("Статус", "status"), parse_asset_status),
+            Column("assigned_to_id", ("Кому выдан", "Ответственный", "assigned_to"), reference=True),
+            Column("capacity_gb", ("Объём, ГБ", "Объём", "capacity_gb"), parse_int),
+            Column("access_level", ("Уровень доступа", "access_level"), parse_int),
+            Column("notes", ("Примечание", "notes")),
+        ),
+        stats_entity="storage_and_pass",
+    ),
+}
@@ -0,0 +1,38 @@
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.personnel import Personnel
+from app.utils.names import get_short_name
+
+
+def _name_key(name: str) -> str:
+    return " ".join(name.split()).lower()
+
+
+class PersonnelNames:
+    """
+    ФИО, краткая форма («Дудин А.А.») и личный номер → id военнослужащего.
+    Загружается одним запросом вместо поиска на каждую строку файла;
+    обычные словари – передаётся в процессы-обработчики импорта.
+    При совпадении имён побеждает запись с меньшим id.
+    """
+
+    def __init__(self, db: Session):
+        self._full: dict[str, int] = {}
+        self._short: dict[str, int] = {}
+        self._numbers: dict[str, int] = {}
+        stmt = select(Personnel.id, Personnel.full_name, Personnel.personal_number).order_by(Personnel.id)
+        for person_id, full_name, personal_number in db.execute(stmt):
+            self._full.setdefault(_name_key(full_name), person_id)
+            self._short.setdefault(_name_key(get_short_name(full_name)), person_id)
+            if personal_number:
+                self._numbers.setdefault(_name_key(personal_number), person_id)
+
+    def find(self, value: Optional[str]) -> Optional[int]:
+        """Личный номер, точное ФИО, затем 'Дудин А.А.' против сокращённого ФИО из базы."""
+        if not value:
+            return None
+        key = _name_key(value)
+        return self._numbers.get(key) or self._full.get(key) or self._short.get(key)
@@ -0,0 +1,347 @@
+"""
+Импорт CSV / TSV / XLSX для телефонов, личного состава и флешек/пропусков.
+
+Поток:
+1. Файл читается построчно (csv.reader по TextIOWrapper, openpyxl в
+   read_only-режиме) – целиком в памяти не держится.
+2. Строки режутся на пачки по IMPORT_CHUNK_SIZE и разбираются
+   (соответствия колонок из app.importers.mappings, схема *Create, поиск
+   военнослужащего по индексу PersonnelNames) в текущем процессе. Пул
+   процессов (IMPORT_WORKERS > 0) подключается только к остатку файла
+   после первых IMPORT_PARALLEL_MIN_ROWS строк: запуск spawn-пула стоит
+   ~1,5–2 с, а пачки и результаты ещё сериализуются между процессами,
+   поэтому на обычных файлах (50 тыс. строк разбираются за ~1,5 с) пул
+   в 3–4 раза медленнее. В работе не больше 2 * workers пачек.
+3. Пачка пишется одним INSERT ... ON CONFLICT (key) DO UPDATE по полям,
+   которые есть в файле; строки без изменений не переписываются. Если
+   пачка упала на ограничении БД, она повторяется построчно в SAVEPOINT,
+   и ошибка приписывается конкретной строке.
+
+Commit – за вызывающим кодом (import_file, CLI). dry_run – только разбор
+и валидация, без записи.
+"""
+
+import csv
+import importlib.util
+import io
+import itertools
+import multiprocessing
+import os
+import time
+from collections import deque
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, BinaryIO, Literal, Optional
+
+from pydantic import ValidationError
+from sqlalchemy import literal_column, or_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database_sync import SessionLocal
+from app.core.stats_cache import stats_cache
+from app.importers.mappings import MAPPINGS, EntityMapping
+from app.importers.personnel_names import PersonnelNames
+
+ImportFormat = Literal["csv", "tsv", "xlsx"]
+
+# Номер первой строки данных: 1 – заголовок
+_FIRST_ROW = 2
+_SNIFF_BYTES = 64 * 1024
+
+
+@dataclass
+class RowError:
+    row: int
+    field: Optional[str]
+    message: str
+
+
+@dataclass
+class ImportReport:
+    entity: str
+    dry_run: bool
+    rows: int = 0
+    valid: int = 0
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    error_count: int = 0
+    # Первые IMPORT_MAX_ERRORS ошибок; всего – error_count
+    errors: list[RowError] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+    def add_errors(self, errors: list[RowError]) -> None:
+        self.error_count += len(errors)
+        room = settings.IMPORT_MAX_ERRORS - len(self.errors)
+        if room > 0:
+            self.errors.extend(errors[:room])
+
+
+# ── Чтение файла ──────────────────────────────────────────────────────────────
+
+def format_from_filename(name: str) -> ImportFormat:
+    suffix = Path(name).suffix.lower().lstrip(".")
+    if suffix in ("csv", "tsv", "xlsx"):
+        return suffix
+    if suffix == "txt":
+        return "tsv"
+    raise ValueError(f"Неподдерживаемый формат файла: {name} (нужен CSV, TSV или XLSX)")
+
+
+def _xlsx_text(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+def read_table(source: BinaryIO, fmt: ImportFormat) -> tuple[list[str], Iterator[list[str]]]:
+    """Заголовки и итератор строк-списков. source должен поддерживать seek."""
+    if fmt == "xlsx":
+        if importlib.util.find_spec("openpyxl") is None:
+            raise ValueError("Импорт XLSX недоступен: не установлен openpyxl")
+        from openpyxl import load_workbook
+
+        sheet = load_workbook(source, read_only=True, data_only=True).active
+        rows = sheet.iter_rows(values_only=True)
+        headers = [_xlsx_text(value) for value in next(rows, ())]
+        return headers, ([_xlsx_text(value) for value in row] for row in rows)
+
+    text = io.TextIOWrapper(source, encoding="utf-8-sig", newline="")
+    if fmt == "tsv":
+        delimiter = "\t"
+    else:
+        # Excel в русской локали сохраняет CSV через «;»
+        sample = text.read(_SNIFF_BYTES)
+        text.seek(0)
+        try:
+            delimiter = csv.Sniffer().sniff(sample, delimiters=",;\t").delimiter
+        except csv.Error:
+            delimiter = ","
+    reader = csv.reader(text, delimiter=delimiter)
+    return next(reader, []), reader
+
+
+def _chunks(rows: Iterator[list[str]], size: int) -> Iterator[list[tuple[int, list[str]]]]:
+    numbered = ((number, row) for number, row in enumerate(rows, start=_FIRST_ROW) if any(cell.strip() for cell in row))
+    while chunk := list(itertools.islice(numbered, size)):
+        yield chunk
+
+
+# ── Разбор пачки (в процессе пула или в текущем) ──────────────────────────────
+
+_worker: dict[str, Any] = {}
+
+
+def _init_worker(entity: str, columns: dict[int, str], people: Optional[PersonnelNames]) -> None:
+    _worker.update(mapping=MAPPINGS[entity], columns=columns, people=people)
+
+
+def _parse_row(
+    mapping: EntityMapping, columns: dict[int, str], people: Optional[PersonnelNames], number: int, row: list[str],
+) -> tuple[Optional[dict], list[RowError]]:
+    data: dict[str, Any] = {}
+    errors: list[RowError] = []
+    for index, name in columns.items():
+        raw = row[index].replace("\xa0", " ").strip() if index < len(row) else ""
+        if not raw:
+            continue
+        column = mapping.column(name)
+        try:
+            if column.reference:
+                value = people.find(raw) if people else None
+                if value is None:
+                    raise ValueError(f"Военнослужащий «{raw}» не найден")
+            else:
+                value = column.parse(raw)
+        except ValueError as exc:
+            errors.append(RowError(number, name, str(exc)))
+            continue
+        data[name] = value
+    if errors:
+        return None, errors
+
+    if mapping.prepare:
+        data = mapping.prepare(data)
+    try:
+        values = mapping.schema.model_validate(data).model_dump()
+    except ValidationError as exc:
+        return None, [
+            RowError(number, ".".join(str(part) for part in error["loc"]) or None, error["msg"])
+            for error in exc.errors()
+        ]
+    if not values.get(mapping.key):
+        return None, [RowError(number, mapping.key, "Пустое ключевое поле")]
+    return values, []
+
+
+def _parse_chunk(chunk: list[tuple[int, list[str]]]) -> tuple[list[tuple[int, dict]], list[RowError]]:
+    mapping, columns, people = _worker["mapping"], _worker["columns"], _worker["people"]
+    parsed: list[tuple[int, dict]] = []
+    errors: list[RowError] = []
+    for number, row in chunk:
+        values, row_errors = _parse_row(mapping, columns, people, number, row)
+        if values is not None:
+            parsed.append((number, values))
+        errors.extend(row_errors)
+    return parsed, errors
+
+
+def _parsed_chunks(chunks: Iterator[list], workers: int, initargs: tuple) -> Iterator[tuple[list, list]]:
+    _init_worker(*initargs)
+    inline_rows = 0
+    for chunk in chunks:
+        yield _parse_chunk(chunk)
+        inline_rows += len(chunk)
+        if workers > 0 and inline_rows >= settings.IMPORT_PARALLEL_MIN_ROWS:
+            break
+    else:
+        return
+    first = next(chunks, None)
+    if first is None:
+        return
+
+    # Остаток большого файла окупает запуск процессов
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(workers, mp_context=context, initializer=_init_worker, initargs=initargs) as pool:
+        pending = deque()
+        for chunk in itertools.chain([first], chunks):
+            pending.append(pool.submit(_parse_chunk, chunk))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+# ── Запись ───────────────────────────────────────────────────────────────────
+
+def _upsert(db: Session, mapping: EntityMapping, rows: list[dict], update_fields: list[str]) -> tuple[int, int]:
+    """Один INSERT ... ON CONFLICT на пачку. Возвращает (добавлено, обновлено)."""
+    model = mapping.model
+    stmt = insert(model).values(rows)
+    key = [getattr(model, mapping.key)]
+    if update_fields:
+        excluded = stmt.excluded
+        stmt = stmt.on_conflict_do_update(
+            index_elements=key,
+            set_={
+                **{name: excluded[name] for name in update_fields},
+                # onupdate не применяется к ON CONFLICT – выражение берётся из модели
+                "updated_at": model.__table__.c.updated_at.onupdate.arg,
+            },
+            where=or_(*(getattr(model, name).is_distinct_from(excluded[name]) for name in update_fields)),
+        )
+    else:
+        stmt = stmt.on_conflict_do_nothing(index_elements=key)
+    flags = db.scalars(stmt.returning(literal_column("xmax = 0"))).all()
+    inserted = sum(flags)
+    return inserted, len(flags) - inserted
+
+
+def _db_message(exc: DBAPIError) -> str:
+    return str(exc.orig).strip().splitlines()[0]
+
+
+def _write(db: Session, mapping: EntityMapping, batch: list[tuple[int, dict]], update_fields: list[str], report: ImportReport) -> None:
+    # Повтор ключа в пачке – побеждает последняя строка (ON CONFLICT не обновляет строку дважды)
+    rows = list({values[mapping.key]: (number, values) for number, values in batch}.values())
+    try:
+        with db.begin_nested():
+            inserted, updated = _upsert(db, mapping, [values for _, values in rows], update_fields)
+        written = len(rows)
+    except DBAPIError:
+        inserted = updated = written = 0
+        errors = []
+        for number, values in rows:
+            try:
+                with db.begin_nested():
+                    row_inserted, row_updated = _upsert(db, mapping, [values], update_fields)
+            except DBAPIError as exc:
+                errors.append(RowError(number, None, _db_message(exc)))
+                continue
+            inserted += row_inserted
+            updated += row_updated
+            written += 1
+        report.add_errors(errors)
+    report.inserted += inserted
+    report.updated += updated
+    report.unchanged += written - inserted - updated
+
+
+def run_import(
+    db: Session,
+    entity: str,
+    source: BinaryIO,
+    fmt: ImportFormat,
+    *,
+    overrides: Optional[dict[str, str]] = None,
+    dry_run: bool = False,
+    workers: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+) -> ImportReport:
+    """
+    Импорт source в сущность entity (ключ MAPPINGS). overrides – {заголовок: поле}.
+    ValueError – неизвестная сущность, формат или нет ключевой колонки.
+    """
+    mapping = MAPPINGS.get(entity)
+    if mapping is None:
+        raise ValueError(f"Неизвестная сущность для импорта: {entity}")
+    started = time.perf_counter()
+    report = ImportReport(entity=entity, dry_run=dry_run)
+
+    headers, rows = read_table(source, fmt)
+    columns = mapping.resolve_headers(headers, overrides)
+    present = set(columns.values())
+    update_fields = [
+        name for name in mapping.schema.model_fields
+        if name != mapping.key and (name in present or any(mapping.derived.get(source) == name for source in present))
+    ]
+    needs_people = any(mapping.column(name).reference for name in present)
+    people = PersonnelNames(db) if needs_people else None
+
+    chunks = _chunks(rows, chunk_size or settings.IMPORT_CHUNK_SIZE)
+    if workers is None:
+        # Текущий процесс занят записью в БД – пулу остаются остальные ядра
+        workers = min(settings.IMPORT_WORKERS, (os.cpu_count() or 1) - 1)
+    for parsed, errors in _parsed_chunks(chunks, workers, (entity, columns, people)):
+        report.rows += len(parsed) + len({error.row for error in errors})
+        report.valid += len(parsed)
+        report.add_errors(errors)
+        if parsed and not dry_run:
+            _write(db, mapping, parsed, update_fields, report)
+
+    report.errors.sort(key=lambda error: error.row)
+    report.elapsed = time.perf_counter() - started
+    return report
+
+
+def import_file(entity: str, source: BinaryIO, fmt: ImportFormat, **options: Any) -> ImportReport:
+    """run_import в своей синхронной сессии с commit (для API и CLI)."""
+    db = SessionLocal()
+    try:
+        report = run_import(db, entity, source, fmt, **options)
+        if report.dry_run:
+            db.rollback()
+        else:
+            db.commit()
+            if MAPPINGS[entity].stats_entity:
+                stats_cache.bump(MAPPINGS[entity].stats_entity)
+        return report
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
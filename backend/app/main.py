@@ -1,9 +1,14 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from app.core.config import settings
-from app.api.routes import auth, personnel, phones, equipment, users, storage_and_passes
+from app.core.database import engine
+from app.api.idempotency import IdempotencyMiddleware
+from app.api.routes import auth, personnel, phones, equipment, users, storage_and_passes, search, system, imports
 from app.core.exceptions import register_exception_handlers
+from app.services.movement_partitions import ensure_partitions
 
 import logging
 import time
@@ -16,7 +21,22 @@ logging.basicConfig(
 logging.getLogger('sqlalchemy.engine').setLevel(logging.WARNING)
 logger = logging.getLogger(__name__)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Секции журнала перемещений на текущий и следующий год
+    try:
+        async with engine.begin() as conn:
+            created = await conn.run_sync(ensure_partitions)
+        if created:
+            logger.info(f"Созданы секции: {', '.join(created)}")
+    except Exception as exc:
+        logger.error(f"Не удалось проверить секции equipment_movements: {exc}")
+    yield
+
+
 app = FastAPI(
+    lifespan=lifespan,
     title=settings.PROJECT_NAME,
     version=settings.VERSION,
     docs_url="/api/docs" if settings.DEBUG else None,
@@ -26,6 +46,10 @@ app = FastAPI(
 
 register_exception_handlers(app)
 
+# Добавлен раньше CORS – выполняется внутри него: повтор сохранённого
+# ответа получает CORS- и security-заголовки текущего запроса
+app.add_middleware(IdempotencyMiddleware)
+
 # CORS должен быть первым middleware – до всех остальных
 app.add_middleware(
     CORSMiddleware,
@@ -33,7 +57,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
-    expose_headers=["Set-Cookie", "X-Process-Time", "X-CSRF-Token"],
+    expose_headers=["Set-Cookie", "X-Process-Time", "X-CSRF-Token", "ETag"],
     max_age=3600,
 )
 
@@ -89,4 +113,7 @@ app.include_router(users.router, prefix="/api")
 app.include_router(personnel.router, prefix="/api")
 app.include_router(phones.router, prefix="/api")
 app.include_router(equipment.router, prefix="/api")
-app.include_router(storage_and_passes.router, prefix="/api")
\ No newline at end of file
+app.include_router(storage_and_passes.router, prefix="/api")
+app.include_router(search.router, prefix="/api")
+app.include_router(system.router, prefix="/api")
+app.include_router(imports.router, prefix="/api")
\ No newline at end of file
@@ -0,0 +1,21 @@
+from sqlalchemy import BigInteger, Boolean, Column, String
+from app.core.database import Base
+
+
+class AssetCounter(Base):
+    """
+    Количество строк учёта в разрезе (entity, asset_type, status, is_personal, is_active).
+    Ведётся триггерами на equipment, storage_and_passes и phones в той же транзакции,
+    что и изменение строки (миграция add_asset_counters). NULL хранится как '' / false.
+    """
+
+    __tablename__ = "asset_counters"
+
+    # equipment | storage_and_pass | phone
+    entity = Column(String(32), primary_key=True)
+    # equipment_type / asset_type; у телефонов – ''
+    asset_type = Column(String(50), primary_key=True)
+    status = Column(String(50), primary_key=True)
+    is_personal = Column(Boolean, primary_key=True)
+    is_active = Column(Boolean, primary_key=True)
+    count = Column(BigInteger, nullable=False, default=0)
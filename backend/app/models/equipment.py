@@ -1,7 +1,10 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text, UniqueConstraint
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Index, Text, UniqueConstraint, text
 from sqlalchemy.orm import relationship
 from app.core.database import Base, utcnow_expr
 
+# Условие уникального индекса серийных номеров ноутбуков (ключ ON CONFLICT импорта)
+LAPTOP_SERIAL_WHERE = "equipment_type = 'Ноутбук' AND serial_number IS NOT NULL AND serial_number <> ''"
+
 
 class Equipment(Base):
     __tablename__ = "equipment"
@@ -39,34 +42,64 @@ class Equipment(Base):
     storage_devices = relationship("StorageDevice", back_populates="equipment", cascade="all, delete-orphan")
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime(timezone=True), server_default=utcnow_expr(), nullable=False)
-    updated_at = Column(DateTime(timezone=True), server_default=utcnow_expr(), onupdate=utcnow_expr(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=utcnow_expr(), onupdate=utcnow_expr(), nullable=False, index=True)
 
     __table_args__ = (
         UniqueConstraint("inventory_number", name="uq_equipment_inventory"),
+        # Порядок списка и keyset-пагинации
+        Index("ix_equipment_inventory_id", "inventory_number", "id"),
+        Index(
+            "uq_equipment_laptop_serial", "serial_number",
+            unique=True, postgresql_where=text(LAPTOP_SERIAL_WHERE),
+        ),
     )
 
 
 class EquipmentMovement(Base):
+    """
+    Журнал перемещений – только вставки. Секционирован по годам created_at
+    (миграция partition_equipment_movements, app.services.movement_partitions),
+    поэтому created_at входит в первичный ключ.
+    """
+
     __tablename__ = "equipment_movements"
+    __table_args__ = {"postgresql_partition_by": "RANGE (created_at)"}
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True, autoincrement=True)
     equipment_id = Column(Integer, ForeignKey("equipment.id", ondelete="CASCADE"), nullable=False, index=True)
     equipment = relationship("Equipment", back_populates="movement_history")
     from_location = Column(String(255))
     to_location = Column(String(255))
     from_person_id = Column(Integer, ForeignKey("personnel.id"), nullable=True, index=True)
-    to_person_id = Column(Integer, ForeignKey("personnel.id"), nullable=True, index=True)
+    to_person_id = Column(Integer, ForeignKey("personnel.id"), nullable=True)
     from_person = relationship("Personnel", foreign_keys=[from_person_id])
     to_person = relationship("Personnel", foreign_keys=[to_person_id])
     movement_type = Column(String(50))
     document_number = Column(String(100))
     document_date = Column(DateTime(timezone=True))
     reason = Column(Text)
-    created_at = Column(DateTime(timezone=True), server_default=utcnow_expr(), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=utcnow_expr(), nullable=False, primary_key=True)
     created_by_id = Column(Integer, ForeignKey("users.id"))
     created_by = relationship("User", foreign_keys=[created_by_id])
 
 
+# История перемещений: WHERE equipment_id = ? ORDER BY created_at DESC, id DESC
+Index(
+    "ix_equipment_movements_history",
+    EquipmentMovement.equipment_id,
+    EquipmentMovement.created_at.desc(),
+    EquipmentMovement.id.desc(),
+)
+# Что было у военнослужащего на дату: WHERE to_person_id = ? AND created_at <= ?
+Index(
+    "ix_equipment_movements_to_person_history",
+    EquipmentMovement.to_person_id,
+    EquipmentMovement.created_at.desc(),
+)
+# Диапазоны по времени внутри секции (архив, отчёты за период)
+Index("ix_equipment_movements_created_at_brin", EquipmentMovement.created_at, postgresql_using="brin")
+
+
 class StorageDevice(Base):
     __tablename__ = "storage_devices"
 
@@ -85,8 +118,9 @@ class StorageDevice(Base):
     notes = Column(Text)
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime(timezone=True), server_default=utcnow_expr(), nullable=False)
-    updated_at = Column(DateTime(timezone=True), server_default=utcnow_expr(), onupdate=utcnow_expr(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=utcnow_expr(), onupdate=utcnow_expr(), nullable=False, index=True)
 
     __table_args__ = (
         UniqueConstraint("inventory_number", name="uq_storage_inventory"),
+        Index("ix_storage_devices_inventory_id", "inventory_number", "id"),
     )
\ No newline at end of file
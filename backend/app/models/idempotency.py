@@ -0,0 +1,24 @@
+from sqlalchemy import Column, DateTime, LargeBinary, SmallInteger, String
+from sqlalchemy.dialects.postgresql import JSONB
+
+from app.core.database import Base, utcnow_expr
+
+
+class IdempotencyKey(Base):
+    """
+    Ответы на POST/PUT с заголовком Idempotency-Key (app.api.idempotency).
+    status_code IS NULL – запрос ещё выполняется, body IS NULL при
+    заполненном status_code – ответ был больше лимита и не сохранён. Записи старше
+    IDEMPOTENCY_TTL_SECONDS удаляются самим middleware.
+    """
+
+    __tablename__ = "idempotency_keys"
+
+    # sha256(пользователь + ключ клиента) в hex
+    key = Column(String(64), primary_key=True)
+    # sha256(метод, путь, query, тело) – повтор ключа с другим запросом отклоняется
+    fingerprint = Column(String(64))
+    status_code = Column(SmallInteger)
+    headers = Column(JSONB)
+    body = Column(LargeBinary)
+    created_at = Column(DateTime(timezone=True), server_default=utcnow_expr(), nullable=False, index=True)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Enum as SQLEnum
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Index, Enum as SQLEnum
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
@@ -13,6 +13,11 @@ class PersonnelStatus(str, enum.Enum):
 class Personnel(Base):
     __tablename__ = "personnel"
 
+    __table_args__ = (
+        # Порядок списка: звание, должность, ФИО
+        Index("ix_personnel_list_order", "rank_priority", "position", "full_name", "id"),
+    )
+
     id = Column(Integer, primary_key=True, index=True)
     full_name = Column(String, nullable=False, index=True)
     rank = Column(String, nullable=True)
@@ -27,7 +32,7 @@ class Personnel(Base):
     status = Column(SQLEnum(PersonnelStatus), default=PersonnelStatus.IN_SERVICE, nullable=False)
     is_active = Column(Boolean, default=True, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
-    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False, index=True)
     
     phones = relationship("Phone", back_populates="owner", cascade="all, delete-orphan")
     equipment = relationship("Equipment", back_populates="current_owner")
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
@@ -8,6 +8,7 @@ class Phone(Base):
     
     __table_args__ = (
         UniqueConstraint("imei_1", name="uq_phone_imei_1"),
+        Index("ix_phones_storage_location_id", "storage_location", "id"),
     )
 
     id = Column(Integer, primary_key=True, index=True)
@@ -34,4 +35,4 @@ class Phone(Base):
     # Служебная информация
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
\ No newline at end of file
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), index=True)
\ No newline at end of file
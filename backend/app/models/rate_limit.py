@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Float, Integer, String
+from app.core.database import Base
+
+
+class LoginRateLimit(Base):
+    """Счётчики неудачных входов для RATE_LIMIT_BACKEND=postgres (время – epoch seconds)."""
+
+    __tablename__ = "login_rate_limits"
+
+    key = Column(String(255), primary_key=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    blocked_until = Column(Float, nullable=True)
+    # Уровень «ведра» для RATE_LIMIT_MODE=token_bucket
+    level = Column(Float, nullable=False, default=0, server_default="0")
+    last_attempt = Column(Float, nullable=False, index=True)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text, CheckConstraint, UniqueConstraint
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text, CheckConstraint, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from app.core.database import Base, utcnow_expr
 
@@ -21,10 +21,11 @@ class StorageAndPass(Base):
     assigned_to = relationship("Personnel", foreign_keys=[assigned_to_id])
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime(timezone=True), server_default=utcnow_expr(), nullable=False)
-    updated_at = Column(DateTime(timezone=True), server_default=utcnow_expr(), onupdate=utcnow_expr(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=utcnow_expr(), onupdate=utcnow_expr(), nullable=False, index=True)
 
     __table_args__ = (
         UniqueConstraint("serial_number", name="uq_storage_passes_serial"),
         CheckConstraint("asset_type IN ('flash_drive', 'electronic_pass')", name="ck_asset_type"),
         CheckConstraint("status IN ('in_use', 'stock', 'broken', 'lost')", name="ck_status"),
+        Index("ix_storage_passes_list_order", "asset_type", "serial_number", "id"),
     )
\ No newline at end of file
@@ -82,8 +82,9 @@ class EquipmentResponse(EquipmentBase):
 
 
 class EquipmentListResponse(BaseModel):
-    total: int
+    total: Optional[int] = None
     items: list[EquipmentResponse]
+    next_cursor: Optional[str] = None
 
 
 # ============ MOVEMENT SCHEMAS ============
@@ -102,6 +103,48 @@ class MovementBase(BaseModel):
 class MovementCreate(MovementBase):
     pass
 
+class BulkMovementCreate(BaseModel):
+    """Одно перемещение на несколько единиц техники по одному документу."""
+    equipment_ids: list[int] = Field(..., min_length=1, max_length=1000)
+    to_location: str = Field(..., max_length=255)
+    # Не задано – у каждой единицы берётся текущий ответственный
+    from_person_id: Optional[int] = None
+    to_person_id: Optional[int] = None
+    movement_type: str = Field(..., max_length=50)
+    document_number: Optional[str] = Field(None, max_length=100)
+    document_date: Optional[datetime] = None
+    reason: Optional[str] = None
+
+class BulkMovementItem(BaseModel):
+    equipment_id: int
+    # moved | not_found | duplicate (повтор id в запросе)
+    status: str
+    movement_id: Optional[int] = None
+
+class BulkMovementResult(BaseModel):
+    moved: int
+    items: list[BulkMovementItem]
+
+class OwnershipAsOf(BaseModel):
+    """Владение единицей на момент времени по журналу перемещений."""
+    equipment_id: int
+    equipment_type: Optional[str] = None
+    inventory_number: Optional[str] = None
+    serial_number: Optional[str] = None
+    model: Optional[str] = None
+    # Получатель последнего перемещения не позже момента; пусто – перемещений не было
+    person_id: Optional[int] = None
+    person_name: Optional[str] = None
+    person_rank: Optional[str] = None
+    location: Optional[str] = None
+    movement_id: Optional[int] = None
+    moved_at: Optional[datetime] = None
+    document_number: Optional[str] = None
+
+class OwnershipSnapshot(BaseModel):
+    at: datetime
+    items: list[OwnershipAsOf]
+
 class MovementResponse(MovementBase):
     id: int
     created_at: datetime
@@ -113,8 +156,9 @@ class MovementResponse(MovementBase):
         from_attributes = True
 
 class MovementListResponse(BaseModel):
-    total: int
+    total: Optional[int] = None
     items: list[MovementResponse]
+    next_cursor: Optional[str] = None
 
 
 # ============ STORAGE DEVICE SCHEMAS ============
@@ -159,8 +203,9 @@ class StorageDeviceResponse(StorageDeviceBase):
         from_attributes = True
 
 class StorageDeviceListResponse(BaseModel):
-    total: int
+    total: Optional[int] = None
     items: list[StorageDeviceResponse]
+    next_cursor: Optional[str] = None
 
 
 # ============ STATISTICS SCHEMAS ============
@@ -0,0 +1,29 @@
+from pydantic import BaseModel
+from typing import Optional
+
+
+class ImportRowError(BaseModel):
+    row: int
+    field: Optional[str] = None
+    message: str
+
+    class Config:
+        from_attributes = True
+
+
+class ImportReportResponse(BaseModel):
+    entity: str
+    dry_run: bool
+    rows: int
+    valid: int
+    inserted: int
+    updated: int
+    unchanged: int
+    error_count: int
+    # Первые IMPORT_MAX_ERRORS ошибок по номеру строки файла (1 – заголовок)
+    errors: list[ImportRowError]
+    elapsed: float
+    rows_per_second: float
+
+    class Config:
+        from_attributes = True
@@ -41,5 +41,65 @@ class PersonnelResponse(PersonnelBase):
         from_attributes = True
 
 class PersonnelListResponse(BaseModel):
-    total: int
-    items: List[PersonnelResponse]
\ No newline at end of file
+    total: Optional[int] = None
+    items: List[PersonnelResponse]
+    next_cursor: Optional[str] = None
+
+
+class PersonnelSuggestion(BaseModel):
+    id: int
+    full_name: str
+    short_name: str
+    rank: Optional[str] = None
+    platoon: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+
+# Досье: всё, что закреплено за военнослужащим (GET /personnel/{id}/assets)
+class AssetPhone(BaseModel):
+    id: int
+    model: Optional[str] = None
+    color: Optional[str] = None
+    imei_1: Optional[str] = None
+    imei_2: Optional[str] = None
+    serial_number: Optional[str] = None
+    has_camera: Optional[bool] = None
+    has_recorder: Optional[bool] = None
+    storage_location: Optional[str] = None
+    status: Optional[str] = None
+
+
+class AssetEquipment(BaseModel):
+    id: int
+    equipment_type: str
+    inventory_number: Optional[str] = None
+    serial_number: Optional[str] = None
+    manufacturer: Optional[str] = None
+    model: Optional[str] = None
+    current_location: Optional[str] = None
+    status: Optional[str] = None
+    is_personal: bool
+
+
+class AssetStorageAndPass(BaseModel):
+    id: int
+    asset_type: str
+    serial_number: str
+    model: Optional[str] = None
+    manufacturer: Optional[str] = None
+    status: str
+    capacity_gb: Optional[int] = None
+    access_level: Optional[int] = None
+    issue_date: Optional[datetime] = None
+
+
+class PersonnelAssets(BaseModel):
+    personnel_id: int
+    full_name: str
+    rank: Optional[str] = None
+    platoon: Optional[str] = None
+    phones: List[AssetPhone]
+    equipment: List[AssetEquipment]
+    storage_and_passes: List[AssetStorageAndPass]
@@ -80,18 +80,38 @@ class PhoneResponse(PhoneBase):
         from_attributes = True
 
 class PhoneListResponse(BaseModel):
-    total: int
+    total: Optional[int] = None
     items: list[PhoneResponse]
+    next_cursor: Optional[str] = None
 
 # Схемы для массовых операций
 class BatchCheckinRequest(BaseModel):
     phone_ids: list[int] = Field(..., min_length=1)
+    # True – применить к тем, к кому можно, остальные вернуть в skipped/missing
+    best_effort: bool = False
 
 class BatchCheckoutRequest(BaseModel):
     phone_ids: list[int] = Field(..., min_length=1)
+    best_effort: bool = False
 
-class PhoneStatusReport(BaseModel):
+class BatchStatusResult(BaseModel):
+    message: str
+    count: int
+    applied: list[int]
+    # Уже в целевом статусе
+    skipped: list[int]
+    # Нет или удалены
+    missing: list[int]
+
+class PhoneStatusCounts(BaseModel):
     total_phones: int
     checked_in: int
     checked_out: int
-    phones_not_submitted: list[PhoneResponse]
\ No newline at end of file
+
+class PhoneNotSubmitted(PhoneResponse):
+    owner_platoon: Optional[str] = None
+
+class PhoneStatusReport(PhoneStatusCounts):
+    # Всего несданных с учётом фильтра взвода; phones_not_submitted – текущая страница
+    not_submitted_total: int
+    phones_not_submitted: list[PhoneNotSubmitted]
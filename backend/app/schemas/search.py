@@ -0,0 +1,15 @@
+from pydantic import BaseModel
+
+
+class SearchResult(BaseModel):
+    # equipment | storage_device | phone | storage_and_pass | personnel
+    type: str
+    id: int
+    title: str
+    subtitle: str
+    rank: float
+
+
+class SearchResponse(BaseModel):
+    query: str
+    items: list[SearchResult]
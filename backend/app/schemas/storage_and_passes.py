@@ -59,8 +59,9 @@ class StorageAndPassResponse(StorageAndPassBase):
         from_attributes = True
 
 class StorageAndPassListResponse(BaseModel):
-    total: int
+    total: Optional[int] = None
     items: list[StorageAndPassResponse]
+    next_cursor: Optional[str] = None
 
 class StorageAndPassStats(BaseModel):
     total_assets: int
@@ -61,8 +61,9 @@ class UserResponse(UserBase):
 
 
 class UserListResponse(BaseModel):
-    total: int
+    total: Optional[int] = None
     items: list[UserResponse]
+    next_cursor: Optional[str] = None
 
 
 class ChangePasswordRequest(BaseModel):
@@ -0,0 +1,82 @@
+"""
+Денормализованные счётчики asset_counters для нефильтрованной статистики.
+
+Счётчики ведут триггеры (миграция add_asset_counters) в транзакции каждого
+INSERT/UPDATE/DELETE по equipment, storage_and_passes и phones – то есть
+во всех путях записи сервисов (create/update/delete, batch, перемещения,
+удаление военнослужащего), импорта и ручных правок в psql.
+
+Здесь – пересборка и сверка с живыми данными для CLI:
+
+    python -m app.cli rebuild-counters            # пересобрать
+    python -m app.cli rebuild-counters --verify   # только сверить
+"""
+
+from sqlalchemy import delete, func, select, text
+from sqlalchemy.orm import Session
+
+from app.models.asset_counter import AssetCounter
+
+# entity -> (таблица, выражение типа, выражение is_personal); синхронно с миграцией
+COUNTER_SOURCES = {
+    "equipment": ("equipment", "coalesce(equipment_type, '')", "coalesce(is_personal, false)"),
+    "storage_and_pass": ("storage_and_passes", "coalesce(asset_type, '')", "false"),
+    "phone": ("phones", "''", "false"),
+}
+
+CounterKey = tuple[str, str, str, bool, bool]
+
+
+def _live_counts_sql(entity: str) -> str:
+    table, type_expr, personal_expr = COUNTER_SOURCES[entity]
+    return (
+        f"SELECT '{entity}', {type_expr}, coalesce(status, ''), {personal_expr}, "
+        f"coalesce(is_active, false), count(*) FROM {table} GROUP BY 2, 3, 4, 5"
+    )
+
+
+def live_counts(db: Session) -> dict[CounterKey, int]:
+    counts: dict[CounterKey, int] = {}
+    for entity in COUNTER_SOURCES:
+        for *key, value in db.execute(text(_live_counts_sql(entity))):
+            counts[tuple(key)] = value
+    return counts
+
+
+def stored_counts(db: Session) -> dict[CounterKey, int]:
+    stmt = select(
+        AssetCounter.entity,
+        AssetCounter.asset_type,
+        AssetCounter.status,
+        AssetCounter.is_personal,
+        AssetCounter.is_active,
+        AssetCounter.count,
+    ).where(AssetCounter.count != 0)
+    return {tuple(key): value for *key, value in db.execute(stmt)}
+
+
+def verify_counters(db: Session) -> list[tuple[CounterKey, int, int]]:
+    """Расхождения (ключ, в счётчиках, в таблицах); пустой список – всё сходится."""
+    stored, live = stored_counts(db), live_counts(db)
+    return [
+        (key, stored.get(key, 0), live.get(key, 0))
+        for key in sorted(stored.keys() | live.keys())
+        if stored.get(key, 0) != live.get(key, 0)
+    ]
+
+
+def rebuild_counters(db: Session) -> int:
+    """
+    Пересобирает asset_counters с нуля. Исходные таблицы блокируются от записи
+    (SHARE) до commit вызывающего кода, чтобы триггеры не добавили дельты
+    поверх пересчёта. Возвращает число строк счётчиков.
+    """
+    for table, _, _ in COUNTER_SOURCES.values():
+        db.execute(text(f"LOCK TABLE {table} IN SHARE MODE"))
+    db.execute(delete(AssetCounter))
+    for entity in COUNTER_SOURCES:
+        db.execute(text(
+            "INSERT INTO asset_counters (entity, asset_type, status, is_personal, is_active, count) "
+            + _live_counts_sql(entity)
+        ))
+    return db.scalar(select(func.count()).select_from(AssetCounter)) or 0
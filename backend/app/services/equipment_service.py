@@ -1,33 +1,100 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import joinedload
-from sqlalchemy import or_, func, select
+from sqlalchemy.orm import aliased, joinedload
+from sqlalchemy import Integer, Select, any_, bindparam, insert, select, true, update
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.exc import IntegrityError
 from typing import Optional, List
-from datetime import datetime, timedelta, timezone
+from datetime import datetime, timezone
 import logging
 
+from app.models.asset_counter import AssetCounter
 from app.models.equipment import Equipment, EquipmentMovement, StorageDevice
+from app.models.personnel import Personnel
+from app.models.user import User
 from app.schemas.equipment import (
-    EquipmentCreate, EquipmentUpdate, MovementCreate,
-    StorageDeviceCreate, StorageDeviceUpdate
+    BulkMovementCreate, EquipmentCreate, EquipmentUpdate, EquipmentResponse, MovementCreate, MovementResponse,
+    StorageDeviceCreate, StorageDeviceUpdate, StorageDeviceResponse
 )
+from app.core.facets import Facet, facet_counts
+from app.core.pagination import SortKey, order_by, paginate
+from app.core.projection import response_columns, select_fields
+from app.core.stats_cache import stats_cache
+from app.core.search import EQUIPMENT_DOCUMENT, STORAGE_DEVICE_DOCUMENT, matches
 from app.core.validators import sanitize_html
 
 logger = logging.getLogger(__name__)
 
-def _equipment_search_filter(search: str):
-    s = sanitize_html(search)
-    return or_(
-        Equipment.inventory_number.ilike(f"%{s}%"),
-        Equipment.serial_number.ilike(f"%{s}%"),
-        Equipment.mni_serial_number.ilike(f"%{s}%"),
-        Equipment.manufacturer.ilike(f"%{s}%"),
-        Equipment.model.ilike(f"%{s}%"),
-        Equipment.equipment_type.ilike(f"%{s}%"),
-        Equipment.current_location.ilike(f"%{s}%"),
-        Equipment.notes.ilike(f"%{s}%"),
+EQUIPMENT_SORT = (SortKey(Equipment.inventory_number, nullable=True), SortKey(Equipment.id))
+STORAGE_DEVICE_SORT = (SortKey(StorageDevice.inventory_number, nullable=True), SortKey(StorageDevice.id))
+MOVEMENT_SORT = (SortKey(EquipmentMovement.created_at, descending=True), SortKey(EquipmentMovement.id, descending=True))
+
+FromPerson = aliased(Personnel)
+ToPerson = aliased(Personnel)
+
+# Колонки списков = поля схем ответа, ФИО/звание – из JOIN
+EQUIPMENT_LIST_COLUMNS = response_columns(
+    EquipmentResponse, Equipment,
+    current_owner_name=Personnel.full_name,
+    current_owner_rank=Personnel.rank,
+)
+STORAGE_DEVICE_LIST_COLUMNS = response_columns(
+    StorageDeviceResponse, StorageDevice,
+    equipment_inventory_number=Equipment.inventory_number,
+)
+MOVEMENT_LIST_COLUMNS = response_columns(
+    MovementResponse, EquipmentMovement,
+    from_person_name=FromPerson.full_name,
+    to_person_name=ToPerson.full_name,
+    created_by_username=User.username,
+)
+
+
+def _as_utc(at: datetime) -> datetime:
+    # Момент без часового пояса считается UTC, как created_at журнала
+    return at if at.tzinfo is not None else at.replace(tzinfo=timezone.utc)
+
+
+def _latest_movement(equipment_id, at: datetime):
+    """
+    Последнее перемещение единицы не позже at – кто держал её в этот момент.
+    LATERAL + LIMIT 1 идёт по ix_equipment_movements_history.
+    """
+    return (
+        select(
+            EquipmentMovement.id, EquipmentMovement.to_person_id, EquipmentMovement.to_location,
+            EquipmentMovement.created_at, EquipmentMovement.document_number,
+        )
+        .where(EquipmentMovement.equipment_id == equipment_id, EquipmentMovement.created_at <= at)
+        .order_by(EquipmentMovement.created_at.desc(), EquipmentMovement.id.desc())
+        .limit(1)
+        .lateral("latest")
     )
 
+
+def _ownership_columns(latest) -> list:
+    """Колонки OwnershipAsOf: техника + последнее перемещение latest + ФИО получателя."""
+    return [
+        Equipment.id.label("equipment_id"),
+        Equipment.equipment_type,
+        Equipment.inventory_number,
+        Equipment.serial_number,
+        Equipment.model,
+        latest.c.to_person_id.label("person_id"),
+        Personnel.full_name.label("person_name"),
+        Personnel.rank.label("person_rank"),
+        latest.c.to_location.label("location"),
+        latest.c.id.label("movement_id"),
+        latest.c.created_at.label("moved_at"),
+        latest.c.document_number,
+    ]
+
+
+OWNERSHIP_SORT = (SortKey(Equipment.inventory_number, nullable=True), SortKey(Equipment.id))
+
+
+def _equipment_search_filter(search: str):
+    return matches(EQUIPMENT_DOCUMENT, sanitize_html(search))
+
 class EquipmentService:
     def __init__(self, db: AsyncSession):
         self.db = db
@@ -43,25 +110,30 @@ class EquipmentService:
             stmt = stmt.where(_equipment_search_filter(search))
         return stmt
 
-    async def get_list(self, skip=0, limit=100, equipment_type=None, status=None, search=None, is_personal=None):
-        # Базовый запрос
+    def list_query(self, equipment_type=None, status=None, search=None, is_personal=None, fields=None):
+        """Выборка списка без сортировки и страниц – общая для get_list и экспорта."""
+        # Колонки ответа + владелец, строки-словари вместо ORM-объектов
         stmt = (
-            select(Equipment)
-            .options(joinedload(Equipment.current_owner))
+            select(*select_fields(EQUIPMENT_LIST_COLUMNS, fields, EQUIPMENT_SORT))
+            .outerjoin(Personnel, Equipment.current_owner_id == Personnel.id)
             .where(Equipment.is_active == True)
         )
-        stmt = self._apply_filters(stmt, equipment_type, status, search, is_personal)
-        
-        # Получаем общее количество (в асинхронном стиле это отдельный запрос)
-        count_stmt = select(func.count()).select_from(stmt.subquery())
-        total = await self.db.scalar(count_stmt) or 0
-        
-        # Получаем элементы
-        stmt = stmt.order_by(Equipment.inventory_number).offset(skip).limit(limit)
-        result = await self.db.execute(stmt)
-        items = result.scalars().all()
-        
-        return items, total
+        return self._apply_filters(stmt, equipment_type, status, search, is_personal)
+
+    async def get_list(
+        self, skip=0, limit=100, equipment_type=None, status=None, search=None, is_personal=None,
+        cursor=None, with_total="exact", fields=None,
+    ):
+        stmt = self.list_query(equipment_type, status, search, is_personal, fields)
+        unfiltered = not (equipment_type or status or search or is_personal is not None)
+
+        # Страница и общее количество – одним запросом
+        return await paginate(
+            self.db, stmt, EQUIPMENT_SORT,
+            skip=skip, limit=limit, cursor=cursor,
+            with_total=with_total,
+            estimate_from=Equipment.__table__ if unfiltered else None,
+        )
 
     async def get_by_id(self, equipment_id: int) -> Optional[Equipment]:
         stmt = (
@@ -77,12 +149,15 @@ class EquipmentService:
             equipment = Equipment(**equipment_data.model_dump())
             self.db.add(equipment)
             await self.db.commit()
+            stats_cache.bump("equipment")
             await self.db.refresh(equipment)
             return equipment
         except IntegrityError as e:
             await self.db.rollback()
             if "uq_equipment_inventory" in str(e.orig):
                 raise ValueError(f"Инвентарный номер {equipment_data.inventory_number} уже существует")
+            if "uq_equipment_laptop_serial" in str(e.orig):
+                raise ValueError(f"Ноутбук с серийным номером {equipment_data.serial_number} уже существует")
             raise ValueError("Ошибка при создании")
 
     async def update(self, equipment_id: int, equipment_data: EquipmentUpdate) -> Optional[Equipment]:
@@ -93,12 +168,15 @@ class EquipmentService:
             for field, value in equipment_data.model_dump(exclude_unset=True).items():
                 setattr(equipment, field, value)
             await self.db.commit()
+            stats_cache.bump("equipment")
             await self.db.refresh(equipment)
             return equipment
         except IntegrityError as e:
             await self.db.rollback()
             if "uq_equipment_inventory" in str(e.orig):
                 raise ValueError("Инвентарный номер уже существует")
+            if "uq_equipment_laptop_serial" in str(e.orig):
+                raise ValueError("Ноутбук с таким серийным номером уже существует")
             raise
 
     async def delete(self, equipment_id: int) -> bool:
@@ -107,6 +185,7 @@ class EquipmentService:
             return False
         equipment.is_active = False
         await self.db.commit()
+        stats_cache.bump("equipment")
         return True
 
     async def create_movement(self, movement_data: MovementCreate, created_by_id: int) -> EquipmentMovement:
@@ -124,16 +203,7 @@ class EquipmentService:
                 if not equipment:
                     raise ValueError("Техника не найдена")
 
-                # Проверка на дублирование перемещения
-                check_stmt = select(EquipmentMovement).where(
-                    EquipmentMovement.equipment_id == equipment.id,
-                    EquipmentMovement.created_at > datetime.now(timezone.utc) - timedelta(minutes=5)
-
-                )
-                check_res = await self.db.execute(check_stmt)
-                if check_res.scalars().first():
-                    raise ValueError("Перемещение уже выполняется")
-
+                # Повторная отправка того же перемещения – Idempotency-Key (app.api.idempotency)
                 movement = EquipmentMovement(**movement_data.model_dump(), created_by_id=created_by_id)
                 self.db.add(movement)
                 
@@ -142,6 +212,8 @@ class EquipmentService:
                 await self.db.flush()
 
             await self.db.commit()
+            # Место хранения входит в поисковый документ статистики
+            stats_cache.bump("equipment")
             await self.db.refresh(movement)
             return movement
         except Exception as e:
@@ -149,72 +221,222 @@ class EquipmentService:
             logger.error(f"Movement creation error: {e}")
             raise
 
-    async def get_movement_history(self, equipment_id: int, skip: int = 0, limit: int = 50):
-        stmt = (
-            select(EquipmentMovement)
-            .options(
-                joinedload(EquipmentMovement.from_person),
-                joinedload(EquipmentMovement.to_person),
-                joinedload(EquipmentMovement.created_by),
+    async def create_movements_bulk(self, data: BulkMovementCreate, created_by_id: int) -> dict:
+        """
+        Перемещение нескольких единиц по одному документу в одной транзакции:
+        блокировка строк техники в порядке id (параллельные документы на
+        пересекающиеся наборы не упираются в deadlock), один многострочный
+        INSERT перемещений и один UPDATE владельца/места. Откуда – текущие
+        место и ответственный каждой единицы. Ненайденные и повторные id
+        не перемещаются и возвращаются со своим статусом.
+        """
+        ids = list(dict.fromkeys(data.equipment_ids))
+        document = data.model_dump(exclude={"equipment_ids", "from_person_id"})
+        try:
+            lock_stmt = (
+                select(Equipment.id, Equipment.current_location, Equipment.current_owner_id)
+                .where(Equipment.id == any_(bindparam("ids", ids, type_=ARRAY(Integer))), Equipment.is_active == True)
+                .order_by(Equipment.id)
+                .with_for_update()
             )
+            locked = (await self.db.execute(lock_stmt)).all()
+
+            movement_ids: dict[int, int] = {}
+            if locked:
+                rows = [
+                    {
+                        **document,
+                        "equipment_id": equipment.id,
+                        "from_location": equipment.current_location,
+                        "from_person_id": data.from_person_id if data.from_person_id is not None else equipment.current_owner_id,
+                        "created_by_id": created_by_id,
+                    }
+                    for equipment in locked
+                ]
+                inserted = await self.db.execute(
+                    insert(EquipmentMovement).values(rows).returning(EquipmentMovement.equipment_id, EquipmentMovement.id)
+                )
+                movement_ids = dict(inserted.tuples().all())
+
+                moved_ids = [equipment.id for equipment in locked]
+                await self.db.execute(
+                    update(Equipment)
+                    .where(Equipment.id == any_(bindparam("moved_ids", moved_ids, type_=ARRAY(Integer))))
+                    .values(current_location=data.to_location, current_owner_id=data.to_person_id)
+                    .execution_options(synchronize_session=False)
+                )
+            await self.db.commit()
+        except IntegrityError as e:
+            await self.db.rollback()
+            logger.error(f"Bulk movement error: {e}")
+            # Внешние ключи документа – только военнослужащие
+            raise ValueError("Военнослужащий не найден") from e
+        except Exception as e:
+            await self.db.rollback()
+            logger.error(f"Bulk movement error: {e}")
+            raise
+        if movement_ids:
+            stats_cache.bump("equipment")
+
+        items, seen = [], set()
+        for equipment_id in data.equipment_ids:
+            if equipment_id in seen:
+                items.append({"equipment_id": equipment_id, "status": "duplicate"})
+                continue
+            seen.add(equipment_id)
+            movement_id = movement_ids.get(equipment_id)
+            items.append({
+                "equipment_id": equipment_id,
+                "status": "moved" if movement_id else "not_found",
+                "movement_id": movement_id,
+            })
+        return {"moved": len(movement_ids), "items": items}
+
+    def movement_query(self, equipment_id: int, fields: Optional[str] = None, since: Optional[datetime] = None):
+        stmt = (
+            select(*select_fields(MOVEMENT_LIST_COLUMNS, fields, MOVEMENT_SORT))
+            .outerjoin(FromPerson, EquipmentMovement.from_person_id == FromPerson.id)
+            .outerjoin(ToPerson, EquipmentMovement.to_person_id == ToPerson.id)
+            .outerjoin(User, EquipmentMovement.created_by_id == User.id)
             .where(EquipmentMovement.equipment_id == equipment_id)
         )
-        
-        count_stmt = select(func.count()).select_from(stmt.subquery())
-        total = await self.db.scalar(count_stmt) or 0
-        
-        stmt = stmt.order_by(EquipmentMovement.created_at.desc()).offset(skip).limit(limit)
-        result = await self.db.execute(stmt)
-        items = result.scalars().all()
-        
-        return items, total
+        if since is not None:
+            # Условие на ключ секционирования – старые годовые секции не читаются
+            stmt = stmt.where(EquipmentMovement.created_at >= since)
+        return stmt
 
-    async def get_statistics(self, equipment_type=None, status=None, search=None, is_personal=None) -> dict:
-        # 1. Total count
-        base_stmt = select(Equipment).where(Equipment.is_active == True)
-        base_stmt = self._apply_filters(base_stmt, equipment_type, status, search, is_personal)
-        total = await self.db.scalar(select(func.count()).select_from(base_stmt.subquery())) or 0
+    async def get_movement_history(
+        self, equipment_id: int, skip: int = 0, limit: int = 50,
+        cursor: Optional[str] = None, with_total: str = "exact", fields: Optional[str] = None,
+        since: Optional[datetime] = None,
+    ):
+        stmt = self.movement_query(equipment_id, fields, since)
+        return await paginate(
+            self.db, stmt, MOVEMENT_SORT,
+            skip=skip, limit=limit, cursor=cursor,
+            with_total=with_total,
+        )
+
+    # ── Владение на момент времени (по журналу перемещений) ───────────────────
+    # Ответ строится только по перемещениям: у единицы без перемещений до at
+    # поля person_*/movement_* пустые.
 
-        # 2. By status
-        status_stmt = select(Equipment.status, func.count(Equipment.id)).where(Equipment.is_active == True)
+    async def owner_at(self, equipment_id: int, at: datetime) -> Optional[dict]:
+        """Кто держал единицу в момент at. None – техники нет."""
+        latest = _latest_movement(Equipment.id, _as_utc(at))
+        stmt = (
+            select(*_ownership_columns(latest))
+            .select_from(Equipment)
+            .outerjoin(latest, true())
+            .outerjoin(Personnel, Personnel.id == latest.c.to_person_id)
+            .where(Equipment.id == equipment_id)
+        )
+        row = (await self.db.execute(stmt)).mappings().first()
+        return dict(row) if row else None
+
+    async def holdings_at(self, person_id: int, at: datetime) -> list[dict]:
+        """
+        Что было у военнослужащего в момент at. Кандидаты – единицы, хоть раз
+        переданные ему до at (индекс по to_person_id, created_at); из них
+        остаются те, чьё последнее перемещение до at – к нему.
+        """
+        at = _as_utc(at)
+        candidates = (
+            select(EquipmentMovement.equipment_id)
+            .where(EquipmentMovement.to_person_id == person_id, EquipmentMovement.created_at <= at)
+            .distinct()
+            .subquery("candidates")
+        )
+        latest = _latest_movement(candidates.c.equipment_id, at)
+        stmt = (
+            select(*_ownership_columns(latest))
+            .select_from(candidates)
+            .join(latest, true())
+            .join(Equipment, Equipment.id == candidates.c.equipment_id)
+            .join(Personnel, Personnel.id == latest.c.to_person_id)
+            .where(latest.c.to_person_id == person_id)
+            .order_by(*order_by(OWNERSHIP_SORT))
+        )
+        return [dict(row) for row in (await self.db.execute(stmt)).mappings()]
+
+    def ownership_snapshot_query(self, at: datetime, equipment_type: Optional[str] = None) -> Select:
+        """
+        Владение всем парком в момент at: DISTINCT ON (equipment_id) по
+        журналу в порядке ix_equipment_movements_history. Без сортировки –
+        её добавляют fleet_ownership_at и выгрузка.
+        """
+        at = _as_utc(at)
+        latest = (
+            select(
+                EquipmentMovement.equipment_id, EquipmentMovement.id, EquipmentMovement.to_person_id,
+                EquipmentMovement.to_location, EquipmentMovement.created_at, EquipmentMovement.document_number,
+            )
+            .where(EquipmentMovement.created_at <= at)
+            .distinct(EquipmentMovement.equipment_id)
+            .order_by(EquipmentMovement.equipment_id, EquipmentMovement.created_at.desc(), EquipmentMovement.id.desc())
+            .subquery("latest")
+        )
+        stmt = (
+            select(*_ownership_columns(latest))
+            .select_from(latest)
+            .join(Equipment, Equipment.id == latest.c.equipment_id)
+            .outerjoin(Personnel, Personnel.id == latest.c.to_person_id)
+        )
         if equipment_type:
-            status_stmt = status_stmt.where(Equipment.equipment_type == equipment_type)
-        if is_personal is not None:
-            status_stmt = status_stmt.where(Equipment.is_personal == is_personal)
-        if search:
-            status_stmt = status_stmt.where(_equipment_search_filter(search))
-        
-        status_res = await self.db.execute(status_stmt.group_by(Equipment.status))
-        by_status = dict(status_res.all())
+            stmt = stmt.where(Equipment.equipment_type == equipment_type)
+        return stmt
 
-        # 3. By type
-        type_stmt = select(Equipment.equipment_type, func.count(Equipment.id)).where(Equipment.is_active == True)
-        if status:
-            type_stmt = type_stmt.where(Equipment.status == status)
-        if is_personal is not None:
-            type_stmt = type_stmt.where(Equipment.is_personal == is_personal)
+    async def fleet_ownership_at(self, at: datetime, equipment_type: Optional[str] = None) -> list[dict]:
+        stmt = self.ownership_snapshot_query(at, equipment_type).order_by(*order_by(OWNERSHIP_SORT))
+        return [dict(row) for row in (await self.db.execute(stmt)).mappings()]
+
+    async def get_statistics(self, equipment_type=None, status=None, search=None, is_personal=None) -> dict:
+        cache_key = stats_cache.key(
+            "equipment", "equipment.stats",
+            equipment_type=equipment_type, status=status, search=search, is_personal=is_personal,
+        )
+        cached = stats_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        # Общие фильтры; статус и тип – фасеты, каждая разбивка без своего фильтра
         if search:
-            type_stmt = type_stmt.where(_equipment_search_filter(search))
-            
-        type_res = await self.db.execute(type_stmt.group_by(Equipment.equipment_type))
-        by_type = dict(type_res.all())
+            filters = [Equipment.is_active == True, _equipment_search_filter(search)]
+            if is_personal is not None:
+                filters.append(Equipment.is_personal == is_personal)
+            total, breakdown = await facet_counts(self.db, Equipment, filters, [
+                Facet("by_status", Equipment.status, status or None),
+                Facet("by_type", Equipment.equipment_type, equipment_type or None),
+            ])
+        else:
+            # Без поиска все фильтры покрываются счётчиками – размер таблицы не важен
+            filters = [AssetCounter.entity == "equipment", AssetCounter.is_active.is_(True)]
+            if is_personal is not None:
+                filters.append(AssetCounter.is_personal == is_personal)
+            total, breakdown = await facet_counts(self.db, AssetCounter, filters, [
+                Facet("by_status", AssetCounter.status, status or None),
+                Facet("by_type", AssetCounter.asset_type, equipment_type or None),
+            ], measure=AssetCounter.count)
+        by_status, by_type = breakdown["by_status"], breakdown["by_type"]
 
-        return {
+        result = {
             "total_equipment": total,
             "by_type": by_type,
             "by_status": by_status,
             "pending_movements": 0,
         }
+        stats_cache.put(cache_key, result)
+        return result
 
 
 class StorageDeviceService:
     def __init__(self, db: AsyncSession):
         self.db = db
 
-    async def get_list(self, skip=0, limit=100, equipment_id=None, status=None, search=None):
+    def list_query(self, equipment_id=None, status=None, search=None, fields=None):
         stmt = (
-            select(StorageDevice)
-            .options(joinedload(StorageDevice.equipment))
+            select(*select_fields(STORAGE_DEVICE_LIST_COLUMNS, fields, STORAGE_DEVICE_SORT))
+            .outerjoin(Equipment, StorageDevice.equipment_id == Equipment.id)
             .where(StorageDevice.is_active == True)
         )
         if equipment_id:
@@ -222,23 +444,21 @@ class StorageDeviceService:
         if status:
             stmt = stmt.where(StorageDevice.status == status)
         if search:
-            search_clean = sanitize_html(search)
-            stmt = stmt.where(or_(
-                StorageDevice.inventory_number.ilike(f"%{search_clean}%"),
-                StorageDevice.serial_number.ilike(f"%{search_clean}%"),
-                StorageDevice.manufacturer.ilike(f"%{search_clean}%"),
-                StorageDevice.model.ilike(f"%{search_clean}%"),
-                StorageDevice.device_type.ilike(f"%{search_clean}%"),
-                StorageDevice.location.ilike(f"%{search_clean}%"),
-                StorageDevice.notes.ilike(f"%{search_clean}%"),
-            ))
-            
-        total = await self.db.scalar(select(func.count()).select_from(stmt.subquery())) or 0
-        
-        stmt = stmt.order_by(StorageDevice.inventory_number).offset(skip).limit(limit)
-        result = await self.db.execute(stmt)
-        items = result.scalars().all()
-        return items, total
+            stmt = stmt.where(matches(STORAGE_DEVICE_DOCUMENT, sanitize_html(search)))
+        return stmt
+
+    async def get_list(
+        self, skip=0, limit=100, equipment_id=None, status=None, search=None, cursor=None, with_total="exact",
+        fields=None,
+    ):
+        stmt = self.list_query(equipment_id, status, search, fields)
+        unfiltered = not (equipment_id or status or search)
+        return await paginate(
+            self.db, stmt, STORAGE_DEVICE_SORT,
+            skip=skip, limit=limit, cursor=cursor,
+            with_total=with_total,
+            estimate_from=StorageDevice.__table__ if unfiltered else None,
+        )
 
     async def get_by_id(self, device_id: int) -> Optional[StorageDevice]:
         stmt = (
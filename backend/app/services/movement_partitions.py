@@ -0,0 +1,129 @@
+"""
+Годовые секции журнала equipment_movements (PARTITION BY RANGE (created_at)).
+
+Секция года – equipment_movements_yГГГГ, границы – 1 января UTC. Строки
+вне всех секций попадают в equipment_movements_default; в норме она пуста,
+т.к. секции создаются заранее:
+- при старте приложения (lifespan в app.main) и
+- командой `python -m app.cli movement-partitions`.
+
+Индексы объявлены на родительской таблице (история по технике – btree,
+created_at – BRIN) и создаются в каждой секции автоматически. Запросы с
+условием на created_at (параметр since истории) читают только свои секции.
+
+Старые годы отсоединяются и уходят в схему archive или в CSV.gz:
+
+    python -m app.cli archive-movements --before 2024
+    python -m app.cli archive-movements --before 2024 --dump-dir /backups
+"""
+
+import gzip
+import shutil
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from app.core.config import settings
+
+TABLE = "equipment_movements"
+DEFAULT_PARTITION = f"{TABLE}_default"
+ARCHIVE_SCHEMA = "archive"
+_PREFIX = f"{TABLE}_y"
+# Параллельный старт нескольких воркеров не создаёт одну секцию дважды
+_LOCK_ID = 0x5A47_5401
+
+
+def partition_name(year: int) -> str:
+    return f"{_PREFIX}{year}"
+
+
+def _bounds(year: int) -> tuple[str, str]:
+    return f"{year}-01-01 00:00:00+00", f"{year + 1}-01-01 00:00:00+00"
+
+
+def list_partitions(conn: Connection) -> dict[int, str]:
+    """{год: имя секции} для присоединённых годовых секций."""
+    names = conn.execute(text(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+        "WHERE parent.relname = :table"
+    ), {"table": TABLE}).scalars()
+    return {int(name.removeprefix(_PREFIX)): name for name in names if name.startswith(_PREFIX)}
+
+
+def create_partition(conn: Connection, year: int) -> None:
+    """
+    Секция года. Если строки этого года уже попали в default-секцию, она
+    на время отсоединяется и строки переносятся в новую секцию.
+    """
+    start, end = _bounds(year)
+    name = partition_name(year)
+    in_default = conn.execute(text(
+        f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} WHERE created_at >= :start AND created_at < :end)"
+    ), {"start": start, "end": end}).scalar()
+    if not in_default:
+        conn.execute(text(
+            f"CREATE TABLE {name} PARTITION OF {TABLE} FOR VALUES FROM ('{start}') TO ('{end}')"
+        ))
+        return
+
+    conn.execute(text(f"ALTER TABLE {TABLE} DETACH PARTITION {DEFAULT_PARTITION}"))
+    conn.execute(text(f"CREATE TABLE {name} PARTITION OF {TABLE} FOR VALUES FROM ('{start}') TO ('{end}')"))
+    conn.execute(text(
+        f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} WHERE created_at >= :start AND created_at < :end RETURNING *) "
+        f"INSERT INTO {name} SELECT * FROM moved"
+    ), {"start": start, "end": end})
+    conn.execute(text(f"ALTER TABLE {TABLE} ATTACH PARTITION {DEFAULT_PARTITION} DEFAULT"))
+
+
+def ensure_partitions(conn: Connection, years_ahead: Optional[int] = None) -> list[str]:
+    """Секции текущего года и years_ahead следующих. Возвращает созданные."""
+    if years_ahead is None:
+        years_ahead = settings.MOVEMENT_PARTITIONS_AHEAD
+    conn.execute(text("SELECT pg_advisory_xact_lock(:id)"), {"id": _LOCK_ID})
+    existing = list_partitions(conn)
+    current = datetime.now(timezone.utc).year
+    created = []
+    for year in range(current, current + years_ahead + 1):
+        if year not in existing:
+            create_partition(conn, year)
+            created.append(partition_name(year))
+    return created
+
+
+def archive_partitions(conn: Connection, before_year: int, dump_dir: Optional[Path] = None) -> list[str]:
+    """
+    Отсоединяет секции годов раньше before_year. Без dump_dir таблица
+    переносится в схему archive (доступна для запросов), с dump_dir –
+    выгружается в CSV.gz (COPY) и удаляется. Текущий год не архивируется.
+    """
+    if before_year > datetime.now(timezone.utc).year:
+        raise ValueError("Секцию текущего года архивировать нельзя")
+    archived = []
+    for year, name in sorted(list_partitions(conn).items()):
+        if year >= before_year:
+            continue
+        conn.execute(text(f"ALTER TABLE {TABLE} DETACH PARTITION {name}"))
+        if dump_dir is None:
+            conn.execute(text(f"CREATE SCHEMA IF NOT EXISTS {ARCHIVE_SCHEMA}"))
+            conn.execute(text(f"ALTER TABLE {name} SET SCHEMA {ARCHIVE_SCHEMA}"))
+            archived.append(f"{ARCHIVE_SCHEMA}.{name}")
+            continue
+
+        dump_dir.mkdir(parents=True, exist_ok=True)
+        destination = dump_dir / f"{name}.csv.gz"
+        partial = destination.with_suffix(".gz.partial")
+        cursor = conn.connection.cursor()
+        try:
+            with gzip.open(partial, "wb") as file:
+                cursor.copy_expert(f"COPY {name} TO STDOUT WITH (FORMAT csv, HEADER)", file)
+        finally:
+            cursor.close()
+        shutil.move(partial, destination)
+        conn.execute(text(f"DROP TABLE {name}"))
+        archived.append(str(destination))
+    return archived
@@ -0,0 +1,189 @@
+"""
+In-process индекс автодополнения по личному составу (/personnel/suggest).
+
+Ключи – токены ФИО, краткой формы «Иванов И.И.», личного и жетонного
+номеров в нижнем регистре (ё → е). Ключи хранятся в отсортированном
+списке, поиск по префиксу – bisect. Запрос из нескольких слов находит
+тех, у кого каждое слово является префиксом какого-либо ключа.
+
+Обновление инкрементальное:
+- PersonnelService вызывает upsert/remove сразу после commit;
+- изменения из других воркеров и CLI подтягиваются не чаще раза
+  в PERSONNEL_INDEX_SYNC_SECONDS по updated_at (с запасом _SYNC_OVERLAP
+  на транзакции, закоммиченные позже своего now()).
+Полная загрузка – один раз при первом обращении: ключи собираются
+списком и сортируются один раз (insort – только для изменений).
+"""
+
+import asyncio
+import re
+import time
+from bisect import bisect_left, insort
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.personnel import Personnel
+from app.utils.names import get_short_name
+
+_SYNC_OVERLAP = timedelta(minutes=1)
+_NUMBER_SEPARATORS = re.compile(r"[^0-9a-zа-я]")
+
+
+@dataclass(frozen=True)
+class PersonnelEntry:
+    id: int
+    full_name: str
+    short_name: str
+    rank: Optional[str]
+    rank_priority: Optional[int]
+    platoon: Optional[str]
+    personal_number: Optional[str]
+    service_number: Optional[str]
+
+    @classmethod
+    def from_model(cls, person: Personnel) -> "PersonnelEntry":
+        return cls(
+            id=person.id,
+            full_name=person.full_name,
+            short_name=get_short_name(person.full_name),
+            rank=person.rank,
+            rank_priority=person.rank_priority,
+            platoon=person.platoon,
+            personal_number=person.personal_number,
+            service_number=person.service_number,
+        )
+
+    def sort_key(self) -> tuple:
+        return (self.rank_priority is None, self.rank_priority or 0, self.full_name, self.id)
+
+
+def _normalize(value: str) -> str:
+    return value.lower().replace("ё", "е")
+
+
+def _tokens(entry: PersonnelEntry) -> set[str]:
+    tokens = set(_normalize(entry.full_name).split())
+    tokens.update(_normalize(entry.short_name).split())
+    for number in (entry.personal_number, entry.service_number):
+        if number:
+            normalized = _normalize(number.strip())
+            tokens.add(normalized)
+            # «А-123456» находится и по «123456», и по «а123456»
+            tokens.add(_NUMBER_SEPARATORS.sub("", normalized))
+            tokens.update(part for part in _NUMBER_SEPARATORS.split(normalized) if part)
+    tokens.discard("")
+    return tokens
+
+
+class PersonnelIndex:
+    def __init__(self, sync_interval: float = 5.0) -> None:
+        self._sync_interval = sync_interval
+        self._keys: list[tuple[str, int]] = []
+        self._entries: dict[int, PersonnelEntry] = {}
+        self._tokens: dict[int, set[str]] = {}
+        self._loaded = False
+        self._watermark: Optional[datetime] = None
+        self._next_sync = 0.0
+        self._sync_lock = asyncio.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # ── Инкрементальные изменения ────────────────────────────────────────────
+
+    def upsert(self, person: Personnel) -> None:
+        if not person.is_active:
+            self.remove(person.id)
+            return
+        entry = PersonnelEntry.from_model(person)
+        self._drop_tokens(entry.id)
+        tokens = _tokens(entry)
+        for token in tokens:
+            insort(self._keys, (token, entry.id))
+        self._entries[entry.id] = entry
+        self._tokens[entry.id] = tokens
+
+    def load(self, people) -> None:
+        """Полная замена содержимого индекса активными из people."""
+        keys: list[tuple[str, int]] = []
+        entries: dict[int, PersonnelEntry] = {}
+        tokens_by_id: dict[int, set[str]] = {}
+        for person in people:
+            if not person.is_active:
+                continue
+            entry = PersonnelEntry.from_model(person)
+            tokens = _tokens(entry)
+            keys.extend((token, entry.id) for token in tokens)
+            entries[entry.id] = entry
+            tokens_by_id[entry.id] = tokens
+        keys.sort()
+        self._keys, self._entries, self._tokens = keys, entries, tokens_by_id
+
+    def remove(self, personnel_id: int) -> None:
+        self._drop_tokens(personnel_id)
+        self._entries.pop(personnel_id, None)
+
+    def _drop_tokens(self, personnel_id: int) -> None:
+        for token in self._tokens.pop(personnel_id, ()):
+            position = bisect_left(self._keys, (token, personnel_id))
+            if position < len(self._keys) and self._keys[position] == (token, personnel_id):
+                del self._keys[position]
+
+    # ── Поиск ─────────────────────────────────────────────────────────────────
+
+    def _prefix_ids(self, prefix: str) -> set[int]:
+        ids = set()
+        position = bisect_left(self._keys, (prefix,))
+        while position < len(self._keys) and self._keys[position][0].startswith(prefix):
+            ids.add(self._keys[position][1])
+            position += 1
+        return ids
+
+    def search(self, query: str, limit: int = 10) -> list[PersonnelEntry]:
+        words = _normalize(query).split()
+        if not words:
+            return []
+        # Сначала самое длинное слово – у него меньше всего совпадений
+        words.sort(key=len, reverse=True)
+        ids = self._prefix_ids(words[0])
+        for word in words[1:]:
+            if not ids:
+                break
+            ids &= self._prefix_ids(word)
+        entries = sorted((self._entries[i] for i in ids), key=PersonnelEntry.sort_key)
+        return entries[:limit]
+
+    # ── Синхронизация с БД ───────────────────────────────────────────────────
+
+    async def ensure_fresh(self, db: AsyncSession) -> None:
+        """Первая загрузка или догоняющая синхронизация по updated_at."""
+        if self._loaded and time.monotonic() < self._next_sync:
+            return
+        async with self._sync_lock:
+            if self._loaded and time.monotonic() < self._next_sync:
+                return
+            synced_at = await db.scalar(select(func.now()))
+            if self._loaded:
+                stmt = select(Personnel).where(Personnel.updated_at >= self._watermark - _SYNC_OVERLAP)
+                for person in (await db.execute(stmt)).scalars():
+                    self.upsert(person)
+            else:
+                self.load((await db.execute(select(Personnel).where(Personnel.is_active.is_(True)))).scalars())
+            self._loaded = True
+            self._watermark = synced_at
+            self._next_sync = time.monotonic() + self._sync_interval
+
+    def stats(self) -> dict[str, object]:
+        return {
+            "size": len(self._entries),
+            "keys": len(self._keys),
+            "synced_at": self._watermark.isoformat() if self._watermark else None,
+        }
+
+
+personnel_index = PersonnelIndex(sync_interval=settings.PERSONNEL_INDEX_SYNC_SECONDS)
@@ -1,11 +1,23 @@
+from datetime import datetime, timezone
 from typing import Optional
 
-from sqlalchemy import func, or_, select
+from sqlalchemy import JSON, Integer, Select, any_, bindparam, func, literal, literal_column, select, type_coerce, update
+from sqlalchemy.dialects.postgresql import ARRAY, aggregate_order_by
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.pagination import SortKey, TotalMode, paginate
+from app.core.projection import response_columns, select_fields
+from app.core.search import PERSONNEL_DOCUMENT, matches
+from app.core.stats_cache import stats_cache
+from app.models.equipment import Equipment
 from app.models.personnel import Personnel
-from app.schemas.personnel import PersonnelCreate, PersonnelUpdate
+from app.models.phone import Phone
+from app.models.storage_and_passes import StorageAndPass
+from app.schemas.personnel import (
+    AssetEquipment, AssetPhone, AssetStorageAndPass, PersonnelCreate, PersonnelResponse, PersonnelUpdate,
+)
+from app.services.personnel_index import PersonnelEntry, personnel_index
 
 RANK_PRIORITY = {
     "Маршал Российской Федерации": 1,
@@ -32,44 +44,82 @@ RANK_PRIORITY = {
 }
 
 
+PERSONNEL_SORT = (
+    SortKey(Personnel.rank_priority, nullable=True),
+    SortKey(Personnel.position, nullable=True),
+    SortKey(Personnel.full_name),
+    SortKey(Personnel.id),
+)
+
+PERSONNEL_LIST_COLUMNS = response_columns(PersonnelResponse, Personnel)
+
+
+def _assets_json(schema, model, owner_column, *order):
+    """
+    json-массив закреплённых за военнослужащим записей model (поля schema)
+    – коррелированный подзапрос по индексу owner_column.
+    """
+    item = func.json_build_object(*(part for name in schema.model_fields for part in (literal(name), getattr(model, name))))
+    items = func.json_agg(aggregate_order_by(item, *order))
+    return type_coerce(
+        select(func.coalesce(items, literal_column("'[]'::json")))
+        .where(owner_column == Personnel.id, model.is_active.is_(True))
+        .scalar_subquery(),
+        JSON,
+    )
+
+
+ASSET_COLUMNS = (
+    Personnel.id.label("personnel_id"),
+    Personnel.full_name,
+    Personnel.rank,
+    Personnel.platoon,
+    _assets_json(AssetPhone, Phone, Phone.owner_id, Phone.storage_location, Phone.id).label("phones"),
+    _assets_json(
+        AssetEquipment, Equipment, Equipment.current_owner_id,
+        Equipment.inventory_number.asc().nullslast(), Equipment.id,
+    ).label("equipment"),
+    _assets_json(
+        AssetStorageAndPass, StorageAndPass, StorageAndPass.assigned_to_id,
+        StorageAndPass.asset_type, StorageAndPass.serial_number,
+    ).label("storage_and_passes"),
+)
+
+
 class PersonnelService:
     def __init__(self, db: AsyncSession):
         self.db = db
 
-    async def get_list(
+    def list_query(
         self,
-        skip: int = 0,
-        limit: int = 100,
         status: Optional[str] = None,
         search: Optional[str] = None,
-    ) -> tuple[list[Personnel], int]:
+        fields: Optional[str] = None,
+    ) -> Select:
+        """Выборка списка без сортировки и страниц – общая для get_list и экспорта."""
         filters = [Personnel.is_active.is_(True)]
         if status:
             filters.append(Personnel.status == status)
         if search:
-            filters.append(
-                or_(
-                    Personnel.full_name.ilike(f"%{search}%"),
-                    Personnel.rank.ilike(f"%{search}%"),
-                    Personnel.position.ilike(f"%{search}%"),
-                    Personnel.platoon.ilike(f"%{search}%"),
-                    Personnel.personal_number.ilike(f"%{search}%"),
-                    Personnel.service_number.ilike(f"%{search}%"),
-                )
-            )
-
-        total_stmt = select(func.count(Personnel.id)).where(*filters)
-        total = (await self.db.execute(total_stmt)).scalar_one()
+            filters.append(matches(PERSONNEL_DOCUMENT, search))
+        return select(*select_fields(PERSONNEL_LIST_COLUMNS, fields, PERSONNEL_SORT)).where(*filters)
 
-        items_stmt = (
-            select(Personnel)
-            .where(*filters)
-            .order_by(Personnel.rank_priority.asc().nullslast(), Personnel.full_name.asc())
-            .offset(skip)
-            .limit(limit)
+    async def get_list(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        status: Optional[str] = None,
+        search: Optional[str] = None,
+        cursor: Optional[str] = None,
+        with_total: TotalMode = "exact",
+        fields: Optional[str] = None,
+    ) -> tuple[list[dict], Optional[int], Optional[str]]:
+        return await paginate(
+            self.db, self.list_query(status, search, fields), PERSONNEL_SORT,
+            skip=skip, limit=limit, cursor=cursor,
+            with_total=with_total,
+            estimate_from=Personnel.__table__ if not (status or search) else None,
         )
-        items = (await self.db.execute(items_stmt)).scalars().all()
-        return items, total
 
     async def get_by_id(self, personnel_id: int) -> Optional[Personnel]:
         stmt = select(Personnel).where(Personnel.id == personnel_id, Personnel.is_active.is_(True))
@@ -81,12 +131,14 @@ class PersonnelService:
     async def create(self, personnel_data: PersonnelCreate) -> Personnel:
         try:
             data = personnel_data.model_dump()
-            data["rank_priority"] = self._calc_rank_priority(data.get("rank"))
+            if data.get("rank_priority") is None:
+                data["rank_priority"] = self._calc_rank_priority(data.get("rank"))
 
             personnel = Personnel(**data)
             self.db.add(personnel)
             await self.db.commit()
             await self.db.refresh(personnel)
+            personnel_index.upsert(personnel)
             return personnel
         except IntegrityError as exc:
             await self.db.rollback()
@@ -98,21 +150,62 @@ class PersonnelService:
             return None
 
         update_data = personnel_data.model_dump(exclude_unset=True)
-        if "rank" in update_data:
+        if "rank" in update_data and update_data.get("rank_priority") is None:
             update_data["rank_priority"] = self._calc_rank_priority(update_data["rank"])
 
         for field, value in update_data.items():
             setattr(personnel, field, value)
 
-        await self.db.commit()
+        try:
+            await self.db.commit()
+        except IntegrityError as exc:
+            await self.db.rollback()
+            raise ValueError("Личный номер уже существует") from exc
         await self.db.refresh(personnel)
+        personnel_index.upsert(personnel)
         return personnel
 
     async def delete(self, personnel_id: int) -> bool:
+        """Деактивирует военнослужащего, предварительно отозвав закреплённые за ним носители и технику."""
         personnel = await self.get_by_id(personnel_id)
         if not personnel:
             return False
 
-        personnel.is_active = False
+        async with self.db.begin_nested():
+            # 1. Отозвать все носители и пропуска
+            await self.db.execute(
+                update(StorageAndPass)
+                .where(StorageAndPass.assigned_to_id == personnel_id)
+                .values(status="stock", assigned_to_id=None, return_date=datetime.now(timezone.utc))
+            )
+            # 2. Освободить технику
+            await self.db.execute(
+                update(Equipment)
+                .where(Equipment.current_owner_id == personnel_id)
+                .values(current_owner_id=None)
+            )
+            # 3. Деактивировать
+            personnel.is_active = False
+
         await self.db.commit()
+        personnel_index.remove(personnel_id)
+        stats_cache.bump("equipment", "storage_and_pass")
         return True
+
+    async def get_assets(self, personnel_ids: list[int]) -> list[dict]:
+        """
+        Телефоны, техника и носители/пропуска для каждого из personnel_ids
+        одним запросом (json_agg-подзапросы по индексам владельца).
+        Порядок – как в personnel_ids; удалённые и несуществующие пропускаются.
+        """
+        ids = list(dict.fromkeys(personnel_ids))
+        stmt = select(*ASSET_COLUMNS).where(
+            Personnel.id == any_(bindparam("personnel_ids", ids, type_=ARRAY(Integer))),
+            Personnel.is_active.is_(True),
+        )
+        found = {row["personnel_id"]: dict(row) for row in (await self.db.execute(stmt)).mappings()}
+        return [found[personnel_id] for personnel_id in ids if personnel_id in found]
+
+    async def suggest(self, query: str, limit: int = 10) -> list[PersonnelEntry]:
+        await personnel_index.ensure_fresh(self.db)
+        return personnel_index.search(query, limit)
@@ -1,30 +1,68 @@
 import logging
 from typing import Optional
 
-from sqlalchemy import func, or_, select, update
+from sqlalchemy import Integer, Numeric, Select, any_, bindparam, cast, func, select, union, update
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import joinedload
 
+from app.core.facets import Facet, facet_counts
+from app.core.pagination import SortKey, TotalMode, paginate
+from app.core.projection import response_columns, select_fields
+from app.core.search import PERSONNEL_DOCUMENT, PHONE_DOCUMENT, matches
 from app.core.validators import sanitize_html
+from app.models.asset_counter import AssetCounter
 from app.models.personnel import Personnel
 from app.models.phone import Phone
-from app.schemas.phone import PhoneCreate, PhoneUpdate
+from app.schemas.phone import PhoneCreate, PhoneResponse, PhoneUpdate
 
 logger = logging.getLogger(__name__)
 
+PHONE_SORT = (SortKey(Phone.storage_location, nullable=True), SortKey(Phone.id))
+
+PHONE_LIST_COLUMNS = response_columns(
+    PhoneResponse, Phone,
+    owner_full_name=Personnel.full_name,
+    owner_rank=Personnel.rank,
+)
+
+# Отчёт о несданных: взвод, затем номер ячейки по числу («Ячейка 2» < «Ячейка 10»)
+STATUS_REPORT_ORDER = (
+    Personnel.platoon.asc().nullslast(),
+    cast(func.substring(Phone.storage_location, r"\d+"), Numeric).asc().nullslast(),
+    Phone.storage_location.asc().nullslast(),
+    Phone.id,
+)
+
+
+def _phone_search_filter(term: str):
+    """
+    Совпадение по документу телефона или по документу владельца.
+    OR через JOIN не индексируется – каждая ветка UNION идёт по своему
+    триграммному индексу.
+    """
+    return Phone.id.in_(
+        union(
+            select(Phone.id).where(matches(PHONE_DOCUMENT, term)),
+            select(Phone.id)
+            .join(Personnel, Phone.owner_id == Personnel.id)
+            .where(matches(PERSONNEL_DOCUMENT, term)),
+        )
+    )
+
 
 class PhoneService:
     def __init__(self, db: AsyncSession):
         self.db = db
 
-    async def get_list(
+    def list_query(
         self,
-        skip: int = 0,
-        limit: int = 100,
         status: Optional[str] = None,
         search: Optional[str] = None,
         owner_id: Optional[int] = None,
-    ) -> tuple[list[Phone], int]:
+        fields: Optional[str] = None,
+    ) -> Select:
+        """Выборка списка без сортировки и страниц – общая для get_list и экспорта."""
         filters = [Phone.is_active.is_(True)]
         if status:
             filters.append(Phone.status == status)
@@ -32,36 +70,33 @@ class PhoneService:
             filters.append(Phone.owner_id == owner_id)
 
         if search:
-            search_clean = sanitize_html(search)
-            term = f"%{search_clean}%"
-            filters.append(
-                or_(
-                    Phone.model.ilike(term),
-                    Phone.color.ilike(term),
-                    Phone.imei_1.ilike(term),
-                    Phone.imei_2.ilike(term),
-                    Phone.serial_number.ilike(term),
-                    Phone.storage_location.ilike(term),
-                    Personnel.full_name.ilike(term),
-                    Personnel.rank.ilike(term),
-                )
-            )
+            filters.append(_phone_search_filter(sanitize_html(search)))
 
-        total_stmt = select(func.count(Phone.id)).select_from(Phone)
-        items_stmt = select(Phone).options(joinedload(Phone.owner)).where(*filters)
-        if search:
-            total_stmt = total_stmt.join(Personnel, Phone.owner_id == Personnel.id).where(*filters)
-            items_stmt = items_stmt.join(Personnel, Phone.owner_id == Personnel.id)
-        else:
-            total_stmt = total_stmt.where(*filters)
+        return (
+            select(*select_fields(PHONE_LIST_COLUMNS, fields, PHONE_SORT))
+            .outerjoin(Personnel, Phone.owner_id == Personnel.id)
+            .where(*filters)
+        )
 
-        total = (await self.db.execute(total_stmt)).scalar_one()
-        items = (
-            await self.db.execute(
-                items_stmt.order_by(Phone.storage_location).offset(skip).limit(limit)
-            )
-        ).scalars().all()
-        return items, total
+    async def get_list(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        status: Optional[str] = None,
+        search: Optional[str] = None,
+        owner_id: Optional[int] = None,
+        cursor: Optional[str] = None,
+        with_total: TotalMode = "exact",
+        fields: Optional[str] = None,
+    ) -> tuple[list[dict], Optional[int], Optional[str]]:
+        stmt = self.list_query(status, search, owner_id, fields)
+        unfiltered = not (status or owner_id or search)
+        return await paginate(
+            self.db, stmt, PHONE_SORT,
+            skip=skip, limit=limit, cursor=cursor,
+            with_total=with_total,
+            estimate_from=Phone.__table__ if unfiltered else None,
+        )
 
     async def get_by_id(self, phone_id: int) -> Optional[Phone]:
         stmt = (
@@ -103,70 +138,110 @@ class PhoneService:
         await self.db.commit()
         return True
 
-    async def batch_checkin(self, phone_ids: list[int]) -> int:
-        phones_stmt = select(Phone).where(Phone.id.in_(phone_ids), Phone.is_active.is_(True))
-        phones = (await self.db.execute(phones_stmt)).scalars().all()
-
-        found_ids = {p.id for p in phones}
-        missing = set(phone_ids) - found_ids
-        if missing:
-            raise ValueError(f"Телефоны не найдены: {sorted(missing)}")
-
-        already_checked = [p.id for p in phones if p.status == "Сдан"]
-        if already_checked:
-            raise ValueError(f"Телефоны уже сданы: {already_checked}")
-
+    async def _batch_set_status(self, phone_ids: list[int], target: str, best_effort: bool) -> dict[str, list[int]]:
+        """
+        Один оператор: UPDATE ... WHERE id = ANY(:ids) AND status <> target
+        RETURNING id в CTE и LEFT JOIN к активным телефонам из списка – сразу
+        видно, какие обновлены, какие уже в нужном статусе, каких нет.
+        Без best_effort любой пропущенный или отсутствующий телефон отменяет
+        всю пачку (ValueError), с best_effort применяется то, что можно.
+        """
+        ids = list(dict.fromkeys(phone_ids))
+        ids_param = bindparam("phone_ids", ids, type_=ARRAY(Integer))
+        updated = (
+            update(Phone)
+            .where(Phone.id == any_(ids_param), Phone.is_active.is_(True), Phone.status.is_distinct_from(target))
+            .values(status=target)
+            .returning(Phone.id)
+            .cte("updated")
+        )
+        # Основной запрос видит снимок до UPDATE – статусы здесь прежние
+        stmt = (
+            select(Phone.id, updated.c.id.is_not(None).label("applied"))
+            .outerjoin(updated, updated.c.id == Phone.id)
+            .where(Phone.id == any_(ids_param), Phone.is_active.is_(True))
+        )
         try:
-            stmt = update(Phone).where(Phone.id.in_(phone_ids)).values(status="Сдан")
-            result = await self.db.execute(stmt)
-            await self.db.commit()
-            return result.rowcount or 0
+            found = {row.id: row.applied for row in await self.db.execute(stmt)}
         except Exception as exc:
             await self.db.rollback()
-            logger.error("Batch checkin error: %s", exc)
-            raise ValueError(f"Ошибка массовой сдачи: {str(exc)}") from exc
-
-    async def batch_checkout(self, phone_ids: list[int]) -> int:
-        phones_stmt = select(Phone).where(Phone.id.in_(phone_ids), Phone.is_active.is_(True))
-        phones = (await self.db.execute(phones_stmt)).scalars().all()
-
-        found_ids = {p.id for p in phones}
-        missing = set(phone_ids) - found_ids
-        if missing:
-            raise ValueError(f"Телефоны не найдены: {sorted(missing)}")
-
-        already_out = [p.id for p in phones if p.status == "Выдан"]
-        if already_out:
-            raise ValueError(f"Телефоны уже выданы: {already_out}")
-
-        try:
-            stmt = update(Phone).where(Phone.id.in_(phone_ids)).values(status="Выдан")
-            result = await self.db.execute(stmt)
-            await self.db.commit()
-            return result.rowcount or 0
-        except Exception as exc:
+            logger.error("Batch status error: %s", exc)
+            action = "сдачи" if target == "Сдан" else "выдачи"
+            raise ValueError(f"Ошибка массовой {action}: {str(exc)}") from exc
+
+        result = {
+            "applied": [phone_id for phone_id in ids if found.get(phone_id)],
+            "skipped": [phone_id for phone_id in ids if found.get(phone_id) is False],
+            "missing": [phone_id for phone_id in ids if phone_id not in found],
+        }
+        if not best_effort and (result["missing"] or result["skipped"]):
             await self.db.rollback()
-            logger.error("Batch checkout error: %s", exc)
-            raise ValueError(f"Ошибка массовой выдачи: {str(exc)}") from exc
-
-    async def get_status_report(self) -> dict:
-        total_stmt = select(func.count(Phone.id)).where(Phone.is_active.is_(True))
-        checked_in_stmt = select(func.count(Phone.id)).where(Phone.is_active.is_(True), Phone.status == "Сдан")
-        checked_out_stmt = select(func.count(Phone.id)).where(Phone.is_active.is_(True), Phone.status == "Выдан")
-        not_submitted_stmt = (
-            select(Phone)
-            .options(joinedload(Phone.owner))
-            .where(Phone.is_active.is_(True), Phone.status == "Выдан")
+            if result["missing"]:
+                raise ValueError(f"Телефоны не найдены: {result['missing']}")
+            raise ValueError(f"Телефоны уже {'сданы' if target == 'Сдан' else 'выданы'}: {result['skipped']}")
+        await self.db.commit()
+        return result
+
+    async def batch_checkin(self, phone_ids: list[int], best_effort: bool = False) -> dict[str, list[int]]:
+        return await self._batch_set_status(phone_ids, "Сдан", best_effort)
+
+    async def batch_checkout(self, phone_ids: list[int], best_effort: bool = False) -> dict[str, list[int]]:
+        return await self._batch_set_status(phone_ids, "Выдан", best_effort)
+
+    async def get_status_counts(self) -> dict[str, int]:
+        """Сдано/выдано из счётчиков asset_counters – не зависит от числа телефонов."""
+        total, breakdown = await facet_counts(
+            self.db,
+            AssetCounter,
+            [AssetCounter.entity == "phone", AssetCounter.is_active.is_(True)],
+            [Facet("by_status", AssetCounter.status)],
+            measure=AssetCounter.count,
         )
+        return {
+            "total_phones": total,
+            "checked_in": breakdown["by_status"].get("Сдан", 0),
+            "checked_out": breakdown["by_status"].get("Выдан", 0),
+        }
 
-        total = (await self.db.execute(total_stmt)).scalar_one()
-        checked_in = (await self.db.execute(checked_in_stmt)).scalar_one()
-        checked_out = (await self.db.execute(checked_out_stmt)).scalar_one()
-        phones_not_submitted = (await self.db.execute(not_submitted_stmt)).scalars().all()
+    async def get_status_report(self, skip: int = 0, limit: int = 100, platoon: Optional[str] = None) -> dict:
+        """
+        Счётчики + страница несданных телефонов по взводам, внутри взвода –
+        по номеру ячейки («Ячейка 2» раньше «Ячейка 10»). Строки выбираются
+        колонками, без загрузки ORM-объектов владельцев.
+        """
+        report = await self.get_status_counts()
+
+        filters = [Phone.is_active.is_(True), Phone.status == "Выдан"]
+        if platoon:
+            filters.append(Personnel.platoon == platoon)
+        stmt = (
+            select(
+                *Phone.__table__.columns,
+                Personnel.full_name.label("owner_full_name"),
+                Personnel.rank.label("owner_rank"),
+                Personnel.platoon.label("owner_platoon"),
+                func.count().over().label("not_submitted_total"),
+            )
+            .join(Personnel, Phone.owner_id == Personnel.id)
+            .where(*filters)
+            .order_by(*STATUS_REPORT_ORDER)
+            .offset(skip)
+            .limit(limit)
+        )
+        rows = (await self.db.execute(stmt)).mappings().all()
+
+        if rows:
+            not_submitted_total = rows[0]["not_submitted_total"]
+        elif skip:
+            # Страница за концом списка – окно не дало числа; при skip == 0 пустая страница и есть 0
+            not_submitted_total = await self.db.scalar(
+                select(func.count()).select_from(Phone).join(Personnel, Phone.owner_id == Personnel.id).where(*filters)
+            ) or 0
+        else:
+            not_submitted_total = 0
 
         return {
-            "total_phones": total,
-            "checked_in": checked_in,
-            "checked_out": checked_out,
-            "phones_not_submitted": phones_not_submitted,
+            **report,
+            "not_submitted_total": not_submitted_total,
+            "phones_not_submitted": rows,
         }
@@ -0,0 +1,101 @@
+"""
+Сквозной поиск по всем учётным сущностям.
+
+Все таблицы опрашиваются одним запросом UNION ALL: каждая ветка фильтруется
+по своему поисковому документу (триграммный GIN-индекс, app.core.search)
+и заранее обрезается до limit лучших строк, общий результат сортируется
+по word_similarity запроса к документу.
+"""
+
+from typing import Optional, Sequence
+
+from sqlalchemy import func, literal, select, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.search import (
+    EQUIPMENT_DOCUMENT,
+    PERSONNEL_DOCUMENT,
+    PHONE_DOCUMENT,
+    STORAGE_AND_PASS_DOCUMENT,
+    STORAGE_DEVICE_DOCUMENT,
+    matches,
+)
+from app.core.validators import sanitize_html
+from app.models.equipment import Equipment, StorageDevice
+from app.models.personnel import Personnel
+from app.models.phone import Phone
+from app.models.storage_and_passes import StorageAndPass
+
+SEARCH_TYPES = ("equipment", "storage_device", "phone", "storage_and_pass", "personnel")
+
+
+def _branch(search_type: str, model, document, title, subtitle, term: str, limit: int):
+    rank = func.word_similarity(term, document)
+    return (
+        select(
+            literal(search_type).label("type"),
+            model.id.label("id"),
+            func.coalesce(title, "").label("title"),
+            subtitle.label("subtitle"),
+            rank.label("rank"),
+        )
+        .where(model.is_active.is_(True), matches(document, term))
+        .order_by(rank.desc())
+        .limit(limit)
+    )
+
+
+_BRANCHES = {
+    "equipment": lambda term, limit: _branch(
+        "equipment", Equipment, EQUIPMENT_DOCUMENT,
+        func.coalesce(Equipment.inventory_number, Equipment.serial_number, Equipment.model),
+        func.concat_ws(" ", Equipment.manufacturer, Equipment.model, Equipment.serial_number),
+        term, limit,
+    ),
+    "storage_device": lambda term, limit: _branch(
+        "storage_device", StorageDevice, STORAGE_DEVICE_DOCUMENT,
+        func.coalesce(StorageDevice.inventory_number, StorageDevice.serial_number),
+        func.concat_ws(" ", StorageDevice.device_type, StorageDevice.manufacturer, StorageDevice.model),
+        term, limit,
+    ),
+    "phone": lambda term, limit: _branch(
+        "phone", Phone, PHONE_DOCUMENT,
+        func.concat_ws(" ", Phone.model, Phone.color),
+        func.concat_ws(" ", Phone.imei_1, Phone.storage_location),
+        term, limit,
+    ),
+    "storage_and_pass": lambda term, limit: _branch(
+        "storage_and_pass", StorageAndPass, STORAGE_AND_PASS_DOCUMENT,
+        StorageAndPass.serial_number,
+        func.concat_ws(" ", StorageAndPass.manufacturer, StorageAndPass.model),
+        term, limit,
+    ),
+    "personnel": lambda term, limit: _branch(
+        "personnel", Personnel, PERSONNEL_DOCUMENT,
+        Personnel.full_name,
+        func.concat_ws(" ", Personnel.rank, Personnel.position, Personnel.platoon),
+        term, limit,
+    ),
+}
+
+
+class SearchService:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def search(self, query: str, limit: int = 20, types: Optional[Sequence[str]] = None) -> list[dict]:
+        term = sanitize_html(query).strip()
+        if not term:
+            return []
+
+        branches = [build(term, limit) for name, build in _BRANCHES.items() if types is None or name in types]
+        if not branches:
+            return []
+
+        combined = union_all(*branches).subquery()
+        stmt = (
+            select(combined)
+            .order_by(combined.c.rank.desc(), combined.c.type, combined.c.id)
+            .limit(limit)
+        )
+        return [dict(row) for row in (await self.db.execute(stmt)).mappings().all()]
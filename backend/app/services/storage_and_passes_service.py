@@ -1,15 +1,38 @@
 from datetime import datetime, timezone
 from typing import Optional
 
-from sqlalchemy import func, or_, select
+from sqlalchemy import Select, select
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import joinedload
 
+from app.core.facets import Facet, facet_counts
+from app.core.pagination import SortKey, TotalMode, paginate
+from app.core.projection import response_columns, select_fields
+from app.core.search import STORAGE_AND_PASS_DOCUMENT, matches
+from app.core.stats_cache import stats_cache
 from app.core.validators import sanitize_html
+from app.models.asset_counter import AssetCounter
 from app.models.personnel import Personnel
 from app.models.storage_and_passes import StorageAndPass
-from app.schemas.storage_and_passes import AssignmentRequest, StorageAndPassCreate, StorageAndPassUpdate
+from app.schemas.storage_and_passes import (
+    AssignmentRequest,
+    StorageAndPassCreate,
+    StorageAndPassResponse,
+    StorageAndPassUpdate,
+)
+
+STORAGE_AND_PASS_SORT = (
+    SortKey(StorageAndPass.asset_type),
+    SortKey(StorageAndPass.serial_number),
+    SortKey(StorageAndPass.id),
+)
+
+STORAGE_AND_PASS_LIST_COLUMNS = response_columns(
+    StorageAndPassResponse, StorageAndPass,
+    assigned_to_name=Personnel.full_name,
+    assigned_to_rank=Personnel.rank,
+)
 
 
 class StorageAndPassService:
@@ -19,16 +42,7 @@ class StorageAndPassService:
     def _search_filters(self, search: Optional[str]) -> list:
         if not search:
             return []
-        escaped = sanitize_html(search)
-        like_term = f"%{escaped}%"
-        return [
-            or_(
-                StorageAndPass.serial_number.ilike(like_term),
-                StorageAndPass.model.ilike(like_term),
-                StorageAndPass.manufacturer.ilike(like_term),
-                StorageAndPass.notes.ilike(like_term),
-            )
-        ]
+        return [matches(STORAGE_AND_PASS_DOCUMENT, sanitize_html(search))]
 
     async def get_statistics(
         self,
@@ -36,68 +50,73 @@ class StorageAndPassService:
         status: Optional[str] = None,
         search: Optional[str] = None,
     ) -> dict[str, object]:
-        filters = [StorageAndPass.is_active.is_(True), *self._search_filters(search)]
-        if asset_type:
-            filters.append(StorageAndPass.asset_type == asset_type)
-        if status:
-            filters.append(StorageAndPass.status == status)
-
-        total_stmt = select(func.count(StorageAndPass.id)).where(*filters)
-        total_assets = (await self.db.execute(total_stmt)).scalar_one()
-
-        status_filters = [StorageAndPass.is_active.is_(True), *self._search_filters(search)]
-        if asset_type:
-            status_filters.append(StorageAndPass.asset_type == asset_type)
-        status_stmt = (
-            select(StorageAndPass.status, func.count(StorageAndPass.id))
-            .where(*status_filters)
-            .group_by(StorageAndPass.status)
-        )
-        by_status = {row[0]: row[1] for row in (await self.db.execute(status_stmt)).all()}
-
-        type_filters = [StorageAndPass.is_active.is_(True), *self._search_filters(search)]
-        if status:
-            type_filters.append(StorageAndPass.status == status)
-        type_stmt = (
-            select(StorageAndPass.asset_type, func.count(StorageAndPass.id))
-            .where(*type_filters)
-            .group_by(StorageAndPass.asset_type)
+        cache_key = stats_cache.key(
+            "storage_and_pass", "storage_and_passes.stats",
+            asset_type=asset_type, status=status, search=search,
         )
-        by_type = {row[0]: row[1] for row in (await self.db.execute(type_stmt)).all()}
-
-        return {
+        cached = stats_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        if search:
+            filters = [StorageAndPass.is_active.is_(True), *self._search_filters(search)]
+            total_assets, breakdown = await facet_counts(self.db, StorageAndPass, filters, [
+                Facet("by_status", StorageAndPass.status, status or None),
+                Facet("by_type", StorageAndPass.asset_type, asset_type or None),
+            ])
+        else:
+            filters = [AssetCounter.entity == "storage_and_pass", AssetCounter.is_active.is_(True)]
+            total_assets, breakdown = await facet_counts(self.db, AssetCounter, filters, [
+                Facet("by_status", AssetCounter.status, status or None),
+                Facet("by_type", AssetCounter.asset_type, asset_type or None),
+            ], measure=AssetCounter.count)
+        by_status, by_type = breakdown["by_status"], breakdown["by_type"]
+
+        result = {
             "total_assets": total_assets,
             "by_type": by_type,
             "by_status": by_status,
         }
+        stats_cache.put(cache_key, result)
+        return result
 
-    async def get_list(
+    def list_query(
         self,
-        skip: int = 0,
-        limit: int = 100,
         asset_type: Optional[str] = None,
         status: Optional[str] = None,
         search: Optional[str] = None,
-    ) -> tuple[list[StorageAndPass], int]:
+        fields: Optional[str] = None,
+    ) -> Select:
+        """Выборка списка без сортировки и страниц – общая для get_list и экспорта."""
         filters = [StorageAndPass.is_active.is_(True), *self._search_filters(search)]
         if asset_type:
             filters.append(StorageAndPass.asset_type == asset_type)
         if status:
             filters.append(StorageAndPass.status == status)
 
-        total_stmt = select(func.count(StorageAndPass.id)).where(*filters)
-        total = (await self.db.execute(total_stmt)).scalar_one()
-
-        items_stmt = (
-            select(StorageAndPass)
-            .options(joinedload(StorageAndPass.assigned_to))
+        return (
+            select(*select_fields(STORAGE_AND_PASS_LIST_COLUMNS, fields, STORAGE_AND_PASS_SORT))
+            .outerjoin(Personnel, StorageAndPass.assigned_to_id == Personnel.id)
             .where(*filters)
-            .order_by(StorageAndPass.asset_type, StorageAndPass.serial_number)
-            .offset(skip)
-            .limit(limit)
         )
-        items = (await self.db.execute(items_stmt)).scalars().all()
-        return items, total
+
+    async def get_list(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        asset_type: Optional[str] = None,
+        status: Optional[str] = None,
+        search: Optional[str] = None,
+        cursor: Optional[str] = None,
+        with_total: TotalMode = "exact",
+        fields: Optional[str] = None,
+    ) -> tuple[list[dict], Optional[int], Optional[str]]:
+        return await paginate(
+            self.db, self.list_query(asset_type, status, search, fields), STORAGE_AND_PASS_SORT,
+            skip=skip, limit=limit, cursor=cursor,
+            with_total=with_total,
+            estimate_from=StorageAndPass.__table__ if not (asset_type or status or search) else None,
+        )
 
     async def get_by_id(self, asset_id: int) -> Optional[StorageAndPass]:
         stmt = (
@@ -112,6 +131,7 @@ class StorageAndPassService:
             asset = StorageAndPass(**asset_data.model_dump())
             self.db.add(asset)
             await self.db.commit()
+            stats_cache.bump("storage_and_pass")
             await self.db.refresh(asset)
             return asset
         except IntegrityError as exc:
@@ -129,6 +149,7 @@ class StorageAndPassService:
             for field, value in asset_data.model_dump(exclude_unset=True).items():
                 setattr(asset, field, value)
             await self.db.commit()
+            stats_cache.bump("storage_and_pass")
             await self.db.refresh(asset)
             return asset
         except IntegrityError as exc:
@@ -144,6 +165,7 @@ class StorageAndPassService:
 
         asset.is_active = False
         await self.db.commit()
+        stats_cache.bump("storage_and_pass")
         return True
 
     async def assign_to_personnel(self, asset_id: int, request: AssignmentRequest) -> StorageAndPass:
@@ -182,6 +204,7 @@ class StorageAndPassService:
             asset.notes = request.notes
 
         await self.db.commit()
+        stats_cache.bump("storage_and_pass")
         refreshed = await self.get_by_id(asset_id)
         if refreshed is None:
             raise ValueError("Актив не найден")
@@ -204,5 +227,6 @@ class StorageAndPassService:
         asset.return_date = datetime.now(timezone.utc)
 
         await self.db.commit()
+        stats_cache.bump("storage_and_pass")
         await self.db.refresh(asset)
         return asset
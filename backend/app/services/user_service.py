@@ -1,34 +1,41 @@
 from typing import Optional
 
-from sqlalchemy import func, or_, select
+from sqlalchemy import select
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.security import get_password_hash, verify_password
+from app.core.pagination import SortKey, TotalMode, paginate
+from app.core.search import USER_DOCUMENT, matches
+from app.core.principal_cache import principal_cache
+from app.core.security import get_password_hash_async, verify_password_async
 from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdate
 
+USER_SORT = (SortKey(User.username), SortKey(User.id))
+
 
 class UserService:
     def __init__(self, db: AsyncSession):
         self.db = db
 
-    async def get_list(self, skip: int = 0, limit: int = 100, search: Optional[str] = None) -> tuple[list[User], int]:
+    async def get_list(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        search: Optional[str] = None,
+        cursor: Optional[str] = None,
+        with_total: TotalMode = "exact",
+    ) -> tuple[list[User], Optional[int], Optional[str]]:
         filters = []
         if search:
-            filters.append(
-                or_(
-                    User.username.ilike(f"%{search}%"),
-                    User.full_name.ilike(f"%{search}%"),
-                )
-            )
-
-        total_stmt = select(func.count(User.id)).where(*filters)
-        total = (await self.db.execute(total_stmt)).scalar_one()
+            filters.append(matches(USER_DOCUMENT, search))
 
-        items_stmt = select(User).where(*filters).order_by(User.username).offset(skip).limit(limit)
-        items = (await self.db.execute(items_stmt)).scalars().all()
-        return items, total
+        return await paginate(
+            self.db, select(User).where(*filters), USER_SORT,
+            skip=skip, limit=limit, cursor=cursor,
+            with_total=with_total,
+            estimate_from=User.__table__ if not search else None,
+        )
 
     async def get_by_id(self, user_id: int) -> Optional[User]:
         stmt = select(User).where(User.id == user_id)
@@ -41,7 +48,7 @@ class UserService:
     async def create(self, user_data: UserCreate) -> User:
         user = User(
             username=user_data.username,
-            password_hash=get_password_hash(user_data.password),
+            password_hash=await get_password_hash_async(user_data.password),
             full_name=user_data.full_name,
             role=user_data.role,
             is_active=True,
@@ -68,6 +75,7 @@ class UserService:
             if existing and existing.id != user_id:
                 raise ValueError(f"Пользователь с логином '{update_dict['username']}' уже существует")
 
+        old_username = user.username
         for field, value in update_dict.items():
             setattr(user, field, value)
 
@@ -78,6 +86,8 @@ class UserService:
         except IntegrityError as exc:
             await self.db.rollback()
             raise ValueError("Ошибка при обновлении пользователя") from exc
+        finally:
+            principal_cache.invalidate(old_username, update_dict.get("username"))
 
     async def delete(self, user_id: int) -> bool:
         user = await self.get_by_id(user_id)
@@ -85,6 +95,7 @@ class UserService:
             return False
         user.is_active = False
         await self.db.commit()
+        principal_cache.invalidate(user.username)
         return True
 
     async def toggle_active(self, user_id: int) -> Optional[User]:
@@ -93,6 +104,7 @@ class UserService:
             return None
         user.is_active = not user.is_active
         await self.db.commit()
+        principal_cache.invalidate(user.username)
         await self.db.refresh(user)
         return user
 
@@ -100,12 +112,13 @@ class UserService:
         user = await self.get_by_id(user_id)
         if not user:
             return False
-        return verify_password(old_password, user.password_hash)
+        return await verify_password_async(old_password, user.password_hash)
 
     async def change_password(self, user_id: int, new_password: str) -> bool:
         user = await self.get_by_id(user_id)
         if not user:
             return False
-        user.password_hash = get_password_hash(new_password)
+        user.password_hash = await get_password_hash_async(new_password)
         await self.db.commit()
+        principal_cache.invalidate(user.username)
         return True
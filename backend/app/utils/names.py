@@ -0,0 +1,8 @@
+def get_short_name(full_name: str) -> str:
+    """Преобразует 'Иванов Иван Иванович' в 'Иванов И.И.'"""
+    parts = full_name.split()
+    if len(parts) >= 3:
+        return f"{parts[0]} {parts[1][0]}.{parts[2][0]}."
+    elif len(parts) == 2:
+        return f"{parts[0]} {parts[1][0]}."
+    return full_name
@@ -0,0 +1,136 @@
+"""
+Списочный ответ /equipment/: ORM + _enrich_equipment + pydantic против
+колоночной выборки + orjson.
+
+Старый путь – как было в маршруте: select(Equipment) с joinedload владельца,
+словари {**obj.__dict__, ...}, валидация EquipmentListResponse и
+сериализация в JSON. Новый путь – колонки EQUIPMENT_LIST_COLUMNS
+(поля схемы + ФИО/звание из JOIN), строки-словари и orjson.dumps.
+Оба пути сортируют и ограничивают одинаково; печатается медиана времени
+«запрос + сериализация» и размер ответа.
+
+Тестовые строки вставляются в equipment/personnel внутри транзакции,
+которая откатывается в конце.
+
+Запуск из каталога backend (нужна БД из DATABASE_URL):
+
+    python -m benchmarks.list_serialization_bench
+    python -m benchmarks.list_serialization_bench --rows 50000 --limit 100 --limit 1000
+"""
+
+import argparse
+import statistics
+import time
+
+from sqlalchemy import insert, select, text
+from sqlalchemy.orm import Session, joinedload
+
+from app.api.responses import fast_json
+from app.api.routes.equipment import _enrich_equipment
+from app.core.database_sync import engine
+from app.core.pagination import order_by
+from app.models.equipment import Equipment
+from app.models.personnel import Personnel
+from app.schemas.equipment import EquipmentListResponse
+from app.services.equipment_service import EQUIPMENT_LIST_COLUMNS, EQUIPMENT_SORT
+
+PERSONNEL = 500
+
+_FILL_EQUIPMENT = """
+INSERT INTO equipment (
+    equipment_type, inventory_number, serial_number, manufacturer, model, cpu,
+    ram_gb, storage_type, storage_capacity_gb, operating_system, current_owner_id,
+    current_location, status, notes, is_personal, is_active
+)
+SELECT
+    'Ноутбук',
+    'БЕНЧ-' || lpad(g::text, 7, '0'),
+    upper(substr(md5(g::text), 1, 12)),
+    (ARRAY['Dell', 'HP', 'Lenovo'])[1 + g % 3],
+    'Model ' || (g % 50),
+    'Intel Core i5-1135G7',
+    8 * (1 + g % 4),
+    'SSD',
+    256 * (1 + g % 4),
+    'Astra Linux',
+    (SELECT min(id) FROM personnel WHERE full_name LIKE 'Бенч %') + g % :personnel,
+    'Кабинет ' || (g % 300),
+    'В работе',
+    CASE WHEN g % 3 = 0 THEN repeat('Заметка ', 20) END,
+    false,
+    true
+FROM generate_series(1, :rows) AS g
+"""
+
+
+def _orm_path(session: Session, limit: int) -> bytes:
+    stmt = (
+        select(Equipment)
+        .options(joinedload(Equipment.current_owner))
+        .where(Equipment.is_active == True)  # noqa: E712
+        .order_by(*order_by(EQUIPMENT_SORT))
+        .limit(limit)
+    )
+    items = [_enrich_equipment(e) for e in session.execute(stmt).scalars().all()]
+    payload = EquipmentListResponse.model_validate({"total": None, "items": items, "next_cursor": None})
+    session.expunge_all()
+    return payload.model_dump_json().encode()
+
+
+def _rows_path(session: Session, limit: int) -> bytes:
+    stmt = (
+        select(*EQUIPMENT_LIST_COLUMNS.values())
+        .outerjoin(Personnel, Equipment.current_owner_id == Personnel.id)
+        .where(Equipment.is_active == True)  # noqa: E712
+        .order_by(*order_by(EQUIPMENT_SORT))
+        .limit(limit)
+    )
+    items = [dict(row) for row in session.execute(stmt).mappings()]
+    return fast_json({"total": None, "items": items, "next_cursor": None}).body
+
+
+def _measure(func, session: Session, limit: int, repeat: int) -> tuple[float, int]:
+    samples = []
+    body = b""
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = func(session, limit)
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples), len(body)
+
+
+def run(rows: int, limits: list[int], repeat: int) -> None:
+    with engine.connect() as conn:
+        transaction = conn.begin()
+        session = Session(bind=conn)
+        try:
+            started = time.perf_counter()
+            session.execute(insert(Personnel), [
+                {"full_name": f"Бенч {i} Тестович", "rank": "Рядовой", "rank_priority": 20}
+                for i in range(PERSONNEL)
+            ])
+            session.execute(text(_FILL_EQUIPMENT), {"rows": rows, "personnel": PERSONNEL})
+            session.execute(text("ANALYZE equipment"))
+            print(f"Подготовка {rows} строк: {time.perf_counter() - started:.1f} с\n")
+
+            for limit in limits:
+                orm_ms, orm_size = _measure(_orm_path, session, limit, repeat)
+                rows_ms, rows_size = _measure(_rows_path, session, limit, repeat)
+                print(f"limit={limit:<5} ORM+pydantic {orm_ms:8.2f} мс ({orm_size} Б)   "
+                      f"колонки+orjson {rows_ms:8.2f} мс ({rows_size} Б)   x{orm_ms / rows_ms:.1f}")
+        finally:
+            session.close()
+            transaction.rollback()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--limit", type=int, action="append", help="Размер страницы (можно несколько)")
+    parser.add_argument("--repeat", type=int, default=20, help="Повторов каждого замера")
+    args = parser.parse_args()
+    run(args.rows, args.limit or [100, 1000], args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Латентность RateLimiter.is_allowed / record_attempt для каждого хранилища.
+
+Запуск из каталога backend:
+
+    python -m benchmarks.rate_limit_bench
+    python -m benchmarks.rate_limit_bench --backends memory,mmap -n 50000
+    python -m benchmarks.rate_limit_bench --mode token_bucket --keys 200000
+
+Для postgres нужна применённая миграция login_rate_limits и доступная БД
+из DATABASE_URL; при ошибке подключения бэкенд пропускается.
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from app.core.rate_limit import MemoryStorage, RateLimiter, RateLimitStorage
+
+
+def _make_storage(name: str, tmp_dir: str) -> RateLimitStorage:
+    if name == "memory":
+        return MemoryStorage()
+    if name == "mmap":
+        from app.core.rate_limit_backends import MmapStorage
+
+        return MmapStorage(os.path.join(tmp_dir, "rate_limit_bench.bin"), slots=65536)
+    if name == "postgres":
+        from app.core.rate_limit_backends import PostgresStorage
+
+        return PostgresStorage()
+    raise ValueError(f"Неизвестный бэкенд: {name}")
+
+
+def _measure(func, keys: list[str]) -> list[float]:
+    samples = []
+    for key in keys:
+        started = time.perf_counter()
+        func(key)
+        samples.append((time.perf_counter() - started) * 1e6)
+    return samples
+
+
+def _summary(samples: list[float]) -> str:
+    samples = sorted(samples)
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+    return f"mean {statistics.fmean(samples):8.1f} µs   p50 {samples[len(samples) // 2]:8.1f} µs   p99 {p99:8.1f} µs"
+
+
+def run(backends: list[str], iterations: int, distinct_keys: int, mode: str) -> None:
+    keys = [f"10.{(i // 65536) % 256}.{(i // 256) % 256}.{i % 256}" for i in range(distinct_keys)]
+    workload = [keys[i % distinct_keys] for i in range(iterations)]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for name in backends:
+            try:
+                limiter = RateLimiter(max_attempts=5, window_seconds=900, storage=_make_storage(name, tmp_dir), mode=mode)
+                limiter.is_allowed("warmup")
+            except Exception as exc:
+                print(f"{name:<9} пропущен: {exc}")
+                continue
+
+            record = _measure(limiter.record_attempt, workload)
+            allowed = _measure(limiter.is_allowed, workload)
+            for key in keys:
+                limiter.reset(key)
+
+            print(f"{name:<9} record_attempt  {_summary(record)}")
+            print(f"{'':<9} is_allowed      {_summary(allowed)}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", default="memory,mmap,postgres")
+    parser.add_argument("-n", "--iterations", type=int, default=20000)
+    parser.add_argument("--keys", type=int, default=2000, help="Число различных IP")
+    parser.add_argument("--mode", choices=("fixed", "token_bucket"), default="fixed")
+    args = parser.parse_args()
+    run(args.backends.split(","), args.iterations, args.keys, args.mode)
+
+
+if __name__ == "__main__":
+    main()
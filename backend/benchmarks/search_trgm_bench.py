@@ -0,0 +1,145 @@
+"""
+Триграммный поиск по equipment на синтетических данных.
+
+В отдельной схеме bench_trgm создаётся таблица equipment с колонками
+поискового документа, заполняется N строками (по умолчанию 200 000),
+на неё строится тот же GIN-индекс, что в миграции add_trigram_search_indexes.
+Запросы собираются тем же кодом, что в EquipmentService (app.core.search).
+Для каждого запроса печатается план (использован ли индекс) и медиана
+времени – с индексом и с принудительным последовательным сканированием.
+
+Всё выполняется в одной транзакции и откатывается в конце.
+
+Запуск из каталога backend (нужна БД из DATABASE_URL и расширение pg_trgm):
+
+    python -m benchmarks.search_trgm_bench
+    python -m benchmarks.search_trgm_bench --rows 500000 --repeat 20
+"""
+
+import argparse
+import hashlib
+import json
+import statistics
+import time
+
+from sqlalchemy import func, select, text
+from sqlalchemy.dialects import postgresql
+
+from app.core.database_sync import engine
+from app.core.search import EQUIPMENT_DOCUMENT, matches
+from app.models.equipment import Equipment
+
+SCHEMA = "bench_trgm"
+
+_CREATE_TABLE = """
+CREATE TABLE equipment (
+    id serial PRIMARY KEY,
+    equipment_type varchar(50) NOT NULL,
+    inventory_number varchar(100),
+    serial_number varchar(100),
+    mni_serial_number varchar(100),
+    manufacturer varchar(100),
+    model varchar(255),
+    current_location varchar(255),
+    notes text,
+    is_active boolean DEFAULT true
+)
+"""
+
+_FILL = """
+INSERT INTO equipment (
+    equipment_type, inventory_number, serial_number, mni_serial_number,
+    manufacturer, model, current_location, notes
+)
+SELECT
+    (ARRAY['laptop', 'pc', 'server', 'monitor'])[1 + g % 4],
+    'ИНВ-' || lpad(g::text, 7, '0'),
+    upper(substr(md5(g::text), 1, 12)),
+    'МНИ-' || substr(md5('m' || g), 1, 8),
+    (ARRAY['Dell', 'HP', 'Lenovo', 'Asus', 'Acer'])[1 + g % 5],
+    (ARRAY['Latitude 5420', 'ProBook 450', 'ThinkPad T14', 'ExpertBook B1', 'TravelMate P2'])[1 + g % 5],
+    'Кабинет ' || (g % 300),
+    CASE WHEN g % 10 = 0 THEN 'Заметка ' || md5('n' || g) END
+FROM generate_series(1, :rows) AS g
+"""
+
+
+def _page_query(term: str):
+    """Как EquipmentService.get_list: страница + count(*) OVER ()."""
+    return (
+        select(Equipment.id, func.count().over())
+        .where(Equipment.is_active == True, matches(EQUIPMENT_DOCUMENT, term))  # noqa: E712
+        .order_by(Equipment.inventory_number, Equipment.id)
+        .limit(101)
+    )
+
+
+def _plan_nodes(plan: dict) -> list[str]:
+    node = plan["Node Type"] + (f" on {plan['Index Name']}" if "Index Name" in plan else "")
+    nodes = [node]
+    for child in plan.get("Plans", []):
+        nodes.extend(_plan_nodes(child))
+    return nodes
+
+
+def _measure(conn, stmt, repeat: int) -> tuple[float, list[str], int]:
+    compiled = stmt.compile(conn)
+    explain = conn.exec_driver_sql(f"EXPLAIN (ANALYZE, FORMAT JSON) {compiled}", compiled.params).scalar_one()
+    explain = explain if isinstance(explain, list) else json.loads(explain)
+    samples = []
+    rows = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        rows = len(conn.execute(stmt).all())
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples), _plan_nodes(explain[0]["Plan"]), rows
+
+
+def run(rows: int, repeat: int) -> None:
+    serial = hashlib.md5(str(rows // 2).encode()).hexdigest()[:12].upper()
+    terms = [serial[3:9], "4471", "ThinkPad", "Кабинет 17", "нет-такого"]
+
+    index_ddl = str(EQUIPMENT_DOCUMENT.compile(dialect=postgresql.dialect())).replace("equipment.", "")
+
+    with engine.connect() as conn:
+        transaction = conn.begin()
+        try:
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+            conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+            conn.execute(text(f"SET LOCAL search_path TO {SCHEMA}, public"))
+            conn.execute(text(_CREATE_TABLE))
+
+            started = time.perf_counter()
+            conn.execute(text(_FILL), {"rows": rows})
+            conn.execute(text(f"CREATE INDEX ix_equipment_search_trgm ON equipment USING gin (({index_ddl}) gin_trgm_ops)"))
+            conn.execute(text("ANALYZE equipment"))
+            print(f"Подготовка {rows} строк: {time.perf_counter() - started:.1f} с\n")
+
+            for term in terms:
+                stmt = _page_query(term)
+                indexed_ms, nodes, found = _measure(conn, stmt, repeat)
+                uses_index = any("ix_equipment_search_trgm" in node for node in nodes)
+
+                conn.execute(text("SET LOCAL enable_bitmapscan = off"))
+                conn.execute(text("SET LOCAL enable_indexscan = off"))
+                seq_ms, _, _ = _measure(conn, stmt, repeat)
+                conn.execute(text("RESET enable_bitmapscan"))
+                conn.execute(text("RESET enable_indexscan"))
+
+                print(f"{term!r:<14} строк {found:>4}   индекс {indexed_ms:8.2f} мс   seq scan {seq_ms:8.2f} мс   "
+                      f"индекс использован: {'да' if uses_index else 'НЕТ'}")
+                print(f"{'':<14} план: {' -> '.join(nodes)}")
+        finally:
+            transaction.rollback()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=10, help="Повторов каждого запроса")
+    args = parser.parse_args()
+    run(args.rows, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
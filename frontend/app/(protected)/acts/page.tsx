@@ -23,7 +23,7 @@ import type { Personnel } from "@/types/personnel";
 import type { ActType } from "@/types/acts";
 import { Button } from "@/components/ui/button";
 import { PersonnelSelect } from "@/components/shared/personnel-select";
-import { EquipmentSelect } from "@/components/shared/equipment-select";
+import { EquipmentSelect, EQUIPMENT_SELECT_FIELDS } from "@/components/shared/equipment-select";
 import { StorageAndPassSelect } from "@/components/shared/storage-and-pass-select";
 import {
   CONDITION_VALUES,
@@ -601,11 +601,12 @@ export default function ActsPage() {
   });
 
   const { data: equipmentData } = useQuery({
-    queryKey: ["equipment", { limit: 1000 }],
+    queryKey: ["equipment", { limit: 1000, fields: EQUIPMENT_SELECT_FIELDS }],
     queryFn: () => equipmentApi.getList({
       equipment_type: "Ноутбук",
       is_personal: false,
-      limit: 1000
+      limit: 1000,
+      fields: EQUIPMENT_SELECT_FIELDS,
     }),
     staleTime: 5 * 60 * 1000,
   });
@@ -28,6 +28,7 @@ import {
 	SelectValue,
 } from "@/components/ui/select";
 import { Textarea } from "@/components/ui/textarea";
+import { newIdempotencyKey } from "@/lib/api/client";
 import { equipmentApi } from "@/lib/api/equipment";
 import { personnelApi } from "@/lib/api/personnel";
 import { cleanEmptyStrings } from "@/lib/utils/transform";
@@ -58,6 +59,8 @@ export default function CreateMovementPage() {
 	const params = useParams();
 	const queryClient = useQueryClient();
 	const [error, setError] = useState("");
+	// Один ключ на форму: повторная отправка не создаст второе перемещение
+	const [idempotencyKey] = useState(newIdempotencyKey);
 
 	const equipmentId = parseInt(params.id as string, 10);
 
@@ -91,7 +94,7 @@ export default function CreateMovementPage() {
 
 	const createMutation = useMutation({
 		mutationFn: (data: MovementFormData) =>
-			equipmentApi.createMovement({ ...data, equipment_id: equipmentId }),
+			equipmentApi.createMovement({ ...data, equipment_id: equipmentId }, idempotencyKey),
 		onSuccess: () => {
 			queryClient.invalidateQueries({ queryKey: ["equipment", equipmentId] });
 			queryClient.invalidateQueries({
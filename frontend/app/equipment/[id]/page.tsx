@@ -98,7 +98,7 @@ export default function EquipmentDetailPage() {
 
 	const { data: movementHistory } = useQuery({
 		queryKey: ["equipment", equipmentId, "movements"],
-		queryFn: () => equipmentApi.getMovementHistory(equipmentId),
+		queryFn: () => equipmentApi.getMovementHistory(equipmentId, { fields: "*" }),
 		enabled: !!equipment,
 	});
 
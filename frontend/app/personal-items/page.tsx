@@ -363,11 +363,11 @@ export default function PersonalItemsPage() {
     queryFn: () => equipmentApi.getList({ equipment_type: "Ноутбук", is_personal: true, limit: 1 }),
   });
   const { data: statusReport } = useQuery({
-    queryKey: ["phones", "status-report"],
-    queryFn: () => phonesApi.getStatusReport(),
+    queryKey: ["phones", "status-counts"],
+    queryFn: () => phonesApi.getStatusCounts(),
   });
 
-  const notSubmittedCount = statusReport?.phones_not_submitted.length || 0;
+  const notSubmittedCount = statusReport?.checked_out ?? 0;
 
   return (
     <div className="min-h-screen bg-linear-to-br from-slate-900 via-slate-800 to-slate-900 p-8 text-foreground">
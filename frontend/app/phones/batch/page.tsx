@@ -33,12 +33,13 @@ export default function BatchPhonePage() {
 
 	// Отчёт по статусам
 	const { data: statusReport } = useQuery({
-		queryKey: ["phones", "status-report"],
-		queryFn: () => phonesApi.getStatusReport(),
+		queryKey: ["phones", "status-counts"],
+		queryFn: () => phonesApi.getStatusCounts(),
 	});
 
 	const checkinMutation = useMutation({
-		mutationFn: phonesApi.batchCheckin,
+		// Список мог устареть (телефон уже принят с другого места) – такие пропускаются
+		mutationFn: (phoneIds: number[]) => phonesApi.batchCheckin(phoneIds, true),
 		onSuccess: (data) => {
 			queryClient.invalidateQueries({ queryKey: ["phones"] });
 			setSelectedPhones([]);
@@ -50,7 +51,7 @@ export default function BatchPhonePage() {
 	});
 
 	const checkoutMutation = useMutation({
-		mutationFn: phonesApi.batchCheckout,
+		mutationFn: (phoneIds: number[]) => phonesApi.batchCheckout(phoneIds, true),
 		onSuccess: (data) => {
 			queryClient.invalidateQueries({ queryKey: ["phones"] });
 			setSelectedPhones([]);
@@ -105,7 +106,7 @@ export default function BatchPhonePage() {
 			: submittedPhones?.items || [];
 	const isLoading =
 		activeTab === "checkin" ? isLoadingIssued : isLoadingSubmitted;
-	const notSubmittedCount = statusReport?.phones_not_submitted.length || 0;
+	const notSubmittedCount = statusReport?.checked_out ?? 0;
 
 	return (
 		<div className="min-h-screen bg-linear-to-br from-slate-900 via-slate-800 to-slate-900 p-8 text-foreground">
@@ -23,6 +23,13 @@ interface EquipmentSelectProps {
  *   "АРМ Dell OptiPlex 7090 / уч.№ 001/002/003"
  *   "Принтер / S/N: ABC123"  (если нет инвентарного, но есть серийный)
  */
+/**
+ * Поля списка, нужные выбору техники (лейбл и поиск, включая notes –
+ * по умолчанию список их не отдаёт). Ключ запроса общий со страницей актов.
+ */
+export const EQUIPMENT_SELECT_FIELDS =
+	"equipment_type,inventory_number,serial_number,mni_serial_number,manufacturer,model,notes";
+
 function formatEquipmentLabel(e: {
 	equipment_type: string;
 	manufacturer?: string;
@@ -55,11 +62,12 @@ export function EquipmentSelect({
 	const inputRef = React.useRef<HTMLInputElement>(null);
 
 	const { data: equipmentData, isLoading } = useQuery({
-		queryKey: ["equipment", { limit: 1000 }],
+		queryKey: ["equipment", { limit: 1000, fields: EQUIPMENT_SELECT_FIELDS }],
 		queryFn: () => equipmentApi.getList({
 			equipment_type: "Ноутбук",
 			is_personal: false,
-			limit: 1000
+			limit: 1000,
+			fields: EQUIPMENT_SELECT_FIELDS,
 		}),
 		staleTime: 5 * 60 * 1000,
 	});
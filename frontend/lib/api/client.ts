@@ -45,6 +45,13 @@ function extractDetailMessage(data: unknown): string | null {
 
 const CSRF_EXEMPT = ["/api/auth/login", "/api/auth/logout", "/api/auth/csrf-token"];
 const MUTATING_METHODS = ["post", "put", "patch", "delete"];
+const IDEMPOTENT_METHODS = ["post", "put", "patch"];
+
+// crypto.randomUUID есть только в secure context (HTTPS/localhost)
+export function newIdempotencyKey(): string {
+  const bytes = crypto.getRandomValues(new Uint8Array(16));
+  return Array.from(bytes, (b) => b.toString(16).padStart(2, "0")).join("");
+}
 
 apiClient.interceptors.request.use((config) => {
   const isMutating = MUTATING_METHODS.includes(config.method?.toLowerCase() ?? "");
@@ -52,6 +59,13 @@ apiClient.interceptors.request.use((config) => {
   if (isMutating && !isExempt && csrfToken) {
     config.headers["X-CSRF-Token"] = csrfToken;
   }
+  // Повтор того же config (сетевой сбой) уходит с тем же ключом – сервер вернёт сохранённый ответ.
+  // Форма может передать свой ключ, общий для повторных нажатий «Сохранить».
+  const isIdempotent = IDEMPOTENT_METHODS.includes(config.method?.toLowerCase() ?? "");
+  const isAuth = config.url?.includes("/api/auth/");
+  if (isIdempotent && !isAuth && !config.headers["Idempotency-Key"]) {
+    config.headers["Idempotency-Key"] = newIdempotencyKey();
+  }
   return config;
 });
 
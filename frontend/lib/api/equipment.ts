@@ -1,6 +1,6 @@
 import type {
   Equipment, EquipmentCreate, EquipmentListResponse, EquipmentStats, EquipmentUpdate,
-  Movement, MovementCreate, MovementListResponse,
+  BulkMovementCreate, BulkMovementResult, Movement, MovementCreate, MovementListResponse, OwnershipAsOf, OwnershipSnapshot,
   StorageDevice, StorageDeviceCreate, StorageDeviceListResponse, StorageDeviceUpdate,
 } from "@/types/equipment";
 import apiClient from "./client";
@@ -13,6 +13,7 @@ export const equipmentApi = {
     status?: string;
     search?: string;
     is_personal?: boolean;
+    fields?: string;
   }): Promise<EquipmentListResponse> => {
     const { data } = await apiClient.get("/api/equipment/", { params });
     return data;
@@ -37,12 +38,29 @@ export const equipmentApi = {
     await apiClient.delete(`/api/equipment/${id}`);
   },
 
-  createMovement: async (payload: MovementCreate): Promise<Movement> => {
-    const { data } = await apiClient.post("/api/equipment/movements", payload);
+  createMovement: async (payload: MovementCreate, idempotencyKey?: string): Promise<Movement> => {
+    const { data } = await apiClient.post("/api/equipment/movements", payload, {
+      headers: idempotencyKey ? { "Idempotency-Key": idempotencyKey } : undefined,
+    });
     return data;
   },
 
-  getMovementHistory: async (equipmentId: number, params?: { skip?: number; limit?: number }): Promise<MovementListResponse> => {
+  createMovementsBulk: async (payload: BulkMovementCreate): Promise<BulkMovementResult> => {
+    const { data } = await apiClient.post("/api/equipment/movements/bulk", payload);
+    return data;
+  },
+
+  getOwnerAt: async (id: number, at: string): Promise<OwnershipAsOf> => {
+    const { data } = await apiClient.get(`/api/equipment/${id}/owner-at`, { params: { at } });
+    return data;
+  },
+
+  getOwnershipSnapshot: async (params: { at: string; equipment_type?: string }): Promise<OwnershipSnapshot> => {
+    const { data } = await apiClient.get("/api/equipment/ownership-at", { params });
+    return data;
+  },
+
+  getMovementHistory: async (equipmentId: number, params?: { skip?: number; limit?: number; fields?: string }): Promise<MovementListResponse> => {
     const { data } = await apiClient.get(`/api/equipment/${equipmentId}/movements`, { params });
     return data;
   },
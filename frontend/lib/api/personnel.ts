@@ -1,5 +1,6 @@
 import { cleanEmptyStrings } from "@/lib/utils/transform";
-import type { Personnel, PersonnelCreate, PersonnelListResponse, PersonnelUpdate } from "@/types/personnel";
+import type { OwnershipAsOf } from "@/types/equipment";
+import type { Personnel, PersonnelAssets, PersonnelCreate, PersonnelListResponse, PersonnelUpdate } from "@/types/personnel";
 import apiClient from "./client";
 
 export const personnelApi = {
@@ -8,6 +9,24 @@ export const personnelApi = {
     return data;
   },
 
+  getEquipmentAt: async (id: number, at: string): Promise<OwnershipAsOf[]> => {
+    const { data } = await apiClient.get(`/api/personnel/${id}/equipment-at`, { params: { at } });
+    return data;
+  },
+
+  getAssets: async (id: number): Promise<PersonnelAssets> => {
+    const { data } = await apiClient.get(`/api/personnel/${id}/assets`);
+    return data;
+  },
+
+  // ?ids=1&ids=2 – FastAPI не принимает ids[]=1 (формат axios по умолчанию)
+  getAssetsBatch: async (ids: number[]): Promise<PersonnelAssets[]> => {
+    const params = new URLSearchParams();
+    ids.forEach((id) => params.append("ids", String(id)));
+    const { data } = await apiClient.get("/api/personnel/assets", { params });
+    return data;
+  },
+
   getById: async (id: number): Promise<Personnel> => {
     const { data } = await apiClient.get(`/api/personnel/${id}`);
     return data;
@@ -1,4 +1,4 @@
-import type { Phone, PhoneCreate, PhoneListResponse, PhoneUpdate, StatusReport } from "@/types/phone";
+import type { BatchStatusResult, Phone, PhoneCreate, PhoneListResponse, PhoneUpdate, StatusCounts, StatusReport } from "@/types/phone";
 import apiClient from "./client";
 
 export const phonesApi = {
@@ -26,18 +26,23 @@ export const phonesApi = {
     await apiClient.delete(`/api/phones/${id}`);
   },
 
-  batchCheckin: async (phoneIds: number[]): Promise<{ message: string; count: number }> => {
-    const { data } = await apiClient.post("/api/phones/batch-checkin", { phone_ids: phoneIds });
+  batchCheckin: async (phoneIds: number[], bestEffort = false): Promise<BatchStatusResult> => {
+    const { data } = await apiClient.post("/api/phones/batch-checkin", { phone_ids: phoneIds, best_effort: bestEffort });
     return data;
   },
 
-  batchCheckout: async (phoneIds: number[]): Promise<{ message: string; count: number }> => {
-    const { data } = await apiClient.post("/api/phones/batch-checkout", { phone_ids: phoneIds });
+  batchCheckout: async (phoneIds: number[], bestEffort = false): Promise<BatchStatusResult> => {
+    const { data } = await apiClient.post("/api/phones/batch-checkout", { phone_ids: phoneIds, best_effort: bestEffort });
     return data;
   },
 
-  getStatusReport: async (): Promise<StatusReport> => {
-    const { data } = await apiClient.get("/api/phones/reports/status");
+  getStatusReport: async (params?: { skip?: number; limit?: number; platoon?: string }): Promise<StatusReport> => {
+    const { data } = await apiClient.get("/api/phones/reports/status", { params });
+    return data;
+  },
+
+  getStatusCounts: async (): Promise<StatusCounts> => {
+    const { data } = await apiClient.get("/api/phones/reports/status/count");
     return data;
   },
 };
\ No newline at end of file
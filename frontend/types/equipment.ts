@@ -98,6 +98,46 @@ export interface MovementCreate {
 	reason?: string;
 }
 
+export interface BulkMovementCreate {
+	equipment_ids: number[];
+	to_location: string;
+	from_person_id?: number;
+	to_person_id?: number;
+	movement_type: string;
+	document_number?: string;
+	document_date?: string;
+	reason?: string;
+}
+
+export interface BulkMovementResult {
+	moved: number;
+	items: {
+		equipment_id: number;
+		status: "moved" | "not_found" | "duplicate";
+		movement_id?: number | null;
+	}[];
+}
+
+export interface OwnershipAsOf {
+	equipment_id: number;
+	equipment_type?: string | null;
+	inventory_number?: string | null;
+	serial_number?: string | null;
+	model?: string | null;
+	person_id?: number | null;
+	person_name?: string | null;
+	person_rank?: string | null;
+	location?: string | null;
+	movement_id?: number | null;
+	moved_at?: string | null;
+	document_number?: string | null;
+}
+
+export interface OwnershipSnapshot {
+	at: string;
+	items: OwnershipAsOf[];
+}
+
 export interface MovementListResponse {
 	total: number;
 	items: Movement[];
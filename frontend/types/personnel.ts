@@ -35,4 +35,51 @@ export type PersonnelUpdate = Partial<PersonnelCreate>;
 export interface PersonnelListResponse {
 	total: number;
 	items: Personnel[];
+}
+
+export interface AssetPhone {
+	id: number;
+	model?: string;
+	color?: string;
+	imei_1?: string;
+	imei_2?: string;
+	serial_number?: string;
+	has_camera?: boolean;
+	has_recorder?: boolean;
+	storage_location?: string;
+	status?: string;
+}
+
+export interface AssetEquipment {
+	id: number;
+	equipment_type: string;
+	inventory_number?: string;
+	serial_number?: string;
+	manufacturer?: string;
+	model?: string;
+	current_location?: string;
+	status?: string;
+	is_personal: boolean;
+}
+
+export interface AssetStorageAndPass {
+	id: number;
+	asset_type: string;
+	serial_number: string;
+	model?: string;
+	manufacturer?: string;
+	status: string;
+	capacity_gb?: number;
+	access_level?: number;
+	issue_date?: string;
+}
+
+export interface PersonnelAssets {
+	personnel_id: number;
+	full_name: string;
+	rank?: string;
+	platoon?: string;
+	phones: AssetPhone[];
+	equipment: AssetEquipment[];
+	storage_and_passes: AssetStorageAndPass[];
 }
\ No newline at end of file
@@ -37,9 +37,25 @@ export interface PhoneListResponse {
 	items: Phone[];
 }
 
-export interface StatusReport {
+export interface StatusCounts {
 	total_phones: number;
 	checked_in: number;
 	checked_out: number;
-	phones_not_submitted: Phone[];
+}
+
+export interface BatchStatusResult {
+	message: string;
+	count: number;
+	applied: number[];
+	skipped: number[];
+	missing: number[];
+}
+
+export interface NotSubmittedPhone extends Phone {
+	owner_platoon?: string | null;
+}
+
+export interface StatusReport extends StatusCounts {
+	not_submitted_total: number;
+	phones_not_submitted: NotSubmittedPhone[];
 }